@@ -0,0 +1,167 @@
+"""
+Admission Module - Concurrency limit and load shedding in front of the pipeline
+
+During a spike every /generate request used to be accepted and wait behind
+slow LLM calls until its client gave up, and the LLM work done for it was
+wasted. AdmissionController bounds the work in progress instead:
+
+- At most `max_concurrency` requests run the pipeline at once; later ones
+  wait in a first come, first served queue of at most `max_queue`.
+- A request is shed up front (OverloadedError, a 503 with Retry-After)
+  when the queue is full or its expected wait is over `max_wait`. The
+  expected wait is the number of runs that must finish before it starts
+  divided by the concurrency, times the moving average run time.
+- A queued request that has still not started after `max_wait` is shed
+  as well, so a wrong estimate cannot keep it waiting longer.
+
+Rejecting early is cheaper for everyone: the client retries later instead
+of timing out, and admitted requests keep a latency close to one run's.
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from metrics import registry
+
+registry.describe("admission_wait_seconds", "histogram", "Time admitted requests waited for a pipeline slot.")
+registry.describe("admission_shed_total", "counter", "Requests rejected by admission control, by reason.")
+
+
+class OverloadedError(Exception):
+    """Raised when a request is shed instead of admitted."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Concurrency limiter with a bounded, deadline-aware wait queue.
+
+    Runs on one event loop and needs no locks. A max_concurrency of 0
+    disables the limit; requests are still counted. Until the first run
+    finishes there is no run time estimate and only the queue bound and
+    the `max_wait` timeout apply.
+    """
+
+    def __init__(self, max_concurrency: int = 32, max_queue: int = 64, max_wait: float = 10.0, smoothing: float = 0.2):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.smoothing = smoothing
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self.run_seconds: Optional[float] = None
+        self.admitted = 0
+        self.queued = 0
+        self.shed = {"queue_full": 0, "expected_wait": 0, "timeout": 0}
+        self.total_wait = 0.0
+        self.max_waited = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_concurrency > 0
+
+    def expected_wait(self) -> float:
+        """Seconds a request arriving now would wait for a slot."""
+        if not self.enabled or self.in_flight < self.max_concurrency or self.run_seconds is None:
+            return 0.0
+        # It starts once the queue ahead of it and one more run have finished
+        return (len(self._waiters) + 1) / self.max_concurrency * self.run_seconds
+
+    def _reject(self, reason: str, message: str) -> OverloadedError:
+        self.shed[reason] += 1
+        registry.inc("admission_shed_total", reason=reason)
+        # Tell the client when a slot should be free, or one run time if unknown
+        return OverloadedError(message, retry_after=self.expected_wait() or self.run_seconds or self.max_wait)
+
+    def _admit(self, waited: float) -> float:
+        self.admitted += 1
+        self.total_wait += waited
+        self.max_waited = max(self.max_waited, waited)
+        registry.observe("admission_wait_seconds", waited)
+        return waited
+
+    async def acquire(self) -> float:
+        """
+        Take a pipeline slot, waiting in the queue if all are busy.
+
+        Returns the seconds waited. Every successful acquire() must be
+        paired with release().
+
+        Raises:
+            OverloadedError: If the request is shed
+        """
+        if not self.enabled or (self.in_flight < self.max_concurrency and not self._waiters):
+            self.in_flight += 1
+            return self._admit(0.0)
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject("queue_full", f"Server overloaded: all {self.max_concurrency} slots busy and the queue is full")
+        expected = self.expected_wait()
+        if expected > self.max_wait:
+            raise self._reject("expected_wait", f"Server overloaded: expected wait {expected:.1f}s")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        began = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter, self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait ended: give it back
+                self.release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                raise self._reject("timeout", f"Server overloaded: no slot within {self.max_wait:.0f}s") from None
+            raise
+        # release() handed its slot over, so in_flight already counts this request
+        return self._admit(time.monotonic() - began)
+
+    def release(self, run_seconds: Optional[float] = None) -> None:
+        """Free a slot, passing it to the oldest waiter; `run_seconds` updates the estimate."""
+        if run_seconds is not None:
+            self.run_seconds = (
+                run_seconds if self.run_seconds is None
+                else (1 - self.smoothing) * self.run_seconds + self.smoothing * run_seconds
+            )
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[float]:
+        """Hold a slot for the body of the block; yields the seconds waited."""
+        waited = await self.acquire()
+        began = time.monotonic()
+        try:
+            yield waited
+        finally:
+            self.release(time.monotonic() - began)
+
+    def get_stats(self) -> dict:
+        """Return occupancy, queueing and shedding counters for monitoring."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": len(self._waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed": sum(self.shed.values()),
+            "shed_queue_full": self.shed["queue_full"],
+            "shed_expected_wait": self.shed["expected_wait"],
+            "shed_timeout": self.shed["timeout"],
+            "avg_wait_ms": 1000 * self.total_wait / self.admitted if self.admitted else 0.0,
+            "max_wait_ms": 1000 * self.max_waited,
+            "avg_run_ms": 1000 * self.run_seconds if self.run_seconds is not None else None,
+            "expected_wait_ms": 1000 * self.expected_wait(),
+        }
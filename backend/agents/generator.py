@@ -7,15 +7,17 @@ The Generator Agent creates age-appropriate explanations and multiple-choice
 questions (MCQs) based on the specified grade level and subject topic.
 """
 
-import json
 import re
-from typing import Optional
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
 from pydantic import BaseModel, Field
 
-import sys
-import os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import generate_completion
+from config import GENERATOR_PROFILE, ModelProfile, agenerate_completion, astream_completion, generate_completion
+from metrics import registry
+from prompts import PromptTemplate, prompt_registry
+from structured import JSONStream, StructuredOutputError, parse_model
+from tracing import traced
 
 
 # ============================================================================
@@ -41,6 +43,191 @@ class GeneratorOutput(BaseModel):
     mcqs: list[MCQ]
 
 
+class PartialGeneratorOutput(BaseModel):
+    """Replacement parts produced by a partial refinement."""
+    explanation: Optional[str] = None
+    mcqs: list[MCQ] = Field(default_factory=list)
+
+
+class GeneratorDraft(BaseModel):
+    """A generator reply parsed without validating its questions, so they can be repaired."""
+    explanation: Optional[str] = None
+    mcqs: list[Any] = Field(default_factory=list)
+
+
+# ============================================================================
+# Output Validation and Repair
+# ============================================================================
+
+MCQ_COUNT = 5
+OPTION_LETTERS = "ABCD"
+
+# "A. ", "a) ", "(B) ", "[C]: " at the start of an option or answer
+_LETTER_PREFIX = re.compile(r"^\s*[(\[]?([A-Da-d])[.):\]]+\s*")
+# A bare or lightly decorated answer letter: "B", "b.", "(C)", "Option D", "Answer: A"
+_ANSWER_LETTER = re.compile(r"^\s*(?:(?:option|answer)\s*:?\s*)?[(\[]?([A-Da-d])(?:[.):\]]|\s|$)", re.IGNORECASE)
+
+registry.describe("generator_outputs_total", "counter", "Generator replies by how they were made valid")
+
+
+def _answer_letter(answer: Any, option_texts: list[str]) -> Optional[str]:
+    """Map an answer to its option letter; it may be the letter or the option text."""
+    if not isinstance(answer, str):
+        return None
+    text = answer.strip().lower()
+    unprefixed = _LETTER_PREFIX.sub("", text, count=1).strip()
+    for letter, option in zip(OPTION_LETTERS, option_texts):
+        if option.lower() in (text, unprefixed):
+            return letter
+    match = _ANSWER_LETTER.match(answer)
+    return match.group(1).upper() if match else None
+
+
+def normalize_mcq(raw: Any) -> tuple[Optional[MCQ], bool, Optional[str]]:
+    """
+    Validate one question from a reply, fixing what can be fixed locally.
+    
+    Option labels are rewritten as "A. ", "B. ", ... and the answer is
+    reduced to its letter ("B.", "(b)" and the option's text all become
+    "B"). Returns (mcq, changed, problem): the valid question and whether
+    it had to be fixed, or None and what is wrong with it.
+    """
+    if not isinstance(raw, dict):
+        return None, False, "is not a question object"
+    question, options, answer = raw.get("question"), raw.get("options"), raw.get("answer")
+    if isinstance(options, dict):
+        options = [options[key] for key in sorted(options)]
+    if not isinstance(question, str) or not question.strip():
+        return None, False, "has no question text"
+    if not isinstance(options, list) or len(options) != len(OPTION_LETTERS):
+        count = len(options) if isinstance(options, list) else "no"
+        return None, False, f"has {count} options instead of {len(OPTION_LETTERS)}"
+    
+    texts = [_LETTER_PREFIX.sub("", str(option), count=1).strip() for option in options]
+    letter = _answer_letter(answer, texts)
+    if letter is None:
+        return None, False, f"has an answer ({answer!r}) that is not one of its options"
+    fixed = {
+        "question": question,
+        "options": [f"{label}. {text}" for label, text in zip(OPTION_LETTERS, texts)],
+        "answer": letter,
+    }
+    changed = fixed != {key: raw.get(key) for key in fixed}
+    return MCQ(**fixed), changed, None
+
+
+@dataclass
+class DraftCheck:
+    """The valid parts of a generator reply and what is missing or broken."""
+    explanation: Optional[str]
+    mcqs: list[MCQ]
+    problems: list[str] = field(default_factory=list)
+    fixed: int = 0
+    
+    @property
+    def missing(self) -> int:
+        return MCQ_COUNT - len(self.mcqs)
+    
+    @property
+    def complete(self) -> bool:
+        return bool(self.explanation) and self.missing == 0
+    
+    def output(self) -> GeneratorOutput:
+        return GeneratorOutput(explanation=self.explanation, mcqs=self.mcqs)
+
+
+def check_draft(draft: GeneratorDraft, mcq_count: int = MCQ_COUNT) -> DraftCheck:
+    """Normalize a parsed reply's questions and list its problems."""
+    explanation = draft.explanation if draft.explanation and draft.explanation.strip() else None
+    problems = [] if explanation else ["The explanation was missing or empty."]
+    mcqs = []
+    fixed = 0
+    for i, raw in enumerate(draft.mcqs):
+        mcq, changed, problem = normalize_mcq(raw)
+        if problem:
+            problems.append(f"Question {i + 1} {problem}.")
+        else:
+            mcqs.append(mcq)
+            fixed += changed
+    if len(mcqs) > mcq_count:
+        fixed += 1  # Extra questions are dropped
+    if len(draft.mcqs) < mcq_count:
+        problems.append(f"Only {len(draft.mcqs)} of the {mcq_count} questions were written.")
+    return DraftCheck(explanation=explanation, mcqs=mcqs[:mcq_count], problems=problems, fixed=fixed)
+
+
+# ============================================================================
+# Prompt Templates
+# ============================================================================
+
+LANGUAGE_GUIDES = {
+    (1, 3): "Use very simple words and short sentences. Be playful and fun.",
+    (4, 6): "Use clear, straightforward language. Include relatable examples.",
+    (7, 9): "Use standard academic language. Include more detailed explanations.",
+    (10, 12): "Use sophisticated vocabulary. Include technical terms with context.",
+}
+_GUIDE_BY_GRADE = {
+    grade: guide for (low, high), guide in LANGUAGE_GUIDES.items() for grade in range(low, high + 1)
+}
+
+_MCQ_SCHEMA = (
+    '{"question": "<question>", "options": ["A. <option>", "B. <option>", "C. <option>", "D. <option>"], '
+    '"answer": "<A, B, C, or D>"}'
+)
+_EXPLANATION_SCHEMA = '"explanation": "<detailed explanation appropriate for the grade>"'
+
+GENERATE_TEMPLATE = prompt_registry.register(PromptTemplate(
+    name="generator.full",
+    version=3,
+    prefix=f"""Generate educational content for the grade level and topic given at the end.
+
+**Instructions:**
+1. Create a clear, age-appropriate explanation of the topic (3-5 paragraphs)
+2. Generate exactly {MCQ_COUNT} multiple-choice questions (MCQs) covering different aspects of the topic
+3. Each MCQ must have exactly 4 options labeled A, B, C, D
+4. Ensure concepts are accurate and appropriate for the grade level
+5. Questions should range from basic recall to application/understanding
+6. Follow the language guidelines given for the grade
+
+**Output Format:**
+Return ONLY a valid JSON object with this exact structure (no markdown, no code blocks, no extra text):
+{{{_EXPLANATION_SCHEMA}, "mcqs": [{_MCQ_SCHEMA}, ...]}}
+**Return these fields:** "explanation" and "mcqs" (exactly {MCQ_COUNT} questions)
+
+""",
+    suffix="""**Grade Level:** {grade}
+**Topic:** {topic}
+**Language Guidelines:** {language_guide}
+{feedback}""",
+))
+
+PARTIAL_TEMPLATE = prompt_registry.register(PromptTemplate(
+    name="generator.partial",
+    version=3,
+    prefix=f"""Revise part of an educational lesson. Write only the parts requested at the end, addressing ALL of the points listed there, and do not repeat the questions being kept.
+Ensure concepts are accurate and appropriate for the grade level. Every MCQ needs exactly 4 options labeled A, B, C, D.
+
+**Output Format:**
+Return ONLY a valid JSON object holding just the requested fields (no markdown, no code blocks, no extra text), shaped like:
+{{{_EXPLANATION_SCHEMA}, "mcqs": [{_MCQ_SCHEMA}, ...]}}
+
+""",
+    suffix="""**Grade Level:** {grade}
+**Topic:** {topic}
+**Language Guidelines:** {language_guide}
+
+**{feedback_heading}:**
+{feedback}
+
+**Questions being kept (do not repeat them):**
+{kept}
+
+**Write:** {parts}
+**Return these fields:** {fields}
+""",
+))
+
+
 # ============================================================================
 # Generator Agent Implementation
 # ============================================================================
@@ -53,10 +240,19 @@ class GeneratorAgent:
     and multiple-choice questions for any given topic.
     """
     
-    def __init__(self):
-        """Initialize the Generator Agent."""
-        pass
+    SYSTEM_PROMPT = "You are an expert educational content creator. Always respond with valid JSON only."
+    
+    def __init__(self, profile: Optional[ModelProfile] = None):
+        """Initialize the Generator Agent with its model profile (GENERATOR_PROFILE by default)."""
+        self.profile = profile or GENERATOR_PROFILE
+        self._lock = threading.Lock()
+        self.output_stats = {"valid": 0, "local": 0, "targeted": 0, "full_regeneration": 0, "failed": 0}
     
+    def _language_guide(self, grade: int) -> str:
+        """Return the language guideline for a grade level."""
+        return _GUIDE_BY_GRADE.get(grade, "")
+    
+    @traced("generator._build_prompt")
     def _build_prompt(
         self, 
         grade: int, 
@@ -74,101 +270,162 @@ class GeneratorAgent:
         Returns:
             Formatted prompt string
         """
-        grade_guidelines = {
-            (1, 3): "Use very simple words and short sentences. Be playful and fun.",
-            (4, 6): "Use clear, straightforward language. Include relatable examples.",
-            (7, 9): "Use standard academic language. Include more detailed explanations.",
-            (10, 12): "Use sophisticated vocabulary. Include technical terms with context.",
-        }
-        
-        language_guide = ""
-        for (low, high), guide in grade_guidelines.items():
-            if low <= grade <= high:
-                language_guide = guide
-                break
-        
-        prompt = f"""Generate educational content for:
-
-**Grade Level:** {grade}
-**Topic:** {topic}
-
-**Language Guidelines:** {language_guide}
-
-**Instructions:**
-1. Create a clear, age-appropriate explanation of the topic (3-5 paragraphs)
-2. Generate exactly 5 multiple-choice questions (MCQs) covering different aspects of the topic
-3. Each MCQ must have exactly 4 options labeled A, B, C, D
-4. Ensure concepts are accurate and appropriate for the grade level
-5. Questions should range from basic recall to application/understanding
-
-"""
-        
+        feedback_block = ""
         if feedback:
             feedback_text = "\n".join(f"- {fb}" for fb in feedback)
-            prompt += f"""
+            feedback_block = f"""
 **IMPORTANT - Address this feedback from the reviewer:**
 {feedback_text}
 
 Please regenerate the content addressing ALL feedback points above.
-
-"""
-        
-        prompt += """**Output Format:**
-Return ONLY a valid JSON object with this exact structure (no markdown, no code blocks, no extra text):
-{
-    "explanation": "<detailed explanation appropriate for the grade>",
-    "mcqs": [
-        {
-            "question": "<question 1>",
-            "options": ["A. <option>", "B. <option>", "C. <option>", "D. <option>"],
-            "answer": "<A, B, C, or D>"
-        },
-        {
-            "question": "<question 2>",
-            "options": ["A. <option>", "B. <option>", "C. <option>", "D. <option>"],
-            "answer": "<A, B, C, or D>"
-        },
-        {
-            "question": "<question 3>",
-            "options": ["A. <option>", "B. <option>", "C. <option>", "D. <option>"],
-            "answer": "<A, B, C, or D>"
-        },
-        {
-            "question": "<question 4>",
-            "options": ["A. <option>", "B. <option>", "C. <option>", "D. <option>"],
-            "answer": "<A, B, C, or D>"
-        },
-        {
-            "question": "<question 5>",
-            "options": ["A. <option>", "B. <option>", "C. <option>", "D. <option>"],
-            "answer": "<A, B, C, or D>"
-        }
-    ]
-}
 """
-        return prompt
+        return prompt_registry.render(
+            GENERATE_TEMPLATE.name,
+            grade=grade,
+            topic=topic,
+            language_guide=self._language_guide(grade),
+            feedback=feedback_block,
+        )
     
-    def _parse_response(self, response_text: str) -> GeneratorOutput:
-        """Parse the LLM response into structured output."""
-        cleaned = response_text.strip()
+    @traced("generator._build_partial_prompt")
+    def _build_partial_prompt(
+        self,
+        grade: int,
+        topic: str,
+        feedback: list[str],
+        regenerate_explanation: bool,
+        mcq_count: int,
+        keep_mcqs: list[dict],
+        feedback_heading: str = "Reviewer feedback to address"
+    ) -> str:
+        """
+        Build a prompt that regenerates only the failing parts of the content.
         
-        if cleaned.startswith("```json"):
-            cleaned = cleaned[7:]
-        elif cleaned.startswith("```"):
-            cleaned = cleaned[3:]
-        if cleaned.endswith("```"):
-            cleaned = cleaned[:-3]
-        cleaned = cleaned.strip()
+        The questions being kept are listed so replacements do not duplicate
+        them; the prompt only asks for the requested parts.
+        """
+        parts = []
+        fields = []
+        if regenerate_explanation:
+            parts.append("a new clear, age-appropriate explanation of the topic (3-5 paragraphs)")
+            fields.append('"explanation"')
+        if mcq_count:
+            parts.append(f"exactly {mcq_count} new multiple-choice question(s)")
+            fields.append(f'"mcqs" (exactly {mcq_count} questions)')
         
-        json_match = re.search(r'\{[\s\S]*\}', cleaned)
-        if json_match:
-            cleaned = json_match.group()
+        return prompt_registry.render(
+            PARTIAL_TEMPLATE.name,
+            grade=grade,
+            topic=topic,
+            language_guide=self._language_guide(grade),
+            feedback_heading=feedback_heading,
+            feedback="\n".join(f"- {fb}" for fb in feedback),
+            kept="\n".join(f"- {mcq['question']}" for mcq in keep_mcqs) or "- (none)",
+            parts=" and ".join(parts),
+            fields=" and ".join(fields),
+        )
+    
+    @traced("generator._parse_response")
+    def _parse_response(self, response_text: str, candidate: Optional[str] = None) -> Optional[DraftCheck]:
+        """
+        Parse the LLM response and check it, or None if it is not usable JSON.
         
+        `candidate` is the object already scanned from a stream.
+        """
         try:
-            data = json.loads(cleaned)
-            return GeneratorOutput(**data)
-        except (json.JSONDecodeError, Exception) as e:
-            raise ValueError(f"Failed to parse LLM response: {e}")
+            return check_draft(parse_model(response_text, GeneratorDraft, candidate=candidate))
+        except StructuredOutputError:
+            return None
+    
+    @traced("generator._parse_partial_response")
+    def _parse_partial_response(self, response_text: str, mcq_count: int) -> PartialGeneratorOutput:
+        """Parse a partial refinement response, keeping only the questions that are valid."""
+        check = check_draft(parse_model(response_text, GeneratorDraft), mcq_count)
+        return PartialGeneratorOutput(explanation=check.explanation, mcqs=check.mcqs)
+    
+    def _build_repair_prompt(self, input_data: GeneratorInput, check: DraftCheck) -> str:
+        """Ask for just the missing explanation and questions of an invalid reply."""
+        problems = check.problems + [
+            f"Every question needs exactly {len(OPTION_LETTERS)} options labeled A-D and a single-letter answer."
+        ]
+        return self._build_partial_prompt(
+            input_data.grade,
+            input_data.topic,
+            problems,
+            regenerate_explanation=not check.explanation,
+            mcq_count=check.missing,
+            keep_mcqs=[mcq.model_dump() for mcq in check.mcqs],
+            feedback_heading="Problems in the previous output (fix them; do not mention them)",
+        )
+    
+    def _merge_repair(self, check: DraftCheck, response_text: str) -> DraftCheck:
+        """Fill an invalid reply's gaps with the parts from the repair call."""
+        fix = self._parse_partial_response(response_text, check.missing)
+        return DraftCheck(
+            explanation=check.explanation or fix.explanation,
+            mcqs=check.mcqs + fix.mcqs,
+            fixed=check.fixed,
+        )
+    
+    def _accept(self, check: Optional[DraftCheck], outcome: str) -> GeneratorOutput:
+        """Count how a reply was made valid, or raise if it could not be."""
+        if check is None or not check.complete:
+            outcome = "failed"
+        elif outcome == "valid" and check.fixed:
+            outcome = "local"
+        with self._lock:
+            self.output_stats[outcome] += 1
+        registry.inc("generator_outputs_total", outcome=outcome)
+        if outcome == "failed":
+            problems = "; ".join(check.problems) if check else "the reply is not valid JSON"
+            raise StructuredOutputError(f"Generator output is invalid after a full regeneration: {problems}")
+        return check.output()
+    
+    def _repair(self, input_data: GeneratorInput, prompt: str, check: Optional[DraftCheck]) -> GeneratorOutput:
+        """
+        Return a valid output for a checked reply.
+        
+        Local fixes are already applied by check_draft(). Missing or broken
+        parts are requested with one small targeted call; only when that
+        fails, or the reply was not JSON at all, is the content regenerated
+        in full.
+        """
+        if check is not None and check.complete:
+            return self._accept(check, "valid")
+        if check is not None:
+            try:
+                response = generate_completion(self._build_repair_prompt(input_data, check), self.SYSTEM_PROMPT, self.profile)
+                repaired = self._merge_repair(check, response)
+                if repaired.complete:
+                    return self._accept(repaired, "targeted")
+            except StructuredOutputError:
+                pass
+        response = generate_completion(prompt, self.SYSTEM_PROMPT, self.profile)
+        return self._accept(self._parse_response(response), "full_regeneration")
+    
+    async def _arepair(self, input_data: GeneratorInput, prompt: str, check: Optional[DraftCheck]) -> GeneratorOutput:
+        """Async variant of _repair()."""
+        if check is not None and check.complete:
+            return self._accept(check, "valid")
+        if check is not None:
+            try:
+                response = await agenerate_completion(
+                    self._build_repair_prompt(input_data, check), self.SYSTEM_PROMPT, self.profile
+                )
+                repaired = self._merge_repair(check, response)
+                if repaired.complete:
+                    return self._accept(repaired, "targeted")
+            except StructuredOutputError:
+                pass
+        response = await agenerate_completion(prompt, self.SYSTEM_PROMPT, self.profile)
+        return self._accept(self._parse_response(response), "full_regeneration")
+    
+    def get_output_stats(self) -> dict:
+        """Return how replies were made valid, and the full regenerations that saved."""
+        with self._lock:
+            stats = dict(self.output_stats)
+        stats["regenerations_avoided"] = stats["local"] + stats["targeted"]
+        return stats
     
     def generate(
         self, 
@@ -182,10 +439,51 @@ Return ONLY a valid JSON object with this exact structure (no markdown, no code
             feedback=feedback
         )
         
-        system_prompt = "You are an expert educational content creator. Always respond with valid JSON only."
-        response = generate_completion(prompt, system_prompt)
+        response = generate_completion(prompt, self.SYSTEM_PROMPT, self.profile)
+        
+        return self._repair(input_data, prompt, self._parse_response(response))
+    
+    async def agenerate(
+        self, 
+        input_data: GeneratorInput, 
+        feedback: Optional[list[str]] = None
+    ) -> GeneratorOutput:
+        """Async variant of generate() that awaits the LLM call."""
+        prompt = self._build_prompt(
+            grade=input_data.grade,
+            topic=input_data.topic,
+            feedback=feedback
+        )
+        
+        response = await agenerate_completion(prompt, self.SYSTEM_PROMPT, self.profile)
+        
+        return await self._arepair(input_data, prompt, self._parse_response(response))
+    
+    async def astream_generate(
+        self, 
+        input_data: GeneratorInput, 
+        on_explanation: Callable[[str], None],
+        feedback: Optional[list[str]] = None
+    ) -> GeneratorOutput:
+        """
+        Generate content while streaming the explanation as it is produced.
+        
+        `on_explanation` is called with each new piece of explanation text;
+        the fully parsed output is returned once the completion finishes.
+        """
+        prompt = self._build_prompt(
+            grade=input_data.grade,
+            topic=input_data.topic,
+            feedback=feedback
+        )
+        
+        stream = JSONStream(field="explanation")
+        async for chunk in astream_completion(prompt, self.SYSTEM_PROMPT, self.profile):
+            delta = stream.feed(chunk)
+            if delta:
+                on_explanation(delta)
         
-        return self._parse_response(response)
+        return await self._arepair(input_data, prompt, self._parse_response(stream.text, stream.object_text()))
     
     def generate_from_dict(
         self, 
@@ -196,3 +494,33 @@ Return ONLY a valid JSON object with this exact structure (no markdown, no code
         input_data = GeneratorInput(**data)
         output = self.generate(input_data, feedback=feedback)
         return output.model_dump()
+    
+    def generate_partial(
+        self,
+        input_data: GeneratorInput,
+        feedback: list[str],
+        regenerate_explanation: bool,
+        mcq_count: int,
+        keep_mcqs: list[dict]
+    ) -> PartialGeneratorOutput:
+        """Regenerate only the explanation and/or `mcq_count` MCQs."""
+        prompt = self._build_partial_prompt(
+            input_data.grade, input_data.topic, feedback, regenerate_explanation, mcq_count, keep_mcqs
+        )
+        response = generate_completion(prompt, self.SYSTEM_PROMPT, self.profile)
+        return self._parse_partial_response(response, mcq_count)
+    
+    async def agenerate_partial(
+        self,
+        input_data: GeneratorInput,
+        feedback: list[str],
+        regenerate_explanation: bool,
+        mcq_count: int,
+        keep_mcqs: list[dict]
+    ) -> PartialGeneratorOutput:
+        """Async variant of generate_partial()."""
+        prompt = self._build_partial_prompt(
+            input_data.grade, input_data.topic, feedback, regenerate_explanation, mcq_count, keep_mcqs
+        )
+        response = await agenerate_completion(prompt, self.SYSTEM_PROMPT, self.profile)
+        return self._parse_partial_response(response, mcq_count)
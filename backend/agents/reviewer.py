@@ -10,14 +10,13 @@ The Reviewer Agent assesses generated educational content against:
 """
 
 import json
-import re
-from typing import Literal
-from pydantic import BaseModel, Field
+from typing import Literal, Optional, Union
+from pydantic import BaseModel, Field, field_validator
 
-import sys
-import os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import generate_completion
+from config import REVIEWER_PROFILE, ModelProfile, agenerate_completion, generate_completion
+from prompts import PromptTemplate, prompt_registry
+from structured import parse_model
+from tracing import traced
 
 
 # ============================================================================
@@ -32,10 +31,95 @@ class ReviewerInput(BaseModel):
     mcqs: list[dict] = Field(..., description="Generated MCQs")
 
 
+class ReviewItem(BaseModel):
+    """Verdict for one part of the content: the explanation or a single MCQ."""
+    target: Literal["explanation", "mcq"]
+    index: Optional[int] = Field(None, ge=0, description="Zero-based MCQ index (MCQ items only)")
+    status: Literal["pass", "fail"]
+    feedback: list[str] = Field(default_factory=list)
+    
+    @field_validator("status", mode="before")
+    @classmethod
+    def _lowercase_status(cls, value):
+        """Accept "PASS"/"Fail" as models sometimes write it."""
+        return str(value).lower()
+
+
 class ReviewerOutput(BaseModel):
     """Structured output from the Reviewer Agent."""
     status: Literal["pass", "fail"]
     feedback: list[str] = Field(default_factory=list)
+    items: list[ReviewItem] = Field(default_factory=list)
+    
+    @field_validator("status", mode="before")
+    @classmethod
+    def _lowercase_status(cls, value):
+        """Accept "PASS"/"Fail" as models sometimes write it."""
+        return str(value).lower()
+
+
+# ============================================================================
+# Prompt Templates
+# ============================================================================
+
+# Shared by the full and section reviews so both reuse one cached prefix
+_REVIEW_CRITERIA = """Evaluate the educational content given at the end for its target grade.
+
+**Evaluation Criteria:**
+1. **Age Appropriateness:** Is the language suitable for the target grade?
+2. **Conceptual Correctness:** Are all facts and concepts accurate?
+3. **Clarity:** Is the content easy to understand?
+
+**Instructions:**
+- Return "pass" if the content meets ALL criteria satisfactorily
+- Return "fail" if ANY significant issues are found
+- Provide specific, actionable feedback for any issues found
+"""
+
+_VERDICT_SCHEMA = '"status": "pass" or "fail", "feedback": ["<specific issue 1 if any>", "<specific issue 2 if any>"]'
+
+REVIEW_TEMPLATE = prompt_registry.register(PromptTemplate(
+    name="reviewer.full",
+    version=3,
+    prefix=_REVIEW_CRITERIA + f"""- Give a separate verdict for the explanation and for every MCQ in "items", using the MCQ's zero-based "index"
+
+**Output Format:**
+Return ONLY a valid JSON object (no markdown, no code blocks, no extra text):
+{{{_VERDICT_SCHEMA}, "items": [{{"target": "explanation", "status": "pass" or "fail", "feedback": ["<issue if any>"]}}, {{"target": "mcq", "index": <MCQ index>, "status": "pass" or "fail", "feedback": ["<issue if any>"]}}]}}
+
+""",
+    suffix="""**Target Grade:** {grade}
+**Topic:** {topic}
+
+**Explanation:**
+{explanation}
+
+**Multiple Choice Questions (with zero-based index):**
+{mcqs}
+""",
+))
+
+SECTION_TEMPLATE = prompt_registry.register(PromptTemplate(
+    name="reviewer.section",
+    version=3,
+    prefix=_REVIEW_CRITERIA + f"""- Only one part of the lesson is given; judge just that part
+
+**Output Format:**
+Return ONLY a valid JSON object (no markdown, no code blocks, no extra text):
+{{{_VERDICT_SCHEMA}}}
+
+""",
+    suffix="""**Target Grade:** {grade}
+**Topic:** {topic}
+
+{content}
+""",
+))
+
+
+def _compact(value) -> str:
+    """Serialize content embedded in a prompt without indentation or ASCII escapes."""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
 
 
 # ============================================================================
@@ -50,73 +134,56 @@ class ReviewerAgent:
     to ensure it meets quality standards for the target grade level.
     """
     
-    def __init__(self):
-        """Initialize the Reviewer Agent."""
-        pass
+    SYSTEM_PROMPT = "You are an expert educational content reviewer. Always respond with valid JSON only."
     
+    def __init__(self, profile: Optional[ModelProfile] = None):
+        """Initialize the Reviewer Agent with its model profile (REVIEWER_PROFILE by default)."""
+        self.profile = profile or REVIEWER_PROFILE
+    
+    @traced("reviewer._build_prompt")
     def _build_prompt(self, input_data: ReviewerInput) -> str:
         """Build the review prompt for the LLM."""
-        mcqs_formatted = json.dumps(input_data.mcqs, indent=2)
+        return prompt_registry.render(
+            REVIEW_TEMPLATE.name,
+            grade=input_data.grade,
+            topic=input_data.topic,
+            explanation=input_data.explanation,
+            mcqs="\n".join(_compact({"index": i, **mcq}) for i, mcq in enumerate(input_data.mcqs)),
+        )
+    
+    @traced("reviewer._build_section_prompt")
+    def _build_section_prompt(self, input_data: ReviewerInput, section: Union[str, int]) -> str:
+        """
+        Build a review prompt for a single section of the content.
         
-        prompt = f"""Evaluate the following educational content:
-
-**Target Grade:** {input_data.grade}
-**Topic:** {input_data.topic}
-
-**Explanation:**
-{input_data.explanation}
-
-**Multiple Choice Questions:**
-{mcqs_formatted}
-
-**Evaluation Criteria:**
-1. **Age Appropriateness:** Is the language suitable for grade {input_data.grade}?
-2. **Conceptual Correctness:** Are all facts and concepts accurate?
-3. **Clarity:** Is the content easy to understand?
-
-**Instructions:**
-- Return "pass" if the content meets ALL criteria satisfactorily
-- Return "fail" if ANY significant issues are found
-- Provide specific, actionable feedback for any issues found
-
-**Output Format:**
-Return ONLY a valid JSON object (no markdown, no code blocks, no extra text):
-{{
-    "status": "pass" or "fail",
-    "feedback": ["<specific issue 1 if any>", "<specific issue 2 if any>"]
-}}
-"""
-        return prompt
+        `section` is "explanation" or the index of an MCQ. Section prompts are
+        much shorter than the full review, so sections can be reviewed in
+        parallel by the speculative pipeline.
+        """
+        if section == "explanation":
+            content = f"**Explanation:**\n{input_data.explanation}"
+        else:
+            content = f"**Multiple Choice Question {section + 1}:**\n{_compact(input_data.mcqs[section])}"
+        return prompt_registry.render(
+            SECTION_TEMPLATE.name, grade=input_data.grade, topic=input_data.topic, content=content
+        )
     
+    @traced("reviewer._parse_response")
     def _parse_response(self, response_text: str) -> ReviewerOutput:
         """Parse the LLM response into structured output."""
-        cleaned = response_text.strip()
-        
-        if cleaned.startswith("```json"):
-            cleaned = cleaned[7:]
-        elif cleaned.startswith("```"):
-            cleaned = cleaned[3:]
-        if cleaned.endswith("```"):
-            cleaned = cleaned[:-3]
-        cleaned = cleaned.strip()
-        
-        json_match = re.search(r'\{[\s\S]*\}', cleaned)
-        if json_match:
-            cleaned = json_match.group()
-        
-        try:
-            data = json.loads(cleaned)
-            if "status" in data:
-                data["status"] = data["status"].lower()
-            return ReviewerOutput(**data)
-        except (json.JSONDecodeError, Exception) as e:
-            raise ValueError(f"Failed to parse reviewer response: {e}")
+        return parse_model(response_text, ReviewerOutput)
     
     def review(self, input_data: ReviewerInput) -> ReviewerOutput:
         """Review educational content for quality."""
         prompt = self._build_prompt(input_data)
-        system_prompt = "You are an expert educational content reviewer. Always respond with valid JSON only."
-        response = generate_completion(prompt, system_prompt)
+        response = generate_completion(prompt, self.SYSTEM_PROMPT, self.profile)
+        
+        return self._parse_response(response)
+    
+    async def areview(self, input_data: ReviewerInput) -> ReviewerOutput:
+        """Async variant of review() that awaits the LLM call."""
+        prompt = self._build_prompt(input_data)
+        response = await agenerate_completion(prompt, self.SYSTEM_PROMPT, self.profile)
         
         return self._parse_response(response)
     
@@ -130,3 +197,24 @@ Return ONLY a valid JSON object (no markdown, no code blocks, no extra text):
         )
         output = self.review(input_data)
         return output.model_dump()
+    
+    async def areview_section(self, input_data: ReviewerInput, section: Union[str, int]) -> ReviewerOutput:
+        """
+        Review one section ("explanation" or an MCQ index) of generated content.
+        
+        Feedback for an MCQ is prefixed with its question number so verdicts
+        from several sections can be merged into a single review result.
+        """
+        prompt = self._build_section_prompt(input_data, section)
+        response = await agenerate_completion(prompt, self.SYSTEM_PROMPT, self.profile)
+        output = self._parse_response(response)
+        
+        if section != "explanation":
+            output.feedback = [f"Question {section + 1}: {fb}" for fb in output.feedback]
+        output.items = [ReviewItem(
+            target="explanation" if section == "explanation" else "mcq",
+            index=None if section == "explanation" else section,
+            status=output.status,
+            feedback=output.feedback,
+        )]
+        return output
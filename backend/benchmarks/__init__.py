@@ -0,0 +1,7 @@
+"""
+Benchmarks for the Educational Content Generation System.
+
+Run from the ``backend`` directory, e.g.::
+
+    python -m benchmarks.load_generate
+"""
@@ -0,0 +1,144 @@
+"""
+Admission Benchmark - /generate under overload, with and without admission control.
+
+Runs the API in-process against a fake LLM that serves at most
+--llm-capacity calls at once (later calls queue, like a saturated backend),
+so the service can complete about llm_capacity / (2 * latency) requests per
+second. Poisson arrivals at --rate, above that capacity, are offered for
+--duration seconds. A client gives up after --client-timeout seconds, but
+the server keeps working on its request, as it would after a disconnect.
+
+For each mode it reports completed, shed (503) and timed-out requests,
+latency percentiles of completed requests, goodput (answers that arrived
+before the client gave up, per second) and pipeline runs finished for
+clients that had already left, i.e. wasted LLM work:
+
+    python -m benchmarks.admission --rate 40 --duration 15 --llm-capacity 8 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+
+import httpx
+
+from benchmarks.suite import percentile
+
+
+def make_provider(args: argparse.Namespace):
+    """A FakeProvider that serves at most args.llm_capacity calls at once."""
+    from providers import FakeProvider, LatencyModel
+
+    class SaturatingProvider(FakeProvider):
+        def __init__(self):
+            super().__init__(LatencyModel(base=args.latency), seed=args.seed)
+            self.slots = asyncio.Semaphore(args.llm_capacity)
+
+        async def acomplete(self, *call, **options):
+            async with self.slots:
+                return await super().acomplete(*call, **options)
+
+    return SaturatingProvider()
+
+
+async def run_mode(args: argparse.Namespace, max_concurrency: int) -> dict:
+    """Offer the open-loop workload to the API with the given admission limit."""
+    import main
+    from admission import AdmissionController
+    from config import set_provider
+
+    set_provider(make_provider(args))
+    main.admission = AdmissionController(max_concurrency, args.max_queue, args.max_wait)
+    rng = random.Random(args.seed)
+    outcomes = []
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://api", timeout=None) as client:
+        async def one(i: int) -> None:
+            began = time.perf_counter()
+            request = asyncio.ensure_future(client.post("/generate", json={"grade": 5, "topic": f"Topic {i}"}))
+            # Give up waiting without cancelling the server's work on the request
+            done, _ = await asyncio.wait({request}, timeout=args.client_timeout)
+            waited = time.perf_counter() - began
+            if not done:
+                outcomes.append(("timeout", waited))
+                response = await request
+                if response.status_code == 200:
+                    outcomes.append(("wasted", time.perf_counter() - began))
+                return
+            status_code = request.result().status_code
+            outcomes.append(("ok" if status_code == 200 else "shed" if status_code == 503 else "error", waited))
+
+        tasks = []
+        began = time.perf_counter()
+        deadline = began + args.duration
+        i = 0
+        while time.perf_counter() < deadline:
+            tasks.append(asyncio.create_task(one(i)))
+            i += 1
+            await asyncio.sleep(rng.expovariate(args.rate))
+        offered_for = time.perf_counter() - began
+        await asyncio.gather(*tasks)
+        drained_after = time.perf_counter() - began
+
+    latencies = {kind: sorted(s for k, s in outcomes if k == kind) for kind in ("ok", "shed", "timeout", "wasted", "error")}
+    ok = latencies["ok"]
+    return {
+        "offered": i,
+        "ok": len(ok),
+        "shed": len(latencies["shed"]),
+        "timeout": len(latencies["timeout"]),
+        "wasted": len(latencies["wasted"]),
+        "errors": len(latencies["error"]),
+        "goodput": len(ok) / offered_for,
+        "drain_s": drained_after,
+        "p50_s": percentile(ok, 50),
+        "p95_s": percentile(ok, 95),
+        "p99_s": percentile(ok, 99),
+        "max_s": ok[-1] if ok else 0.0,
+        "shed_p50_ms": 1000 * percentile(latencies["shed"], 50),
+        "admission": main.admission.get_stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test /generate above capacity with and without admission control")
+    parser.add_argument("--rate", type=float, default=40.0, help="Offered requests per second")
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds of offered load")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM seconds per call")
+    parser.add_argument("--llm-capacity", type=int, default=8, help="LLM calls served at once")
+    parser.add_argument("--client-timeout", type=float, default=10.0, help="Seconds before a client gives up")
+    parser.add_argument("--max-concurrency", type=int, default=8, help="Admission limit (ADMISSION_MAX_CONCURRENCY)")
+    parser.add_argument("--max-queue", type=int, default=64, help="ADMISSION_MAX_QUEUE")
+    parser.add_argument("--max-wait", type=float, default=2.0, help="ADMISSION_MAX_WAIT_SECONDS")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Never touch the real API, measure uncached runs only and store nothing
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["CACHE_BACKEND"] = "none"
+    os.environ["CONTENT_STORE"] = "none"
+
+    capacity = args.llm_capacity / (2 * args.latency)
+    print(f"offered {args.rate:.0f} req/s for {args.duration:.0f}s against ~{capacity:.0f} req/s of LLM capacity, "
+          f"clients give up after {args.client_timeout:.0f}s")
+    print(f"{'admission':<18} {'offered':>7} {'ok':>5} {'503':>5} {'timeout':>7} {'wasted':>6} {'goodput':>8} "
+          f"{'p50 s':>6} {'p95 s':>6} {'p99 s':>6} {'max s':>6} {'503 p50 ms':>10}")
+    for label, limit in (("off", 0), (f"on (limit {args.max_concurrency})", args.max_concurrency)):
+        r = asyncio.run(run_mode(args, limit))
+        print(
+            f"{label:<18} {r['offered']:>7} {r['ok']:>5} {r['shed']:>5} {r['timeout']:>7} {r['wasted']:>6} "
+            f"{r['goodput']:>8.1f} {r['p50_s']:>6.2f} {r['p95_s']:>6.2f} {r['p99_s']:>6.2f} {r['max_s']:>6.2f} "
+            f"{r['shed_p50_ms']:>10.1f}"
+        )
+        if limit:
+            stats = r["admission"]
+            print(f"  queued {stats['queued']}, avg wait {stats['avg_wait_ms']:.0f}ms, max wait {stats['max_wait_ms']:.0f}ms, "
+                  f"shed: queue full {stats['shed_queue_full']}, expected wait {stats['shed_expected_wait']}, "
+                  f"timeout {stats['shed_timeout']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Batch Throughput Benchmark - EducationalContentPipeline.arun_many scaling.
+
+Runs the same batch at several concurrency limits against the fake LLM
+server. Throughput should grow with the concurrency limit while the wall
+time depends on items / concurrency rather than on the batch length alone:
+
+    python -m benchmarks.batch_throughput --items 64 --concurrency 1 4 16
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.load_generate import start_server, wait_until_up
+
+
+async def run_batches(items: int, levels: list[int]) -> None:
+    """Run one batch per concurrency level and print throughput."""
+    from pipeline import EducationalContentPipeline
+    
+    pipeline = EducationalContentPipeline(cache=None)
+    print(f"{'concurrency':>12} {'wall (s)':>10} {'items/s':>10} {'failed':>8}")
+    for concurrency in levels:
+        batch = [{"grade": 1 + i % 12, "topic": f"Topic {concurrency}-{i}"} for i in range(items)]
+        start = time.perf_counter()
+        results = await pipeline.arun_many(batch, concurrency=concurrency)
+        wall = time.perf_counter() - start
+        failed = sum(1 for r in results if r.error)
+        print(f"{concurrency:>12} {wall:>10.2f} {items / wall:>10.1f} {failed:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch generation throughput")
+    parser.add_argument("--items", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM seconds per call")
+    parser.add_argument("--llm-port", type=int, default=9102)
+    args = parser.parse_args()
+    
+    os.environ["GROQ_API_KEY"] = os.environ.get("GROQ_API_KEY") or "benchmark-key"
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{args.llm_port}"
+    
+    llm = start_server(
+        ["-m", "benchmarks.fake_llm_server", "--port", str(args.llm_port), "--latency", str(args.latency)],
+        dict(os.environ),
+    )
+    try:
+        asyncio.run(wait_until_up(f"http://127.0.0.1:{args.llm_port}/docs"))
+        asyncio.run(run_batches(args.items, args.concurrency))
+    finally:
+        llm.terminate()
+        llm.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Breaker Check - a cancelled half-open probe must not take a backend out for good.
+
+Opens the circuit breaker of a single fake backend, lets its cool-down pass
+and cancels the half-open probe call mid-flight, the way a request deadline,
+a losing hedge or a client disconnect does. Does the same for a stream
+closed early and for a background health check, and checks each time that
+the breaker admits a new probe and that a following call succeeds:
+
+    python -m benchmarks.breaker_check
+"""
+
+import asyncio
+
+from providers import FakeProvider, LatencyModel
+from router import BackendSpec, CircuitBreaker, RoutedBackend, RouterProvider
+
+MESSAGES = [{"role": "user", "content": "Explain photosynthesis."}]
+
+
+def half_open_router() -> RouterProvider:
+    """A router over one fake backend whose breaker has just become ready to probe."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    backend = RoutedBackend(BackendSpec(name="fake", kind="fake"), FakeProvider(LatencyModel(base=0.2)), breaker)
+    return RouterProvider([backend], default_model="fake-model")
+
+
+async def check(label: str, interrupt) -> None:
+    """Interrupt a half-open probe with `interrupt(router)`, then expect a working backend."""
+    router = half_open_router()
+    breaker = router.backends[0].breaker
+    await interrupt(router)
+    assert breaker.ready_in() == 0.0, f"{label}: breaker still blocks calls (state {breaker.state})"
+    await router.acomplete(MESSAGES, "fake-model", 0.7, 64)
+    assert breaker.state == "closed", f"{label}: breaker is {breaker.state} after a successful probe"
+    print(f"{label:<22} ok")
+
+
+async def cancel_acomplete(router: RouterProvider) -> None:
+    task = asyncio.create_task(router.acomplete(MESSAGES, "fake-model", 0.7, 64))
+    await asyncio.sleep(0.05)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+async def close_stream_early(router: RouterProvider) -> None:
+    stream = router.astream(MESSAGES, "fake-model", 0.7, 64)
+    await anext(stream)
+    await stream.aclose()
+
+
+async def cancel_health_check(router: RouterProvider) -> None:
+    task = asyncio.create_task(router.check_health())
+    await asyncio.sleep(0.05)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+async def main() -> None:
+    await check("cancelled call", cancel_acomplete)
+    await check("stream closed early", close_stream_early)
+    await check("cancelled health check", cancel_health_check)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,127 @@
+"""
+Content Store Benchmark - insert and query rates of the SQLite content store.
+
+Fills a fresh store with --rows realistic results (spread over grades,
+topics, review outcomes and a year of creation times) and reports:
+- insert rate for single commits (the /generate path) and for batches
+- latency of the first listing page, unfiltered and with each filter
+- a deep page by keyset cursor against the same page by OFFSET
+- fetch by ID and export rate
+
+    python -m benchmarks.content_store --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from content_store import ContentFilter, SQLiteContentStore
+from providers import generator_payload, reviewer_payload
+
+YEAR = 365 * 86400
+
+
+def make_payload(i: int, rng: random.Random) -> dict:
+    """A stored result shaped like record_payload() output."""
+    topic = f"Topic {i % 50000}"
+    failed = rng.random() < 0.3
+    content = generator_payload(topic, flawed=failed)
+    return {
+        "grade": 1 + i % 12,
+        "topic": topic,
+        "initial_content": content,
+        "review_result": reviewer_payload(fail=failed),
+        "refined_content": generator_payload(topic) if failed else None,
+        "was_refined": failed,
+        "refinement_mode": rng.choice(["full", "partial"]) if failed else None,
+        "token_usage": {"total_tokens": 1500},
+    }
+
+
+def timed(fn, repeat: int) -> float:
+    """Median milliseconds of `repeat` calls."""
+    samples = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        fn()
+        samples.append(1000 * (time.perf_counter() - began))
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark content store inserts and queries")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--batch", type=int, default=5000, help="Rows per batched insert")
+    parser.add_argument("--single", type=int, default=2000, help="Rows inserted one commit at a time")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per query timing")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    directory = tempfile.mkdtemp(prefix="content-bench-")
+    path = os.path.join(directory, "content.db")
+    store = SQLiteContentStore(path)
+    now = time.time()
+    print(f"{args.rows} rows in {path}")
+
+    began = time.perf_counter()
+    for i in range(args.single):
+        store.add(make_payload(i, rng), created_at=now - YEAR + i)
+    single_rate = args.single / (time.perf_counter() - began)
+
+    began = time.perf_counter()
+    templates = [make_payload(i, rng) for i in range(1000)]
+    for start in range(args.single, args.rows, args.batch):
+        count = min(args.batch, args.rows - start)
+        batch = []
+        for i in range(start, start + count):
+            payload = dict(templates[i % 1000], grade=1 + i % 12, topic=f"Topic {i % 50000}")
+            batch.append(payload)
+        store.add_many(batch, created_at=now - YEAR + YEAR * start / args.rows)
+    batch_rate = (args.rows - args.single) / (time.perf_counter() - began)
+    print(f"insert: {single_rate:,.0f} rows/s one commit each, {batch_rate:,.0f} rows/s in batches of {args.batch}")
+    print(f"database size: {os.path.getsize(path) / 1e6:,.0f} MB")
+
+    queries = {
+        "unfiltered": ContentFilter(),
+        "grade": ContentFilter(grade=7),
+        "topic": ContentFilter(topic="topic 1234"),
+        "status": ContentFilter(review_status="fail"),
+        "refined": ContentFilter(was_refined=True),
+        "created range": ContentFilter(created_after=now - YEAR / 2, created_before=now - YEAR / 4),
+        "grade+status": ContentFilter(grade=3, review_status="fail"),
+    }
+    print(f"\n{'first page of 50':<20} {'ms':>8} {'rows':>6}")
+    for name, filters in queries.items():
+        items, _ = store.list(filters, limit=50)
+        print(f"{name:<20} {timed(lambda: store.list(filters, limit=50), args.repeat):>8.3f} {len(items):>6}")
+
+    # Page at depth ~90%: keyset cursor against LIMIT/OFFSET
+    depth = int(args.rows * 0.9)
+    cursor = args.rows - depth
+    keyset = timed(lambda: store.list(ContentFilter(), limit=50, cursor=cursor), args.repeat)
+    offset = timed(lambda: store._conn.execute(
+        "SELECT id FROM content ORDER BY id DESC LIMIT 50 OFFSET ?", (depth,)
+    ).fetchall(), max(1, args.repeat // 4))
+    print(f"\npage at row {depth:,}: keyset {keyset:.3f} ms, OFFSET {offset:.3f} ms")
+
+    ids = [rng.randint(1, args.rows) for _ in range(args.repeat * 10)]
+    began = time.perf_counter()
+    for content_id in ids:
+        store.get(content_id)
+    print(f"get by id: {1000 * (time.perf_counter() - began) / len(ids):.3f} ms")
+
+    began = time.perf_counter()
+    exported = sum(1 for _ in store.export(ContentFilter(grade=5)))
+    print(f"export grade 5: {exported:,} rows at {exported / (time.perf_counter() - began):,.0f} rows/s")
+
+    store.close()
+    for name in os.listdir(directory):
+        os.remove(os.path.join(directory, name))
+    os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Deadline Benchmark - pipeline tail latency with and without a request deadline.
+
+Runs the pipeline on the fake provider with heavy-tailed (lognormal) call
+latency and a share of drafts the reviewer rejects, once without a
+deadline and once per --deadlines value. For each it reports latency
+percentiles, how many runs were refined, degraded (refinement skipped or
+cut short) or failed with DeadlineExceeded, and the LLM calls spent:
+
+    python -m benchmarks.deadline --runs 300 --latency 0.2 --spread 0.8 --deadlines 1.0 1.5
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.suite import percentile
+
+
+async def measure(args: argparse.Namespace, deadline: float | None) -> dict:
+    """Run args.runs pipelines under one deadline setting."""
+    from config import set_provider
+    from deadline import DeadlineExceeded
+    from pipeline import EducationalContentPipeline
+    from providers import FakeProvider, LatencyModel
+
+    provider = FakeProvider(
+        LatencyModel(base=args.latency, distribution="lognormal", spread=args.spread),
+        fail_rate=args.fail_rate,
+        seed=args.seed,
+    )
+    set_provider(provider)
+    pipeline = EducationalContentPipeline(cache=None, speculative=args.speculative)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies, outcomes = [], {"refined": 0, "passed": 0, "degraded": 0, "timed_out": 0}
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            began = time.perf_counter()
+            try:
+                result = await pipeline.arun(5, f"Topic {i}", deadline_seconds=deadline)
+            except DeadlineExceeded:
+                outcomes["timed_out"] += 1
+            else:
+                outcomes["degraded" if result.degraded else "refined" if result.was_refined else "passed"] += 1
+            latencies.append(time.perf_counter() - began)
+
+    await asyncio.gather(*(one(i) for i in range(args.runs)))
+    latencies.sort()
+    return {
+        **outcomes,
+        "p50_s": percentile(latencies, 50),
+        "p95_s": percentile(latencies, 95),
+        "p99_s": percentile(latencies, 99),
+        "max_s": latencies[-1],
+        "calls": provider.calls,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare pipeline tail latency with and without a deadline")
+    parser.add_argument("--runs", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.2, help="Median fake LLM seconds per call")
+    parser.add_argument("--spread", type=float, default=0.8, help="Lognormal sigma of the call latency")
+    parser.add_argument("--fail-rate", type=float, default=0.5, help="Fraction of first drafts the reviewer rejects")
+    parser.add_argument("--deadlines", type=float, nargs="+", default=[1.0, 1.5])
+    parser.add_argument("--speculative", action="store_true", help="Use the speculative pipeline")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.environ["LLM_PROVIDER"] = "fake"
+
+    print(f"{args.runs} runs, lognormal calls (median {args.latency:.2f}s, sigma {args.spread}), "
+          f"{args.fail_rate:.0%} of drafts rejected")
+    print(f"{'deadline':<9} {'p50 s':>6} {'p95 s':>6} {'p99 s':>6} {'max s':>6} "
+          f"{'passed':>7} {'refined':>8} {'degraded':>9} {'timeout':>8} {'calls':>6}")
+    for deadline in [None, *args.deadlines]:
+        r = asyncio.run(measure(args, deadline))
+        label = "none" if deadline is None else f"{deadline:g}s"
+        print(
+            f"{label:<9} {r['p50_s']:>6.2f} {r['p95_s']:>6.2f} {r['p99_s']:>6.2f} {r['max_s']:>6.2f} "
+            f"{r['passed']:>7} {r['refined']:>8} {r['degraded']:>9} {r['timed_out']:>8} {r['calls']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
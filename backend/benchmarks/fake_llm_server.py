@@ -0,0 +1,120 @@
+"""
+Fake LLM Server - a local stand-in for the GROQ chat completions API.
+
+Serves ``POST /openai/v1/chat/completions`` with canned generator/reviewer
+JSON after an artificial delay, so the API can be load-tested without a key:
+
+    python -m benchmarks.fake_llm_server --port 9100 --latency 0.5
+
+Point the backend at it with ``GROQ_BASE_URL=http://127.0.0.1:9100``.
+Requests with ``"stream": true`` are answered as SSE chunks: the first chunk
+arrives after a quarter of the latency, the rest are spread over the remainder.
+
+The response content comes from providers.fake_response, the same logic the
+in-process FakeProvider uses (``LLM_PROVIDER=fake``); this server exists to
+exercise the real GROQ client and its connection pool.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+import uvicorn
+
+from providers import fake_response
+
+
+async def stream_chunks(content: str, model: str, delay: float, chunk_size: int = 16):
+    """Yield an OpenAI-style SSE completion stream for the given content."""
+    pieces = [content[i:i + chunk_size] for i in range(0, len(content), chunk_size)]
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    await asyncio.sleep(delay / 4)
+    for i, piece in enumerate(pieces):
+        if i:
+            await asyncio.sleep(0.75 * delay / len(pieces))
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+def create_app(
+    latency: float = 0.5,
+    jitter: float = 0.0,
+    fail_rate: float = 0.0,
+    token_latency: float = 0.0,
+    prompt_latency: float = 0.0,
+) -> FastAPI:
+    """
+    Create the fake completions app with the given latency profile.
+    
+    Each call takes `latency` +/- `jitter` seconds plus `prompt_latency`
+    seconds per prompt token and `token_latency` seconds per completion
+    token, so longer prompts and outputs take longer.
+    """
+    app = FastAPI(title="Fake LLM Server")
+    rng = random.Random(0)
+    
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        prompt = body["messages"][-1]["content"]
+        content = fake_response(body["messages"], fail_rate)
+        
+        delay = (
+            max(0.0, latency + rng.uniform(-jitter, jitter))
+            + prompt_latency * (len(prompt) // 4)
+            + token_latency * (len(content) // 4)
+        )
+        
+        if body.get("stream"):
+            return StreamingResponse(stream_chunks(content, body.get("model", "fake"), delay), media_type="text/event-stream")
+        
+        await asyncio.sleep(delay)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": len(prompt) // 4,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": (len(prompt) + len(content)) // 4,
+            },
+        }
+    
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a fake GROQ-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds per completion")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform +/- jitter in seconds")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of first drafts the reviewer rejects")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Extra seconds per completion token")
+    parser.add_argument("--prompt-latency", type=float, default=0.0, help="Extra seconds per prompt token")
+    args = parser.parse_args()
+    
+    uvicorn.run(
+        create_app(args.latency, args.jitter, args.fail_rate, args.token_latency, args.prompt_latency),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
@@ -0,0 +1,92 @@
+"""
+Hedging Benchmark - pipeline tail latency with and without request hedging.
+
+Runs the pipeline on the fake provider with heavy-tailed call latency
+(pareto by default: most calls take about --latency, a few several times
+that), first without hedging and then with a HedgedProvider per
+--percentiles value. For each it reports pipeline latency percentiles, the
+LLM calls made, the hedges sent and how many of them answered first, and
+the extra calls as a share of the calls the pipeline asked for, which
+stays under --budget:
+
+    python -m benchmarks.hedging --runs 400 --latency 0.2 --distribution pareto --spread 2 --budget 0.1
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.suite import percentile
+
+
+async def measure(args: argparse.Namespace, hedge_percentile: float | None) -> dict:
+    """Run args.runs pipelines with hedging off (None) or at one percentile."""
+    from config import set_provider
+    from hedging import HedgedProvider
+    from pipeline import EducationalContentPipeline
+    from providers import FakeProvider, LatencyModel
+
+    fake = FakeProvider(
+        LatencyModel(base=args.latency, distribution=args.distribution, spread=args.spread),
+        fail_rate=args.fail_rate,
+        seed=args.seed,
+    )
+    provider = fake if hedge_percentile is None else HedgedProvider(fake, percentile=hedge_percentile, budget=args.budget)
+    set_provider(provider)
+    pipeline = EducationalContentPipeline(cache=None)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            began = time.perf_counter()
+            await pipeline.arun(5, f"Topic {i}")
+            latencies.append(time.perf_counter() - began)
+
+    await asyncio.gather(*(one(i) for i in range(args.runs)))
+    latencies.sort()
+    hedging = provider.get_stats().get("hedging", {})
+    requested = hedging.get("calls", fake.calls)
+    return {
+        "p50_s": percentile(latencies, 50),
+        "p95_s": percentile(latencies, 95),
+        "p99_s": percentile(latencies, 99),
+        "max_s": latencies[-1],
+        "calls": fake.calls,
+        "hedges": hedging.get("hedges", 0),
+        "hedge_wins": hedging.get("hedge_wins", 0),
+        "extra": (fake.calls - requested) / requested,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare pipeline tail latency with and without request hedging")
+    parser.add_argument("--runs", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2, help="Typical fake LLM seconds per call")
+    parser.add_argument("--distribution", choices=("lognormal", "pareto"), default="pareto")
+    parser.add_argument("--spread", type=float, default=2.0, help="Pareto tail index or lognormal sigma")
+    parser.add_argument("--fail-rate", type=float, default=0.3, help="Fraction of first drafts the reviewer rejects")
+    parser.add_argument("--percentiles", type=float, nargs="+", default=[90.0, 95.0], help="LLM_HEDGE_PERCENTILE values")
+    parser.add_argument("--budget", type=float, default=0.1, help="LLM_HEDGE_BUDGET: extra calls per call at most")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.environ["LLM_PROVIDER"] = "fake"
+
+    print(f"{args.runs} runs, {args.distribution} calls (latency {args.latency:.2f}s, spread {args.spread}), "
+          f"hedge budget {args.budget:.0%}")
+    print(f"{'hedging':<9} {'p50 s':>6} {'p95 s':>6} {'p99 s':>6} {'max s':>6} "
+          f"{'calls':>6} {'hedges':>7} {'won':>5} {'extra':>6}")
+    for hedge_percentile in [None, *args.percentiles]:
+        r = asyncio.run(measure(args, hedge_percentile))
+        label = "off" if hedge_percentile is None else f"p{hedge_percentile:g}"
+        print(
+            f"{label:<9} {r['p50_s']:>6.2f} {r['p95_s']:>6.2f} {r['p99_s']:>6.2f} {r['max_s']:>6.2f} "
+            f"{r['calls']:>6} {r['hedges']:>7} {r['hedge_wins']:>5} {r['extra']:>6.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
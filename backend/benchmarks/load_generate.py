@@ -0,0 +1,130 @@
+"""
+Load Benchmark - concurrent /generate requests against a single worker.
+
+Starts the fake LLM server and one uvicorn worker of the API, fires
+``--requests`` concurrent /generate calls and probes /health while they are
+in flight. With the async pipeline the wall time stays close to a single
+pipeline's latency instead of growing linearly with the request count:
+
+    python -m benchmarks.load_generate --requests 50 --latency 0.5
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_server(args: list[str], env: dict) -> subprocess.Popen:
+    """Start a server subprocess from the backend directory."""
+    return subprocess.Popen(
+        [sys.executable, *args],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def wait_until_up(url: str, timeout: float = 20.0) -> None:
+    """Poll a URL until it answers or the timeout expires."""
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"Server at {url} did not start in {timeout}s")
+
+
+async def run_load(api_url: str, requests: int) -> dict:
+    """Fire concurrent /generate calls while probing /health."""
+    latencies = []
+    health_latencies = []
+    done = asyncio.Event()
+    
+    async with httpx.AsyncClient(base_url=api_url, timeout=300.0) as client:
+        async def one(i: int):
+            start = time.perf_counter()
+            response = await client.post("/generate", json={"grade": 5, "topic": f"Topic {i}"})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+        
+        async def probe_health():
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/health")
+                health_latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.05)
+        
+        prober = asyncio.create_task(probe_health())
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        wall = time.perf_counter() - start
+        done.set()
+        await prober
+        pool = (await client.get("/stats")).json()["llm"]["pool"]
+    
+    return {
+        "pool": pool,
+        "wall": wall,
+        "mean": sum(latencies) / len(latencies),
+        "max": max(latencies),
+        "health_max": max(health_latencies) if health_latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test /generate against a fake LLM")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake LLM seconds per call")
+    parser.add_argument("--llm-port", type=int, default=9100)
+    parser.add_argument("--api-port", type=int, default=9200)
+    args = parser.parse_args()
+    
+    env = dict(os.environ)
+    env["GROQ_API_KEY"] = env.get("GROQ_API_KEY") or "benchmark-key"
+    env["GROQ_BASE_URL"] = f"http://127.0.0.1:{args.llm_port}"
+    
+    llm = start_server(
+        ["-m", "benchmarks.fake_llm_server", "--port", str(args.llm_port), "--latency", str(args.latency)],
+        env,
+    )
+    api = start_server(
+        ["-m", "uvicorn", "main:app", "--port", str(args.api_port), "--workers", "1", "--log-level", "warning"],
+        env,
+    )
+    api_url = f"http://127.0.0.1:{args.api_port}"
+    
+    try:
+        asyncio.run(wait_until_up(f"http://127.0.0.1:{args.llm_port}/docs"))
+        asyncio.run(wait_until_up(f"{api_url}/health"))
+        stats = asyncio.run(run_load(api_url, args.requests))
+    finally:
+        api.terminate()
+        llm.terminate()
+        api.wait()
+        llm.wait()
+    
+    serial_estimate = args.requests * 2 * args.latency
+    print(f"Requests:              {args.requests} concurrent, 1 worker")
+    print(f"Fake LLM latency:      {args.latency:.2f}s per call")
+    print(f"Wall time:             {stats['wall']:.2f}s (blocking pipeline would need >= {serial_estimate:.1f}s)")
+    print(f"Throughput:            {args.requests / stats['wall']:.1f} req/s")
+    print(f"Mean / max latency:    {stats['mean']:.2f}s / {stats['max']:.2f}s")
+    print(f"Max /health latency:   {stats['health_max'] * 1000:.0f}ms")
+    pool = stats["pool"]
+    print(f"LLM connection reuse:  {pool['reuse_rate']:.0%} ({pool['new_connections']} connections for {pool['requests']} calls)")
+    print(f"LLM pool wait:         {pool['avg_wait_ms']:.1f}ms avg / {pool['max_wait_ms']:.1f}ms max")
+
+
+if __name__ == "__main__":
+    main()
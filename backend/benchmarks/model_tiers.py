@@ -0,0 +1,280 @@
+"""
+Model Tier Evaluation - latency, cost and review agreement per model tier.
+
+Runs the pipeline over a fixed topic set once per tier (a generator and a
+reviewer ModelProfile) and reports end-to-end latency, token cost at GROQ
+list prices, and how often the tier's reviewer agrees with the baseline
+reviewer when both judge the same drafts (the baseline's first drafts).
+
+Offline, a stub provider simulates each model: its own latency and token
+rate, and for small models a rate of missed flaws and false rejections.
+With --live the configured provider (e.g. GROQ) is used instead:
+
+    python -m benchmarks.model_tiers
+    python -m benchmarks.model_tiers --live --tiers baseline small-reviewer
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator
+
+from benchmarks.suite import percentile
+from providers import Completion, FakeProvider, LatencyModel, LLMProvider, reviewer_payload
+
+BIG_MODEL = "llama-3.3-70b-versatile"
+SMALL_MODEL = "llama-3.1-8b-instant"
+
+# USD per million (prompt, completion) tokens, GROQ on-demand list prices
+PRICES = {
+    BIG_MODEL: (0.59, 0.79),
+    SMALL_MODEL: (0.05, 0.08),
+}
+
+# Fixed evaluation set: the same topics for every tier and every run
+FIXED_TOPICS = [
+    (2, "Counting to 100"),
+    (3, "Plants and sunlight"),
+    (3, "Telling time"),
+    (4, "Fractions"),
+    (4, "The water cycle"),
+    (5, "Multiplying decimals"),
+    (5, "The solar system"),
+    (6, "Ratios and rates"),
+    (6, "Ancient Egypt"),
+    (7, "Photosynthesis"),
+    (7, "Linear equations"),
+    (8, "Newton's laws of motion"),
+    (8, "The American Revolution"),
+    (9, "Cell division"),
+    (9, "Quadratic functions"),
+    (10, "Chemical bonding"),
+    (10, "World War I causes"),
+    (11, "Derivatives"),
+    (11, "Supply and demand"),
+    (12, "Electromagnetic induction"),
+]
+
+
+@dataclass
+class ModelSim:
+    """Simulated behaviour of one model in the stub provider."""
+    latency: float
+    tokens_per_second: float
+    miss_rate: float = 0.0
+    false_fail_rate: float = 0.0
+
+
+# Big model: slow and a perfect reviewer; small model: ~3x faster but misses
+# some flawed questions and rejects some clean ones
+SIMULATED_MODELS = {
+    BIG_MODEL: ModelSim(latency=0.3, tokens_per_second=275),
+    SMALL_MODEL: ModelSim(latency=0.1, tokens_per_second=750, miss_rate=0.15, false_fail_rate=0.05),
+}
+
+
+class TierStubProvider(LLMProvider):
+    """
+    Offline provider that answers each model with its own simulated FakeProvider.
+
+    Reviewer verdicts of a model with a miss or false-fail rate are flipped,
+    decided by model and prompt so every run makes the same mistakes.
+    """
+
+    name = "tier-stub"
+
+    def __init__(self, models: dict[str, ModelSim], fail_rate: float = 0.3, seed: int = 0):
+        super().__init__()
+        self.models = models
+        self.fakes = {
+            model: FakeProvider(
+                LatencyModel(base=sim.latency, distribution="lognormal", spread=0.25, tokens_per_second=sim.tokens_per_second),
+                fail_rate=fail_rate,
+                seed=seed,
+            )
+            for model, sim in models.items()
+        }
+
+    def _fake(self, model: str) -> FakeProvider:
+        if model not in self.fakes:
+            raise ValueError(f"No simulated model {model!r}; known: {', '.join(self.fakes)}")
+        return self.fakes[model]
+
+    def _degrade(self, messages: list[dict], model: str, completion: Completion) -> Completion:
+        if "reviewer" not in messages[0]["content"]:
+            return completion
+        sim = self.models[model]
+        draw = random.Random(f"{model}:{messages[-1]['content']}").random()
+        verdict = json.loads(completion.text)["status"]
+        if verdict == "fail" and draw < sim.miss_rate:
+            completion.text = json.dumps(reviewer_payload(fail=False))
+        elif verdict == "pass" and draw < sim.false_fail_rate:
+            completion.text = json.dumps(reviewer_payload(fail=True))
+        return completion
+
+    def complete(self, messages: list[dict], model: str, temperature: float, max_tokens: int, json_mode: bool = False) -> Completion:
+        self.calls += 1
+        completion = self._fake(model).complete(messages, model, temperature, max_tokens, json_mode=json_mode)
+        return self._degrade(messages, model, completion)
+
+    async def acomplete(self, messages: list[dict], model: str, temperature: float, max_tokens: int, json_mode: bool = False) -> Completion:
+        self.calls += 1
+        completion = await self._fake(model).acomplete(messages, model, temperature, max_tokens, json_mode=json_mode)
+        return self._degrade(messages, model, completion)
+
+    async def astream(self, messages: list[dict], model: str, temperature: float, max_tokens: int, json_mode: bool = False) -> AsyncIterator[str]:
+        self.calls += 1
+        async for delta in self._fake(model).astream(messages, model, temperature, max_tokens, json_mode=json_mode):
+            yield delta
+
+
+def build_tiers() -> dict:
+    """Generator and reviewer profiles of every tier, keyed by tier name."""
+    from config import ModelProfile
+
+    generator = ModelProfile(model=BIG_MODEL)
+    return {
+        "baseline": (generator, ModelProfile(model=BIG_MODEL)),
+        "capped-reviewer": (generator, ModelProfile(model=BIG_MODEL, max_tokens=1024, json_mode=True)),
+        "small-reviewer": (generator, ModelProfile(model=SMALL_MODEL, temperature=0.2, max_tokens=512, json_mode=True)),
+        "all-small": (
+            ModelProfile(model=SMALL_MODEL),
+            ModelProfile(model=SMALL_MODEL, temperature=0.2, max_tokens=512, json_mode=True),
+        ),
+    }
+
+
+def trace_cost(trace: dict) -> tuple[int, float]:
+    """Sum the tokens and USD cost of every LLM call in a pipeline trace."""
+    tokens, cost = 0, 0.0
+    stack = [trace]
+    while stack:
+        node = stack.pop()
+        stack.extend(node.get("children", []))
+        if node["name"] != "generate_completion" or "tokens" not in node:
+            continue
+        usage = node["tokens"]
+        prompt_price, completion_price = PRICES.get(node["attributes"]["model"], (0.0, 0.0))
+        tokens += usage["total_tokens"]
+        cost += (usage["prompt_tokens"] * prompt_price + usage["completion_tokens"] * completion_price) / 1e6
+    return tokens, cost
+
+
+def item_verdicts(review: dict) -> dict:
+    return {(item["target"], item.get("index")): item["status"] for item in review.get("items", [])}
+
+
+async def evaluate(name: str, profiles: tuple, topics: list, baseline: dict, concurrency: int) -> dict:
+    """Run one tier over the topic set and compare its reviewer with the baseline's verdicts."""
+    from agents import ReviewerAgent
+    from agents.reviewer import ReviewerInput
+    from pipeline import EducationalContentPipeline
+
+    generator_profile, reviewer_profile = profiles
+    pipeline = EducationalContentPipeline(
+        cache=None, generator_profile=generator_profile, reviewer_profile=reviewer_profile
+    )
+    reviewer = ReviewerAgent(reviewer_profile)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, review_latencies, costs, tokens = [], [], [], []
+    refined = verdicts_agreed = items_agreed = items_compared = 0
+
+    async def one(grade: int, topic: str) -> None:
+        nonlocal refined, verdicts_agreed, items_agreed, items_compared
+        async with semaphore:
+            began = time.perf_counter()
+            result = await pipeline.arun(grade, topic, cache_control="no-store")
+            latencies.append(time.perf_counter() - began)
+            run_tokens, run_cost = trace_cost(result.trace)
+            tokens.append(run_tokens)
+            costs.append(run_cost)
+            refined += result.was_refined
+            if name == "baseline":
+                baseline[(grade, topic)] = result
+                review = result.review_result.model_dump()
+            else:
+                # Judge the baseline's draft so both reviewers see identical content
+                reference = baseline[(grade, topic)]
+                began = time.perf_counter()
+                draft = ReviewerInput(grade=grade, topic=topic, **reference.initial_content.model_dump())
+                review = (await reviewer.areview(draft)).model_dump()
+                review_latencies.append(time.perf_counter() - began)
+            reference_review = baseline[(grade, topic)].review_result.model_dump()
+            verdicts_agreed += review["status"] == reference_review["status"]
+            expected = item_verdicts(reference_review)
+            for key, status in item_verdicts(review).items():
+                if key in expected:
+                    items_compared += 1
+                    items_agreed += status == expected[key]
+
+    await asyncio.gather(*(one(grade, topic) for grade, topic in topics))
+    latencies.sort()
+    review_latencies.sort()
+    return {
+        "tier": name,
+        "generator_model": generator_profile.model,
+        "reviewer_model": reviewer_profile.model,
+        "runs": len(latencies),
+        "p50_s": percentile(latencies, 50),
+        "p95_s": percentile(latencies, 95),
+        "review_p50_ms": 1000 * percentile(review_latencies, 50) if review_latencies else None,
+        "tokens_per_run": sum(tokens) / len(tokens),
+        "usd_per_1k_runs": 1000 * sum(costs) / len(costs),
+        "refine_rate": refined / len(latencies),
+        "verdict_agreement": verdicts_agreed / len(latencies),
+        "item_agreement": items_agreed / items_compared if items_compared else None,
+    }
+
+
+async def run_tiers(args: argparse.Namespace) -> list[dict]:
+    from config import set_provider
+
+    if not args.live:
+        set_provider(TierStubProvider(SIMULATED_MODELS, fail_rate=args.fail_rate, seed=args.seed))
+    tiers = build_tiers()
+    topics = FIXED_TOPICS * args.repeat
+    baseline: dict = {}
+    # The baseline runs first: every other tier is compared with its verdicts
+    names = ["baseline"] + [name for name in args.tiers if name != "baseline"]
+    return [await evaluate(name, tiers[name], topics, baseline, args.concurrency) for name in names]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare latency, cost and review agreement across model tiers")
+    parser.add_argument("--tiers", nargs="+", default=list(build_tiers()), choices=list(build_tiers()))
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the fixed topic set")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--fail-rate", type=float, default=0.3, help="Share of flawed first drafts (stub only)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--live", action="store_true", help="Use the configured LLM provider instead of the stub")
+    parser.add_argument("--json", action="store_true", help="Print raw results as JSON")
+    args = parser.parse_args()
+
+    if not args.live:
+        os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["CACHE_BACKEND"] = "none"
+
+    results = asyncio.run(run_tiers(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{len(FIXED_TOPICS) * args.repeat} topics per tier, {'live provider' if args.live else 'offline stub'}")
+    print(f"{'tier':<16} {'generator':<24} {'reviewer':<24} {'p50 s':>6} {'p95 s':>6} {'review':>7} "
+          f"{'tokens':>7} {'$/1k runs':>9} {'refined':>8} {'agree':>6} {'items':>6}")
+    for r in results:
+        review = f"{r['review_p50_ms']:.0f}ms" if r["review_p50_ms"] is not None else "-"
+        items = f"{r['item_agreement']:.0%}" if r["item_agreement"] is not None else "-"
+        print(
+            f"{r['tier']:<16} {r['generator_model']:<24} {r['reviewer_model']:<24} {r['p50_s']:>6.2f} {r['p95_s']:>6.2f} "
+            f"{review:>7} {r['tokens_per_run']:>7.0f} {r['usd_per_1k_runs']:>9.3f} {r['refine_rate']:>8.0%} "
+            f"{r['verdict_agreement']:>6.0%} {items:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Partial Refinement Benchmark - refinement tokens and latency, full vs partial.
+
+Every first draft has one flawed MCQ (fail rate 1.0). The same topics are run
+once with refinement forced to regenerate everything and once with partial
+refinement that regenerates only the failing MCQ:
+
+    python -m benchmarks.partial_refinement --runs 20
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from benchmarks.load_generate import start_server, wait_until_up
+
+
+async def measure(partial: bool, runs: int) -> dict:
+    """Run `runs` failing pipelines and collect refinement cost."""
+    from pipeline import EducationalContentPipeline
+    
+    class FullRefinementPipeline(EducationalContentPipeline):
+        def _plan_refinement(self, content, review_result):
+            return None
+    
+    pipeline_cls = EducationalContentPipeline if partial else FullRefinementPipeline
+    pipeline = pipeline_cls(cache=None)
+    
+    async def one(i: int):
+        start = time.perf_counter()
+        result = await pipeline.arun(5, f"Topic {i}")
+        return time.perf_counter() - start, result
+    
+    outcomes = await asyncio.gather(*(one(i) for i in range(runs)))
+    refine = [result.token_usage["refine"] for _, result in outcomes]
+    return {
+        "latency": statistics.mean(latency for latency, _ in outcomes),
+        "completion": statistics.mean(usage["completion_tokens"] for usage in refine),
+        "prompt": statistics.mean(usage["prompt_tokens"] for usage in refine),
+        "modes": {result.refinement_mode for _, result in outcomes},
+    }
+
+
+async def compare(runs: int) -> None:
+    """Benchmark full and partial refinement and print a comparison."""
+    full = await measure(False, runs)
+    partial = await measure(True, runs)
+    
+    print(f"{'refinement':<10} {'mode':<9} {'refine prompt tok':>18} {'refine completion tok':>22} {'pipeline (s)':>13}")
+    for name, stats in (("full", full), ("partial", partial)):
+        print(
+            f"{name:<10} {','.join(sorted(stats['modes'])):<9} {stats['prompt']:>18.0f} "
+            f"{stats['completion']:>22.0f} {stats['latency']:>13.2f}"
+        )
+    print(f"Refinement completion tokens saved: {1 - partial['completion'] / full['completion']:.0%}")
+    print(f"Pipeline latency saved:             {1 - partial['latency'] / full['latency']:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full and partial refinement cost")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM base seconds per call")
+    parser.add_argument("--token-latency", type=float, default=0.003, help="Fake LLM seconds per output token")
+    parser.add_argument("--llm-port", type=int, default=9104)
+    args = parser.parse_args()
+    
+    os.environ["GROQ_API_KEY"] = os.environ.get("GROQ_API_KEY") or "benchmark-key"
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{args.llm_port}"
+    
+    llm = start_server(
+        [
+            "-m", "benchmarks.fake_llm_server",
+            "--port", str(args.llm_port),
+            "--latency", str(args.latency),
+            "--token-latency", str(args.token_latency),
+            "--fail-rate", "1.0",
+        ],
+        dict(os.environ),
+    )
+    try:
+        asyncio.run(wait_until_up(f"http://127.0.0.1:{args.llm_port}/docs"))
+        asyncio.run(compare(args.runs))
+    finally:
+        llm.terminate()
+        llm.wait()
+
+
+if __name__ == "__main__":
+    main()
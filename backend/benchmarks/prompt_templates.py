@@ -0,0 +1,278 @@
+"""
+Prompt Template Benchmark - prompt tokens and time to first token.
+
+Builds the prompts of a generate -> review -> (refine) workload over many
+topics with the previous f-string builders and with the registered
+templates, and reports per template: estimated prompt tokens, render time,
+and the share of tokens a provider with prompt (KV) caching could reuse.
+Template render times include the agents' tracing span and the registry's
+per-template token accounting, which the old builders did not have.
+
+Time to first token is simulated by a prefix cache like the providers':
+the system and user prompt are hashed in blocks of `--block-tokens`, the
+leading blocks already seen are cached, and
+TTFT = base + uncached tokens / prompt tokens per second:
+
+    python -m benchmarks.prompt_templates --topics 200 --refine-rate 0.3
+"""
+
+import argparse
+import hashlib
+import json
+import statistics
+import time
+
+from agents.generator import GeneratorAgent
+from agents.reviewer import ReviewerAgent, ReviewerInput
+from prompts import prompt_registry
+from providers import estimate_tokens, generator_payload
+
+# ~4 characters per token, as estimate_tokens() assumes
+CHARS_PER_TOKEN = 4
+
+
+# ============================================================================
+# Previous implementation, kept as the baseline
+# ============================================================================
+
+def legacy_language_guide(grade: int) -> str:
+    grade_guidelines = {
+        (1, 3): "Use very simple words and short sentences. Be playful and fun.",
+        (4, 6): "Use clear, straightforward language. Include relatable examples.",
+        (7, 9): "Use standard academic language. Include more detailed explanations.",
+        (10, 12): "Use sophisticated vocabulary. Include technical terms with context.",
+    }
+    for (low, high), guide in grade_guidelines.items():
+        if low <= grade <= high:
+            return guide
+    return ""
+
+
+def legacy_generator_prompt(grade: int, topic: str, feedback=None) -> str:
+    prompt = f"""Generate educational content for:
+
+**Grade Level:** {grade}
+**Topic:** {topic}
+
+**Language Guidelines:** {legacy_language_guide(grade)}
+
+**Instructions:**
+1. Create a clear, age-appropriate explanation of the topic (3-5 paragraphs)
+2. Generate exactly 5 multiple-choice questions (MCQs) covering different aspects of the topic
+3. Each MCQ must have exactly 4 options labeled A, B, C, D
+4. Ensure concepts are accurate and appropriate for the grade level
+5. Questions should range from basic recall to application/understanding
+
+"""
+    if feedback:
+        feedback_text = "\n".join(f"- {fb}" for fb in feedback)
+        prompt += f"""
+**IMPORTANT - Address this feedback from the reviewer:**
+{feedback_text}
+
+Please regenerate the content addressing ALL feedback points above.
+
+"""
+    prompt += """**Output Format:**
+Return ONLY a valid JSON object with this exact structure (no markdown, no code blocks, no extra text):
+{
+    "explanation": "<detailed explanation appropriate for the grade>",
+    "mcqs": [
+"""
+    prompt += ",\n".join(
+        f"""        {{
+            "question": "<question {i}>",
+            "options": ["A. <option>", "B. <option>", "C. <option>", "D. <option>"],
+            "answer": "<A, B, C, or D>"
+        }}"""
+        for i in range(1, 6)
+    )
+    return prompt + "\n    ]\n}\n"
+
+
+def legacy_reviewer_prompt(input_data: ReviewerInput) -> str:
+    mcqs_formatted = json.dumps([{"index": i, **mcq} for i, mcq in enumerate(input_data.mcqs)], indent=2)
+    return f"""Evaluate the following educational content:
+
+**Target Grade:** {input_data.grade}
+**Topic:** {input_data.topic}
+
+**Explanation:**
+{input_data.explanation}
+
+**Multiple Choice Questions (with zero-based index):**
+{mcqs_formatted}
+
+**Evaluation Criteria:**
+1. **Age Appropriateness:** Is the language suitable for grade {input_data.grade}?
+2. **Conceptual Correctness:** Are all facts and concepts accurate?
+3. **Clarity:** Is the content easy to understand?
+
+**Instructions:**
+- Return "pass" if the content meets ALL criteria satisfactorily
+- Return "fail" if ANY significant issues are found
+- Provide specific, actionable feedback for any issues found
+- Give a separate verdict for the explanation and for every MCQ in "items"
+
+**Output Format:**
+Return ONLY a valid JSON object (no markdown, no code blocks, no extra text):
+{{
+    "status": "pass" or "fail",
+    "feedback": ["<specific issue 1 if any>", "<specific issue 2 if any>"],
+    "items": [
+        {{"target": "explanation", "status": "pass" or "fail", "feedback": ["<issue if any>"]}},
+        {{"target": "mcq", "index": <MCQ index>, "status": "pass" or "fail", "feedback": ["<issue if any>"]}}
+    ]
+}}
+"""
+
+
+def legacy_section_prompt(input_data: ReviewerInput, section: int) -> str:
+    mcq_formatted = json.dumps(input_data.mcqs[section], indent=2)
+    return f"""Evaluate the following part of an educational lesson:
+
+**Target Grade:** {input_data.grade}
+**Topic:** {input_data.topic}
+
+**Multiple Choice Question {section + 1}:**
+{mcq_formatted}
+
+**Evaluation Criteria:**
+1. **Age Appropriateness:** Is the language suitable for grade {input_data.grade}?
+2. **Conceptual Correctness:** Are all facts and concepts accurate?
+3. **Clarity:** Is the content easy to understand?
+
+**Instructions:**
+- Return "pass" if this part meets ALL criteria satisfactorily
+- Return "fail" if ANY significant issues are found
+- Provide specific, actionable feedback for any issues found
+
+**Output Format:**
+Return ONLY a valid JSON object (no markdown, no code blocks, no extra text):
+{{
+    "status": "pass" or "fail",
+    "feedback": ["<specific issue 1 if any>", "<specific issue 2 if any>"]
+}}
+"""
+
+
+# ============================================================================
+# Simulated Prefix Cache
+# ============================================================================
+
+class PrefixCache:
+    """Block-hashed prompt prefix cache: a block is reused only if every block before it was too."""
+
+    def __init__(self, block_tokens: int):
+        self.block_chars = block_tokens * CHARS_PER_TOKEN
+        self._blocks: set[str] = set()
+
+    def cached_tokens(self, text: str) -> int:
+        """Return the tokens of `text` served from cache, then cache all of its blocks."""
+        digest = hashlib.sha256()
+        cached, hit = 0, True
+        for start in range(0, len(text) - self.block_chars + 1, self.block_chars):
+            digest.update(text[start:start + self.block_chars].encode("utf-8"))
+            key = digest.hexdigest()
+            if hit and key in self._blocks:
+                cached += self.block_chars // CHARS_PER_TOKEN
+            else:
+                hit = False
+                self._blocks.add(key)
+        return cached
+
+
+# ============================================================================
+# Measurement
+# ============================================================================
+
+def workload(topics: int, refine_rate: float) -> list[tuple[str, str, dict]]:
+    """(template, system prompt, builder arguments) for every call of the run."""
+    calls = []
+    for i in range(topics):
+        grade, topic = 1 + i % 12, f"Benchmark topic {i}"
+        payload = generator_payload(topic, flawed=i < topics * refine_rate)
+        review = ReviewerInput(grade=grade, topic=topic, explanation=payload["explanation"], mcqs=payload["mcqs"])
+        calls.append(("generator.full", GeneratorAgent.SYSTEM_PROMPT, {"grade": grade, "topic": topic}))
+        calls.append(("reviewer.full", ReviewerAgent.SYSTEM_PROMPT, {"input_data": review}))
+        calls.append(("reviewer.section", ReviewerAgent.SYSTEM_PROMPT, {"input_data": review, "section": i % 5}))
+        if i < topics * refine_rate:
+            feedback = {"feedback": ["Question 2 is ambiguous.", "Use simpler words."]}
+            calls.append(("generator.full", GeneratorAgent.SYSTEM_PROMPT, {"grade": grade, "topic": topic, **feedback}))
+    return calls
+
+
+def builders() -> dict:
+    generator, reviewer = GeneratorAgent(), ReviewerAgent()
+    return {
+        "legacy": {
+            "generator.full": legacy_generator_prompt,
+            "reviewer.full": legacy_reviewer_prompt,
+            "reviewer.section": legacy_section_prompt,
+        },
+        "templates": {
+            "generator.full": generator._build_prompt,
+            "reviewer.full": reviewer._build_prompt,
+            "reviewer.section": reviewer._build_section_prompt,
+        },
+    }
+
+
+def measure(build: dict, calls: list, args: argparse.Namespace) -> dict:
+    """Tokens, cached tokens, render time and simulated TTFT per template."""
+    cache = PrefixCache(args.block_tokens)
+    stats = {name: {"tokens": [], "cached": [], "render_us": [], "ttft": []} for name in build}
+    for name, system, kwargs in calls:
+        began = time.perf_counter()
+        prompt = build[name](**kwargs)
+        render_us = 1e6 * (time.perf_counter() - began)
+        text = f"{system}\n{prompt}"
+        tokens = estimate_tokens(text)
+        cached = cache.cached_tokens(text)
+        row = stats[name]
+        row["tokens"].append(tokens)
+        row["cached"].append(cached)
+        row["render_us"].append(render_us)
+        row["ttft"].append(args.base_ttft + (tokens - cached) / args.prompt_tps)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare prompt tokens and simulated TTFT of prompt builders")
+    parser.add_argument("--topics", type=int, default=200)
+    parser.add_argument("--refine-rate", type=float, default=0.3, help="Share of topics whose draft is refined")
+    parser.add_argument("--block-tokens", type=int, default=16, help="Prefix cache block size in tokens")
+    parser.add_argument("--base-ttft", type=float, default=0.05, help="Seconds to first token with a fully cached prompt")
+    parser.add_argument("--prompt-tps", type=float, default=2000.0, help="Uncached prompt tokens processed per second")
+    args = parser.parse_args()
+
+    calls = workload(args.topics, args.refine_rate)
+    results = {variant: measure(build, calls, args) for variant, build in builders().items()}
+
+    print(f"{len(calls)} prompts over {args.topics} topics, {args.block_tokens}-token cache blocks")
+    print(f"{'template':<18} {'variant':<10} {'tokens':>7} {'cached':>7} {'render us':>10} {'ttft ms':>8}")
+    totals = {}
+    for name in builders()["legacy"]:
+        for variant, stats in results.items():
+            row = stats[name]
+            print(
+                f"{name:<18} {variant:<10} {statistics.mean(row['tokens']):>7.0f} "
+                f"{sum(row['cached']) / sum(row['tokens']):>7.0%} {statistics.median(row['render_us']):>10.1f} "
+                f"{1000 * statistics.mean(row['ttft']):>8.1f}"
+            )
+            total = totals.setdefault(variant, [0, 0, 0.0])
+            total[0] += sum(row["tokens"])
+            total[1] += sum(row["cached"])
+            total[2] += sum(row["ttft"])
+    for variant, (tokens, cached, ttft) in totals.items():
+        print(f"{'all':<18} {variant:<10} {tokens / len(calls):>7.0f} {cached / tokens:>7.0%} "
+              f"{'':>10} {1000 * ttft / len(calls):>8.1f}")
+    legacy, templates = totals["legacy"], totals["templates"]
+    print(f"\nprompt tokens -{1 - templates[0] / legacy[0]:.0%}, "
+          f"uncached prompt tokens -{1 - (templates[0] - templates[1]) / (legacy[0] - legacy[1]):.0%}, "
+          f"mean TTFT -{1 - templates[2] / legacy[2]:.0%}")
+    print(f"registry: {json.dumps(prompt_registry.get_stats(), indent=1)}")
+
+
+if __name__ == "__main__":
+    main()
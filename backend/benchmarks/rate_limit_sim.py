@@ -0,0 +1,161 @@
+"""
+Rate Limit Simulation - sustained throughput against an enforced quota.
+
+A stub provider enforces a requests-per-period and tokens-per-period quota
+the way GROQ does (token buckets, 429 with retry-after when exceeded). The
+pipeline is driven by a closed loop of concurrent runs in three setups:
+
+- no-retry:      no client-side limiter, no retries (today's behaviour)
+- retry-only:    no limiter, 429s retried after retry-after
+- limiter:       shared RateLimiter at the quota plus retries
+
+For each it reports 429s seen, failed pipeline runs and the sustained token
+throughput (after the first period's burst) as a share of the quota:
+
+    python -m benchmarks.rate_limit_sim --duration 30 --period 10 --tpm 120000
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from providers import Completion, FakeProvider, LatencyModel, RateLimitError, estimate_tokens
+from ratelimit import RateLimitedProvider, RateLimiter, TokenBucket
+
+
+class QuotaEnforcingProvider(FakeProvider):
+    """
+    FakeProvider that rejects calls beyond a request and token quota.
+
+    A call is admitted while both buckets are in credit; its request is
+    charged on arrival and its actual tokens when it completes.
+    """
+
+    def __init__(self, rpm: float, tpm: float, period: float, **kwargs):
+        super().__init__(**kwargs)
+        self.request_bucket = TokenBucket(rpm, rpm / period)
+        self.token_bucket = TokenBucket(tpm, tpm / period)
+        self.rejected = 0
+        self.served: list[tuple[float, int]] = []
+
+    def _admit(self) -> None:
+        now = time.monotonic()
+        requests = self.request_bucket.available(now)
+        tokens = self.token_bucket.available(now)
+        if requests < 1 or tokens <= 0:
+            self.rejected += 1
+            retry_after = max(
+                (1 - requests) / self.request_bucket.refill_per_second,
+                -tokens / self.token_bucket.refill_per_second,
+                0.0,
+            )
+            raise RateLimitError("Rate limit reached", retry_after=retry_after)
+        self.request_bucket.reserve(1, now)
+
+    def _charge(self, completion: Completion) -> None:
+        tokens = completion.prompt_tokens + completion.completion_tokens
+        now = time.monotonic()
+        self.token_bucket.reserve(tokens, now)
+        self.served.append((now, tokens))
+
+    async def acomplete(self, messages: list[dict], model: str, temperature: float, max_tokens: int, json_mode: bool = False) -> Completion:
+        self._admit()
+        completion = await super().acomplete(messages, model, temperature, max_tokens, json_mode=json_mode)
+        self._charge(completion)
+        return completion
+
+    async def astream(self, messages, model, temperature, max_tokens, json_mode=False):
+        self._admit()
+        text = ""
+        async for delta in super().astream(messages, model, temperature, max_tokens, json_mode=json_mode):
+            text += delta
+            yield delta
+        prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+        self._charge(Completion(text, prompt_tokens, estimate_tokens(text)))
+
+
+async def simulate(name: str, args: argparse.Namespace) -> dict:
+    """Drive the pipeline for `duration` seconds against a fresh quota."""
+    from config import GENERATOR_PROFILE, set_provider
+    from pipeline import EducationalContentPipeline
+
+    stub = QuotaEnforcingProvider(
+        args.rpm, args.tpm, args.period,
+        latency=LatencyModel(base=args.latency, distribution="uniform", spread=args.latency / 2),
+        seed=args.seed,
+    )
+    limiter = RateLimiter(args.rpm, args.tpm, period=args.period) if name == "limiter" else RateLimiter()
+    provider = RateLimitedProvider(
+        stub,
+        limiter,
+        max_retries=0 if name == "no-retry" else args.max_retries,
+        base_delay=0.1,
+    )
+    set_provider(provider)
+    pipeline = EducationalContentPipeline(cache=None)
+
+    completed = 0
+    failed = 0
+    counter = iter(range(10 ** 9))
+    start = time.monotonic()
+    deadline = start + args.duration
+
+    async def worker():
+        nonlocal completed, failed
+        while time.monotonic() < deadline:
+            i = next(counter)
+            try:
+                await pipeline.arun(1 + i % 12, f"Topic {name} {i}")
+                completed += 1
+            except Exception:
+                failed += 1
+
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    end = time.monotonic()
+
+    # Sustained rate: skip the first period, where the full buckets allow a burst
+    steady = [tokens for at, tokens in stub.served if at >= start + args.period]
+    steady_seconds = max(end - start - args.period, 1e-9)
+    quota_rate = args.tpm / args.period
+    return {
+        "completed": completed,
+        "failed": failed,
+        "rejected": stub.rejected,
+        "retries": provider.retries,
+        "tokens_per_s": sum(steady) / steady_seconds,
+        "utilization": sum(steady) / steady_seconds / quota_rate,
+        "max_wait_ms": limiter.get_stats()["max_wait_ms"],
+        "max_tokens": GENERATOR_PROFILE.max_tokens,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate sustained load against an enforced LLM quota")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per scenario")
+    parser.add_argument("--period", type=float, default=10.0, help="Quota period in seconds (60 for real per-minute quotas)")
+    parser.add_argument("--rpm", type=float, default=300, help="Requests per period")
+    parser.add_argument("--tpm", type=float, default=120_000, help="Tokens per period")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent pipeline runs")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM base seconds per call")
+    parser.add_argument("--max-retries", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scenarios", nargs="+", default=["no-retry", "retry-only", "limiter"])
+    args = parser.parse_args()
+
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["CACHE_BACKEND"] = "none"
+
+    print(f"Quota: {args.rpm:g} requests / {args.tpm:g} tokens per {args.period:g}s "
+          f"({args.tpm / args.period:.0f} tokens/s), {args.concurrency} concurrent runs, {args.duration:g}s each")
+    print(f"{'scenario':<12} {'runs ok':>8} {'failed':>7} {'429s':>6} {'retries':>8} {'tokens/s':>9} {'of quota':>9} {'max wait':>9}")
+    for name in args.scenarios:
+        r = asyncio.run(simulate(name, args))
+        print(
+            f"{name:<12} {r['completed']:>8} {r['failed']:>7} {r['rejected']:>6} {r['retries']:>8} "
+            f"{r['tokens_per_s']:>9.0f} {r['utilization']:>9.0%} {r['max_wait_ms'] / 1000:>8.1f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
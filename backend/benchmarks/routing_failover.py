@@ -0,0 +1,108 @@
+"""
+Routing Failover Benchmark - load balancing and outage handling across backends.
+
+Routes pipeline runs over three backends: two in-process fake providers
+with different latencies and the fake LLM server reached through the
+OpenAI-compatible provider. A third of the way into the run the fast fake
+backend starts failing every call, and it recovers at two thirds. The
+circuit breaker should trip, calls should fail over without failed runs,
+and the health checks should bring the backend back:
+
+    python -m benchmarks.routing_failover --duration 15 --strategy least_latency
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.load_generate import start_server, wait_until_up
+from benchmarks.suite import percentile
+
+
+async def drive(args: argparse.Namespace, strategy: str) -> None:
+    """Run the outage scenario with one routing strategy and print per-backend stats."""
+    from config import MODEL_NAME, set_provider
+    from pipeline import EducationalContentPipeline
+    from ratelimit import RateLimitedProvider
+    from router import BackendSpec, RouterProvider, build_backend
+
+    specs = [
+        BackendSpec(name="fast", kind="fake", latency=args.latency, weight=2),
+        BackendSpec(name="slow", kind="fake", latency=3 * args.latency),
+        BackendSpec(name="server", kind="openai", base_url=f"http://127.0.0.1:{args.llm_port}/openai/v1"),
+    ]
+    backends = [build_backend(spec, failure_threshold=3, reset_timeout=args.reset_timeout) for spec in specs]
+    router = RouterProvider(backends, default_model=MODEL_NAME, strategy=strategy, seed=0)
+    set_provider(RateLimitedProvider(router, max_retries=3, base_delay=0.1))
+    pipeline = EducationalContentPipeline(cache=None)
+    fast = backends[0].provider.provider  # The FakeProvider behind the fast backend's limiter
+
+    latencies = []
+    failed = 0
+    counter = iter(range(10 ** 9))
+    start = time.monotonic()
+    deadline = start + args.duration
+
+    async def worker():
+        nonlocal failed
+        while time.monotonic() < deadline:
+            i = next(counter)
+            began = time.perf_counter()
+            try:
+                await pipeline.arun(1 + i % 12, f"Topic {strategy} {i}")
+            except Exception:
+                failed += 1
+                continue
+            latencies.append(time.perf_counter() - began)
+
+    async def outage():
+        await asyncio.sleep(args.duration / 3)
+        fast.error_rate = 1.0
+        await asyncio.sleep(args.duration / 3)
+        fast.error_rate = 0.0
+
+    health = asyncio.create_task(router.run_health_checks(args.health_interval))
+    await asyncio.gather(outage(), *(worker() for _ in range(args.concurrency)))
+    health.cancel()
+    await router.aclose()
+
+    latencies.sort()
+    stats = router.get_stats()
+    print(f"\nstrategy={strategy}: {len(latencies)} runs ok, {failed} failed, "
+          f"p50 {percentile(latencies, 50):.2f}s, p95 {percentile(latencies, 95):.2f}s, "
+          f"{stats['failovers']} failovers")
+    print(f"  {'backend':<8} {'calls':>6} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'trips':>6} {'state':>8}")
+    for name, b in stats["backends"].items():
+        print(f"  {name:<8} {b['calls']:>6} {b['errors']:>7} {b['p50_ms']:>8.0f} {b['p95_ms']:>8.0f} {b['breaker_trips']:>6} {b['state']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark multi-backend routing with an outage")
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.1, help="Fast backend seconds per call")
+    parser.add_argument("--strategy", nargs="+", default=["weighted", "least_latency"])
+    parser.add_argument("--reset-timeout", type=float, default=2.0, help="Breaker cool-down seconds")
+    parser.add_argument("--health-interval", type=float, default=1.0)
+    parser.add_argument("--llm-port", type=int, default=9105)
+    args = parser.parse_args()
+
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["CACHE_BACKEND"] = "none"
+
+    server = start_server(
+        ["-m", "benchmarks.fake_llm_server", "--port", str(args.llm_port), "--latency", str(2 * args.latency)],
+        dict(os.environ),
+    )
+    try:
+        asyncio.run(wait_until_up(f"http://127.0.0.1:{args.llm_port}/docs"))
+        for strategy in args.strategy:
+            asyncio.run(drive(args, strategy))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
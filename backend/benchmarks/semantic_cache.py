@@ -0,0 +1,160 @@
+"""
+Semantic Cache Benchmark - near-duplicate hit rate and lookup latency by index size.
+
+Fills a SemanticIndex with synthetic three-word topics spread over grades
+1-12, then looks up three kinds of query per size and index type:
+- reworded: a stored topic reordered, pluralized or padded with stop words
+  ("the X of Y explained"), which should hit that topic
+- one-swapped: a stored topic with one of its words replaced, a different
+  lesson that should miss
+- novel: three random words, which should miss
+
+It reports the hit rate of reworded queries (and how many hit the right
+entry), false hits on the other two kinds, and lookup latency:
+
+    python -m benchmarks.semantic_cache --sizes 10000 100000 1000000
+
+Before that it checks, through the pipeline on the fake provider, that a
+semantic hit is served for the grade that was asked for: with the default
+grade band another grade's result must not match, and with a wider band a
+neighbouring grade's result is returned with the requested grade and
+`cached_from_grade` set. It exits with an error if either fails.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+
+from benchmarks.suite import percentile
+from semantic_cache import SemanticIndex
+
+SYLLABLES = "ba be bi bo bu da de di do du ka ke ki ko ku la le li lo lu ma me mi mo mu na ne ni no nu ra re ri ro ru sa se si so su ta te ti to tu".split()
+
+
+def vocabulary(size: int, rng: random.Random) -> list[str]:
+    """Distinct pseudo-words of 2-4 syllables (real topic words would need a corpus)."""
+    words: set[str] = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) + rng.choice("nrstlm"))
+    return sorted(words)
+
+
+def reword(words: list[str], rng: random.Random) -> str:
+    """A phrasing of the same three content words."""
+    words = words[:]
+    rng.shuffle(words)
+    words[rng.randrange(3)] += "s"
+    return rng.choice(["{} {} {}", "the {} of {} and {}", "{} and {} {} explained", "introduction to {} {} {}"]).format(*words)
+
+
+def build_queries(stored: list[tuple[int, list[str]]], vocab: list[str], count: int, rng: random.Random) -> list:
+    """(kind, grade, topic, expected index or None) for `count` queries of each kind."""
+    queries = []
+    for _ in range(count):
+        i = rng.randrange(len(stored))
+        grade, words = stored[i]
+        queries.append(("reworded", grade, reword(words, rng), i))
+        swapped = words[:]
+        swapped[rng.randrange(3)] = rng.choice(vocab)
+        queries.append(("one-swapped", grade, " ".join(swapped), None))
+        queries.append(("novel", rng.randint(1, 12), " ".join(rng.sample(vocab, 3)), None))
+    return queries
+
+
+async def check_grades() -> None:
+    """Fail unless semantic hits answer for the requested grade (see the module docstring)."""
+    from cache import MemoryCacheBackend, ResultCache
+    from config import set_provider
+    from pipeline import EducationalContentPipeline
+    from providers import FakeProvider, LatencyModel
+
+    set_provider(FakeProvider(LatencyModel(base=0.0), fail_rate=0.0))
+    for grade_band, expect_hit in ((1, False), (3, True)):
+        cache = ResultCache(MemoryCacheBackend(), SemanticIndex(threshold=0.7, grade_band=grade_band))
+        pipeline = EducationalContentPipeline(cache=cache)
+        await pipeline.arun(5, "Photosynthesis in plants")
+        served = pipeline.cached_result(6, "plants and photosynthesis")
+        label = f"grade band {grade_band}"
+        if not expect_hit:
+            if served is not None:
+                raise SystemExit(f"{label}: grade 6 was served grade {served.cached_from_grade or served.grade}'s content")
+        elif served is None:
+            raise SystemExit(f"{label}: grade 6 missed grade 5's near-duplicate topic")
+        elif (served.grade, served.cached_from_grade) != (6, 5):
+            raise SystemExit(f"{label}: grade 6 hit returned grade {served.grade}, cached_from_grade {served.cached_from_grade}")
+        print(f"{label}: grade check ok")
+
+
+def run_size(size: int, index_type: str, args: argparse.Namespace) -> dict:
+    rng = random.Random(args.seed)
+    vocab = vocabulary(args.vocab, rng)
+    stored = [(rng.randint(1, 12), rng.sample(vocab, 3)) for _ in range(size)]
+    index = SemanticIndex(threshold=args.threshold, grade_band=args.grade_band, index_type=index_type)
+
+    began = time.perf_counter()
+    by_grade: dict[int, list[int]] = {}
+    for i, (grade, _) in enumerate(stored):
+        by_grade.setdefault(grade, []).append(i)
+    for grade, rows in by_grade.items():
+        index.add_many(grade, [" ".join(stored[i][1]) for i in rows], [str(i) for i in rows])
+    build_seconds = time.perf_counter() - began
+
+    results = {kind: {"queries": 0, "hits": 0, "correct": 0} for kind in ("reworded", "one-swapped", "novel")}
+    latencies = []
+    for kind, grade, topic, expected in build_queries(stored, vocab, args.queries, rng):
+        began = time.perf_counter()
+        match = index.lookup(grade, topic)
+        latencies.append(time.perf_counter() - began)
+        row = results[kind]
+        row["queries"] += 1
+        row["hits"] += match is not None
+        if match is not None and expected is not None:
+            # A same-band duplicate of the expected topic is an equally good answer
+            row["correct"] += stored[int(match[0])][1] == stored[expected][1]
+    latencies.sort()
+    return {
+        "size": size,
+        "index": index_type,
+        "build_s": build_seconds,
+        "results": results,
+        "p50_ms": 1000 * percentile(latencies, 50),
+        "p95_ms": 1000 * percentile(latencies, 95),
+        "mean_ms": 1000 * statistics.mean(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark semantic cache hit rate and lookup latency")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--index", nargs="+", default=["brute", "ivf"], choices=["brute", "ivf"])
+    parser.add_argument("--queries", type=int, default=500, help="Queries of each kind per run")
+    parser.add_argument("--vocab", type=int, default=20000, help="Distinct topic words")
+    parser.add_argument("--threshold", type=float, default=0.7)
+    parser.add_argument("--grade-band", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.environ["LLM_PROVIDER"] = "fake"
+    asyncio.run(check_grades())
+
+    print(f"threshold {args.threshold}, grade bands of {args.grade_band}, {args.queries} queries of each kind")
+    print(f"{'entries':>8} {'index':<6} {'build s':>8} {'reworded hit':>13} {'correct':>8} "
+          f"{'swapped hit':>12} {'novel hit':>10} {'p50 ms':>7} {'p95 ms':>7}")
+    for size in args.sizes:
+        for index_type in args.index:
+            r = run_size(size, index_type, args)
+            res = r["results"]
+            reworded = res["reworded"]
+            print(
+                f"{size:>8} {index_type:<6} {r['build_s']:>8.1f} "
+                f"{reworded['hits'] / reworded['queries']:>13.1%} {reworded['correct'] / reworded['queries']:>8.1%} "
+                f"{res['one-swapped']['hits'] / res['one-swapped']['queries']:>12.1%} "
+                f"{res['novel']['hits'] / res['novel']['queries']:>10.1%} {r['p50_ms']:>7.2f} {r['p95_ms']:>7.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Serialization Benchmark - cost of turning a pipeline result into response bytes.
+
+Compares the previous response path with the current one for a refined
+/generate result and for /generate/batch responses of several sizes:
+- legacy: the agents dump their validated models to dicts, the pipeline
+  carries them in a dataclass, the endpoint rebuilds them as response
+  models, and FastAPI validates that against the response_model, dumps it
+  to a dict, runs jsonable_encoder and json.dumps
+- current: the pipeline keeps the agents' models and the endpoint returns
+  ModelResponse(result.public()), one pydantic-core to_json call
+
+Both paths must produce the same JSON; the benchmark checks that first:
+
+    python -m benchmarks.serialization --repeat 2000 --batch-sizes 1 10 50
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from pydantic import BaseModel, Field
+
+from agents.generator import GeneratorOutput
+from agents.reviewer import ReviewerOutput
+from main import BatchGenerateResponse, ModelResponse
+from pipeline import BatchItemResult, PipelineResult
+from providers import generator_payload, reviewer_payload
+
+
+# ============================================================================
+# Previous response path (dict results re-validated into response models)
+# ============================================================================
+
+@dataclass
+class LegacyPipelineResult:
+    grade: int
+    topic: str
+    initial_content: dict
+    review_result: dict
+    refined_content: Optional[dict] = None
+    was_refined: bool = False
+    cached: bool = False
+    refinement_mode: Optional[str] = None
+    token_usage: dict = field(default_factory=dict)
+    trace: Optional[dict] = None
+    content_id: Optional[int] = None
+
+
+class MCQResponse(BaseModel):
+    question: str
+    options: list[str]
+    answer: str
+
+
+class GeneratorOutputResponse(BaseModel):
+    explanation: str
+    mcqs: list[MCQResponse]
+
+
+class ReviewItemResponse(BaseModel):
+    target: str
+    index: Optional[int] = None
+    status: str
+    feedback: list[str]
+
+
+class ReviewResultResponse(BaseModel):
+    status: str
+    feedback: list[str]
+    items: list[ReviewItemResponse] = []
+
+
+class LegacyGenerateResponse(BaseModel):
+    grade: int
+    topic: str
+    initial_content: GeneratorOutputResponse
+    review_result: ReviewResultResponse
+    refined_content: Optional[GeneratorOutputResponse] = None
+    was_refined: bool
+    refinement_mode: Optional[str] = None
+    cached: bool = False
+    token_usage: Optional[dict] = None
+    trace: Optional[dict] = None
+    content_id: Optional[int] = Field(None, description="ID of the stored result, for GET /content/{content_id}")
+
+
+class LegacyBatchItemResponse(BaseModel):
+    index: int
+    grade: int
+    topic: str
+    result: Optional[LegacyGenerateResponse] = None
+    error: Optional[str] = None
+
+
+class LegacyBatchGenerateResponse(BaseModel):
+    results: list[LegacyBatchItemResponse]
+    succeeded: int
+    failed: int
+
+
+GENERATE_FIELD = create_model_field("Response", LegacyGenerateResponse, mode="serialization")
+BATCH_FIELD = create_model_field("Response", LegacyBatchGenerateResponse, mode="serialization")
+_loop = asyncio.new_event_loop()
+
+
+def legacy_result(models: tuple) -> LegacyPipelineResult:
+    """What the pipeline built from the agents' models: dumped dicts in a dataclass."""
+    initial, review, refined = models
+    return LegacyPipelineResult(
+        grade=5,
+        topic="Photosynthesis",
+        initial_content=initial.model_dump(),
+        review_result=review.model_dump(),
+        refined_content=refined.model_dump(),
+        was_refined=True,
+        refinement_mode="partial",
+        token_usage={"total_tokens": 4200},
+        content_id=42,
+    )
+
+
+def legacy_response(result: LegacyPipelineResult) -> LegacyGenerateResponse:
+    return LegacyGenerateResponse(
+        grade=result.grade,
+        topic=result.topic,
+        initial_content=GeneratorOutputResponse(**result.initial_content),
+        review_result=ReviewResultResponse(**result.review_result),
+        refined_content=GeneratorOutputResponse(**result.refined_content) if result.refined_content else None,
+        was_refined=result.was_refined,
+        refinement_mode=result.refinement_mode,
+        cached=result.cached,
+        content_id=result.content_id,
+    )
+
+
+def render_legacy(response_field, content) -> bytes:
+    """What FastAPI did with a returned model: validate, dump, encode, json.dumps."""
+    body = _loop.run_until_complete(serialize_response(field=response_field, response_content=content))
+    return JSONResponse(body).body
+
+
+# ============================================================================
+# Measurement
+# ============================================================================
+
+def agent_models() -> tuple:
+    """The validated models the agents return for a refined result."""
+    return (
+        GeneratorOutput.model_validate(generator_payload("Photosynthesis", flawed=True)),
+        ReviewerOutput.model_validate(reviewer_payload(fail=True)),
+        GeneratorOutput.model_validate(generator_payload("Photosynthesis")),
+    )
+
+
+def current_result(models: tuple) -> PipelineResult:
+    initial, review, refined = models
+    return PipelineResult(
+        grade=5,
+        topic="Photosynthesis",
+        initial_content=initial,
+        review_result=review,
+        refined_content=refined,
+        was_refined=True,
+        refinement_mode="partial",
+        token_usage={"total_tokens": 4200},
+        content_id=42,
+    )
+
+
+def legacy_generate(models: tuple) -> bytes:
+    return render_legacy(GENERATE_FIELD, legacy_response(legacy_result(models)))
+
+
+def current_generate(models: tuple) -> bytes:
+    return ModelResponse(current_result(models).public()).body
+
+
+def legacy_batch(models: tuple, size: int) -> bytes:
+    items = [
+        LegacyBatchItemResponse(index=i, grade=5, topic="Photosynthesis", result=legacy_response(legacy_result(models)))
+        for i in range(size)
+    ]
+    return render_legacy(BATCH_FIELD, LegacyBatchGenerateResponse(results=items, succeeded=size, failed=0))
+
+
+def current_batch(models: tuple, size: int) -> bytes:
+    items = [
+        BatchItemResult(index=i, grade=5, topic="Photosynthesis", result=current_result(models).public())
+        for i in range(size)
+    ]
+    return ModelResponse(BatchGenerateResponse(results=items, succeeded=size, failed=0)).body
+
+
+def per_call_us(fn, repeat: int) -> float:
+    fn()
+    began = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return 1e6 * (time.perf_counter() - began) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the legacy and current response serialization paths")
+    parser.add_argument("--repeat", type=int, default=2000, help="Responses rendered per timing")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+
+    models = agent_models()
+    if json.loads(legacy_generate(models)) != json.loads(current_generate(models)):
+        raise SystemExit("legacy and current /generate bodies differ")
+    if json.loads(legacy_batch(models, 3)) != json.loads(current_batch(models, 3)):
+        raise SystemExit("legacy and current /generate/batch bodies differ")
+
+    print(f"{'response':<16} {'legacy us':>10} {'current us':>11} {'speedup':>8}")
+    legacy = per_call_us(lambda: legacy_generate(models), args.repeat)
+    current = per_call_us(lambda: current_generate(models), args.repeat)
+    print(f"{'/generate':<16} {legacy:>10.1f} {current:>11.1f} {legacy / current:>7.1f}x")
+    for size in args.batch_sizes:
+        repeat = max(10, args.repeat // size)
+        legacy = per_call_us(lambda: legacy_batch(models, size), repeat)
+        current = per_call_us(lambda: current_batch(models, size), repeat)
+        print(f"{f'batch of {size}':<16} {legacy:>10.1f} {current:>11.1f} {legacy / current:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Single-Flight Check - N concurrent identical /generate requests.
+
+Drives ``--requests`` concurrent /generate calls for the same grade and
+topic (with varying capitalization) against the fake LLM server and checks
+that only one pipeline actually executed:
+
+    python -m benchmarks.singleflight_check --requests 30
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+
+from benchmarks.load_generate import start_server, wait_until_up
+
+
+async def drive(requests: int) -> None:
+    """Fire identical requests at the in-process app and verify coalescing."""
+    import main
+    from config import get_provider
+    
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://api", timeout=60.0) as client:
+        topics = ["Photosynthesis", "photosynthesis", "  PHOTOSYNTHESIS "]
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(
+            client.post("/generate", json={"grade": 5, "topic": topics[i % len(topics)]})
+            for i in range(requests)
+        ))
+        wall = time.perf_counter() - start
+    
+    assert all(r.status_code == 200 for r in responses), [r.text for r in responses if r.status_code != 200]
+    stats = main.get_pipeline().singleflight.get_stats()
+    llm_calls = get_provider().get_stats()["calls"]
+    
+    print(f"Concurrent requests:   {requests}")
+    print(f"Pipeline executions:   {stats['executions']}")
+    print(f"Collapsed calls:       {stats['collapsed']}")
+    print(f"LLM calls:             {llm_calls}")
+    print(f"Wall time:             {wall:.2f}s")
+    
+    assert stats["executions"] == 1, "expected exactly one pipeline execution"
+    assert stats["collapsed"] == requests - 1
+    print("OK")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check single-flight coalescing of /generate")
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.3, help="Fake LLM seconds per call")
+    parser.add_argument("--llm-port", type=int, default=9101)
+    args = parser.parse_args()
+    
+    os.environ["GROQ_API_KEY"] = os.environ.get("GROQ_API_KEY") or "benchmark-key"
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{args.llm_port}"
+    os.environ["CACHE_BACKEND"] = "none"
+    
+    llm = start_server(
+        ["-m", "benchmarks.fake_llm_server", "--port", str(args.llm_port), "--latency", str(args.latency)],
+        dict(os.environ),
+    )
+    try:
+        asyncio.run(wait_until_up(f"http://127.0.0.1:{args.llm_port}/docs"))
+        asyncio.run(drive(args.requests))
+    finally:
+        llm.terminate()
+        llm.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Speculative Review Benchmark - serial vs speculative pipeline wall-clock.
+
+Runs the same topics through the serial and the speculative pipeline against
+the latency-injecting fake LLM server and reports per-run latency, the
+wall-clock saving and the extra LLM calls spent on speculation:
+
+    python -m benchmarks.speculative_review --runs 40 --fail-rate 0.5
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from benchmarks.load_generate import start_server, wait_until_up
+
+
+async def measure(speculative: bool, runs: int, concurrency: int) -> dict:
+    """Run `runs` pipelines in one mode and collect latency and call counts."""
+    from config import get_provider
+    from pipeline import EducationalContentPipeline
+    
+    pipeline = EducationalContentPipeline(cache=None, speculative=speculative)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    refined = 0
+    calls_before = get_provider().calls
+    
+    async def one(i: int):
+        nonlocal refined
+        async with semaphore:
+            start = time.perf_counter()
+            result = await pipeline.arun(5, f"Topic {i}")
+            latencies.append(time.perf_counter() - start)
+            refined += result.was_refined
+    
+    await asyncio.gather(*(one(i) for i in range(runs)))
+    latencies.sort()
+    return {
+        "mean": statistics.mean(latencies),
+        "p95": latencies[int(0.95 * (len(latencies) - 1))],
+        "refined": refined / runs,
+        "calls": (get_provider().calls - calls_before) / runs,
+    }
+
+
+async def compare(runs: int, concurrency: int) -> None:
+    """Benchmark both modes and print a comparison table."""
+    serial = await measure(False, runs, concurrency)
+    speculative = await measure(True, runs, concurrency)
+    
+    print(f"{'mode':<12} {'mean (s)':>9} {'p95 (s)':>9} {'refined':>8} {'LLM calls/run':>14}")
+    for name, stats in (("serial", serial), ("speculative", speculative)):
+        print(f"{name:<12} {stats['mean']:>9.2f} {stats['p95']:>9.2f} {stats['refined']:>8.0%} {stats['calls']:>14.1f}")
+    saving = 1 - speculative["mean"] / serial["mean"]
+    print(f"Mean wall-clock saving: {saving:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare serial and speculative pipeline modes")
+    parser.add_argument("--runs", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.3, help="Fake LLM base seconds per call")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Fake LLM +/- jitter in seconds")
+    parser.add_argument("--token-latency", type=float, default=0.003, help="Fake LLM seconds per output token")
+    parser.add_argument("--prompt-latency", type=float, default=0.0005, help="Fake LLM seconds per prompt token")
+    parser.add_argument("--fail-rate", type=float, default=0.5, help="Fraction of first drafts rejected")
+    parser.add_argument("--llm-port", type=int, default=9103)
+    args = parser.parse_args()
+    
+    os.environ["GROQ_API_KEY"] = os.environ.get("GROQ_API_KEY") or "benchmark-key"
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{args.llm_port}"
+    
+    llm = start_server(
+        [
+            "-m", "benchmarks.fake_llm_server",
+            "--port", str(args.llm_port),
+            "--latency", str(args.latency),
+            "--jitter", str(args.jitter),
+            "--token-latency", str(args.token_latency),
+            "--prompt-latency", str(args.prompt_latency),
+            "--fail-rate", str(args.fail_rate),
+        ],
+        dict(os.environ),
+    )
+    try:
+        asyncio.run(wait_until_up(f"http://127.0.0.1:{args.llm_port}/docs"))
+        asyncio.run(compare(args.runs, args.concurrency))
+    finally:
+        llm.terminate()
+        llm.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Startup Benchmark - import time budget and time to /ready on a cold start.
+
+Imports the API in fresh interpreters with ``python -X importtime`` and
+reports the median import time of the app module, its slowest direct
+imports, and whether any module that should load lazily (the GROQ SDK,
+httpx, uvicorn, NumPy) was imported. Then starts one uvicorn worker and
+measures how long /health and /ready take to answer.
+
+Exits with status 1 when the median import time exceeds --budget-ms or a
+lazy module was imported, so it can guard against regressions in CI:
+
+    python -m benchmarks.startup --runs 5 --budget-ms 1000
+"""
+
+import argparse
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.load_generate import BACKEND_DIR
+
+LAZY_MODULES = ["groq", "httpx", "uvicorn", "numpy"]
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_times(module: str, env: dict, cwd: str) -> tuple[float, dict[str, float], set[str]]:
+    """
+    Import `module` in a fresh interpreter.
+
+    Returns its cumulative import milliseconds, those of its direct imports,
+    and the names of every module loaded.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd, env=env, capture_output=True, text=True, check=True,
+    )
+    total, children, pending, loaded = 0.0, {}, {}, set()
+    # Lines come in completion order: a module's imports are listed before it
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        depth, name, ms = (len(match[3]) - 1) // 2, match[4], int(match[2]) / 1000
+        loaded.add(name)
+        if depth == 1:
+            pending[name] = ms
+        elif depth == 0:
+            if name == module:
+                total, children = ms, pending
+            pending = {}
+    return total, children, loaded
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_ready(env: dict, cwd: str, timeout: float = 30.0) -> tuple[float, float]:
+    """Start uvicorn and return seconds until /health and /ready answer 200."""
+    port = free_port()
+    began = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port)],
+        cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    healthy = None
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1.0) as client:
+            while time.perf_counter() - began < timeout:
+                try:
+                    if healthy is None and client.get("/health").status_code == 200:
+                        healthy = time.perf_counter() - began
+                    if healthy is not None and client.get("/ready").status_code == 200:
+                        return healthy, time.perf_counter() - began
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)
+    finally:
+        server.terminate()
+        server.wait()
+    raise RuntimeError(f"Server did not become ready in {timeout}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the API's import time budget and time to /ready")
+    parser.add_argument("--module", default="main", help="Module to import")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to time")
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="Fail above this median import time")
+    parser.add_argument("--lazy", nargs="*", default=LAZY_MODULES, help="Modules the import must not load")
+    parser.add_argument("--top", type=int, default=8, help="Slowest direct imports to list")
+    parser.add_argument("--no-server", action="store_true", help="Skip the time-to-ready measurement")
+    args = parser.parse_args()
+
+    # The GROQ provider with a dummy key makes warm-up import the SDK and
+    # build its clients without network calls; SQLite files go to a temp dir
+    env = {
+        **os.environ,
+        "PYTHONPATH": BACKEND_DIR,
+        "LLM_PROVIDER": "groq",
+        "GROQ_API_KEY": os.environ.get("GROQ_API_KEY") or "startup-benchmark",
+    }
+    env.pop("LLM_BACKENDS", None)
+    failures = []
+    with tempfile.TemporaryDirectory(prefix="startup-bench-") as cwd:
+        runs = [import_times(args.module, env, cwd) for _ in range(args.runs)]
+        total = statistics.median(run[0] for run in runs)
+        children = {
+            name: statistics.median(run[1].get(name, 0.0) for run in runs) for name in runs[0][1]
+        }
+        loaded = [name for name in args.lazy if any(name in run[2] for run in runs)]
+
+        print(f"import {args.module}: {total:.0f} ms median of {args.runs} (budget {args.budget_ms:.0f} ms)")
+        for name, ms in sorted(children.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"  {name:<24} {ms:>7.1f} ms")
+        print(f"lazy modules loaded at import: {', '.join(loaded) or 'none'}")
+        if total > args.budget_ms:
+            failures.append(f"import time {total:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+        if loaded:
+            failures.append(f"imported eagerly: {', '.join(loaded)}")
+
+        if not args.no_server:
+            healthy, ready = time_to_ready(env, cwd)
+            print(f"uvicorn start to /health: {1000 * healthy:.0f} ms, to /ready: {1000 * ready:.0f} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
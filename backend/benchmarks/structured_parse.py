@@ -0,0 +1,216 @@
+"""
+Structured Parse Benchmark - reply parsing speed and robustness.
+
+Parses a corpus of generator and reviewer replies with the previous
+approach (strip fences, greedy regex for the outermost braces, json.loads,
+then Model(**data)) and with structured.parse_model(). The corpus has
+clean JSON-mode replies and the malformations seen from models without
+JSON mode: code fences, prose around the object, trailing commas, Python
+dict syntax, raw newlines in strings, upper-case verdicts and truncation.
+It reports the parse success rate and mean time per reply for each variant.
+It also compares the old explanation stream extractor with JSONStream on
+chunked replies:
+
+    python -m benchmarks.structured_parse --repeat 2000
+"""
+
+import argparse
+import json
+import re
+import time
+from typing import Callable, Optional
+
+from agents.generator import GeneratorOutput
+from agents.reviewer import ReviewerOutput
+from providers import reviewer_payload
+from structured import JSONStream, parse_model
+
+EXPLANATION = (
+    "Photosynthesis is how plants make their own food. Leaves take in carbon dioxide "
+    "from the air and water from the roots, and use the energy of sunlight to turn them "
+    "into glucose, a kind of sugar.\n\nThe green pigment \"chlorophyll\" captures the light; "
+    "that is why leaves look green. Oxygen is released as a by-product — the oxygen we breathe!\n\n"
+    "Without photosynthesis there would be no food chains: animals eat plants, or eat animals that ate plants."
+)
+
+
+def generator_reply() -> dict:
+    """A realistic Generator Agent reply body."""
+    return {
+        "explanation": EXPLANATION,
+        "mcqs": [
+            {
+                "question": f"Question {i + 1}: which part of the plant does job number {i + 1} in photosynthesis?",
+                "options": ["A. The roots", "B. The leaves", "C. The flowers", "D. The stem"],
+                "answer": "ABCD"[i % 4],
+            }
+            for i in range(5)
+        ],
+    }
+
+
+def build_corpus() -> list[tuple[str, type, str]]:
+    """(variant, model, reply text) for every malformation of both reply types."""
+    corpus = []
+    for name, model, body in (
+        ("generator", GeneratorOutput, generator_reply()),
+        ("reviewer", ReviewerOutput, reviewer_payload(fail=True)),
+    ):
+        compact = json.dumps(body, ensure_ascii=False)
+        pretty = json.dumps(body, indent=2, ensure_ascii=False)
+        variants = {
+            "json-mode": compact,
+            "pretty": pretty,
+            "fenced": f"```json\n{pretty}\n```",
+            "prose": f"Here is the content you asked for:\n\n{pretty}\n\nLet me know if you need changes to {{anything}}.",
+            "trailing-comma": re.sub(r'("|\]|\})(\s*\n\s*)(\]|\})', r"\1,\2\3", pretty),
+            "python-dict": repr(body),
+            "raw-newline": pretty.replace("\\n", "\n"),
+            "truncated": pretty[: int(len(pretty) * 0.97)],
+        }
+        if name == "reviewer":
+            variants["upper-status"] = compact.replace('"fail"', '"FAIL"').replace('"pass"', '"Pass"')
+        corpus.extend((f"{name}/{variant}", model, text) for variant, text in variants.items())
+    return corpus
+
+
+# ============================================================================
+# Previous implementation, kept as the baseline
+# ============================================================================
+
+def legacy_parse(text: str, model: type):
+    cleaned = text.strip()
+    if cleaned.startswith("```json"):
+        cleaned = cleaned[7:]
+    elif cleaned.startswith("```"):
+        cleaned = cleaned[3:]
+    if cleaned.endswith("```"):
+        cleaned = cleaned[:-3]
+    cleaned = cleaned.strip()
+    json_match = re.search(r'\{[\s\S]*\}', cleaned)
+    if json_match:
+        cleaned = json_match.group()
+    data = json.loads(cleaned)
+    if model is ReviewerOutput:
+        if "status" in data:
+            data["status"] = data["status"].lower()
+        for item in data.get("items", []):
+            if isinstance(item, dict) and "status" in item:
+                item["status"] = str(item["status"]).lower()
+    return model(**data)
+
+
+class LegacyExplanationStream:
+    _KEY_PATTERN = re.compile(r'"explanation"\s*:\s*"')
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos: Optional[int] = None
+        self.done = False
+
+    def feed(self, chunk: str) -> str:
+        if self.done:
+            return ""
+        self._buffer += chunk
+        if self._pos is None:
+            match = self._KEY_PATTERN.search(self._buffer)
+            if not match:
+                return ""
+            self._pos = match.end()
+        out = []
+        buffer, pos = self._buffer, self._pos
+        while pos < len(buffer):
+            char = buffer[pos]
+            if char == '"':
+                self.done = True
+                pos += 1
+                break
+            if char == "\\":
+                length = 6 if buffer[pos + 1:pos + 2] == "u" else 2
+                if pos + length > len(buffer):
+                    break
+                try:
+                    out.append(json.loads(f'"{buffer[pos:pos + length]}"'))
+                except json.JSONDecodeError:
+                    out.append(buffer[pos + 1:pos + length])
+                pos += length
+                continue
+            out.append(char)
+            pos += 1
+        self._pos = pos
+        return "".join(out)
+
+
+# ============================================================================
+# Measurement
+# ============================================================================
+
+def time_parse(parse: Callable, text: str, model: type, repeat: int) -> tuple[bool, float]:
+    """Return (parsed, mean microseconds per parse); failures are timed too."""
+    try:
+        parse(text, model)
+        ok = True
+    except Exception:
+        ok = False
+    began = time.perf_counter()
+    for _ in range(repeat):
+        try:
+            parse(text, model)
+        except Exception:
+            pass
+    return ok, 1e6 * (time.perf_counter() - began) / repeat
+
+
+def stream_legacy(text: str, chunk_size: int) -> tuple[str, GeneratorOutput]:
+    extractor = LegacyExplanationStream()
+    chunks, shown = [], []
+    for i in range(0, len(text), chunk_size):
+        chunks.append(text[i:i + chunk_size])
+        shown.append(extractor.feed(chunks[-1]))
+    return "".join(shown), legacy_parse("".join(chunks), GeneratorOutput)
+
+
+def stream_new(text: str, chunk_size: int) -> tuple[str, GeneratorOutput]:
+    stream = JSONStream(field="explanation")
+    shown = [stream.feed(text[i:i + chunk_size]) for i in range(0, len(text), chunk_size)]
+    return "".join(shown), stream.parse(GeneratorOutput)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LLM reply parsing")
+    parser.add_argument("--repeat", type=int, default=2000, help="Parses per corpus entry")
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[4, 16, 64])
+    args = parser.parse_args()
+
+    corpus = build_corpus()
+    print(f"{'reply':<28} {'legacy':>8} {'us':>8} {'new':>8} {'us':>8}")
+    totals = {"legacy": [0, 0.0], "new": [0, 0.0]}
+    for variant, model, text in corpus:
+        row = []
+        for name, parse in (("legacy", legacy_parse), ("new", parse_model)):
+            ok, micros = time_parse(parse, text, model, args.repeat)
+            totals[name][0] += ok
+            totals[name][1] += micros
+            row.append(f"{'ok' if ok else 'FAIL':>8} {micros:>8.1f}")
+        print(f"{variant:<28} {' '.join(row)}")
+    print(f"{'total':<28} " + " ".join(
+        f"{f'{parsed}/{len(corpus)}':>8} {micros / len(corpus):>8.1f}" for parsed, micros in totals.values()
+    ))
+
+    text = json.dumps(generator_reply(), indent=2)
+    print(f"\nStreaming a {len(text)}-char generator reply (explanation shown + final parse)")
+    print(f"{'chunk':>6} {'legacy us':>10} {'new us':>10}")
+    for chunk_size in args.chunk_sizes:
+        timings = []
+        for stream in (stream_legacy, stream_new):
+            shown, _ = stream(text, chunk_size)
+            assert shown == EXPLANATION, f"{stream.__name__} showed the wrong explanation"
+            began = time.perf_counter()
+            for _ in range(args.repeat // 10 or 1):
+                stream(text, chunk_size)
+            timings.append(1e6 * (time.perf_counter() - began) / (args.repeat // 10 or 1))
+        print(f"{chunk_size:>6} {timings[0]:>10.1f} {timings[1]:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
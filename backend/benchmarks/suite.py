@@ -0,0 +1,154 @@
+"""
+Benchmark Suite - pipeline and API latency/throughput on the fake provider.
+
+Runs entirely in-process and offline: the LLM is replaced by the
+deterministic FakeProvider, so no API key, network or extra server is
+needed and a given seed replays the same workload. Two targets are driven
+by a closed loop of ``--concurrency`` workers:
+
+- pipeline: EducationalContentPipeline.arun directly
+- api: POST /generate on the FastAPI app through an in-process ASGI transport
+
+Each target reports p50/p95/p99 latency and requests/sec:
+
+    python -m benchmarks.suite --requests 200 --concurrency 32 --latency 0.05
+    python -m benchmarks.suite --distribution lognormal --spread 0.6 --error-rate 0.02 --json results.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from typing import Awaitable, Callable
+
+import httpx
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values), max(1, math.ceil(p / 100 * len(sorted_values)))) - 1
+    return sorted_values[rank]
+
+
+def summarize(latencies: list[float], errors: int, wall: float) -> dict:
+    """Latency percentiles (ms) and throughput for one benchmark run."""
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "wall_s": wall,
+        "rps": len(latencies) / wall if wall else 0.0,
+        "mean_ms": 1000 * sum(latencies) / len(latencies) if latencies else 0.0,
+        "p50_ms": 1000 * percentile(latencies, 50),
+        "p95_ms": 1000 * percentile(latencies, 95),
+        "p99_ms": 1000 * percentile(latencies, 99),
+        "max_ms": 1000 * latencies[-1] if latencies else 0.0,
+    }
+
+
+async def closed_loop(call: Callable[[int], Awaitable[None]], requests: int, concurrency: int) -> dict:
+    """Issue `requests` calls from `concurrency` workers and summarize them."""
+    latencies = []
+    errors = 0
+    next_index = iter(range(requests))
+    
+    async def worker():
+        nonlocal errors
+        for i in next_index:
+            start = time.perf_counter()
+            try:
+                await call(i)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+def make_provider(args: argparse.Namespace):
+    """Build the FakeProvider described by the command line."""
+    from providers import FakeProvider, LatencyModel
+    
+    latency = LatencyModel(
+        base=args.latency,
+        distribution=args.distribution,
+        spread=args.spread,
+        tokens_per_second=args.tokens_per_second,
+    )
+    return FakeProvider(latency, fail_rate=args.fail_rate, error_rate=args.error_rate, seed=args.seed)
+
+
+async def bench_pipeline(args: argparse.Namespace) -> dict:
+    """Drive EducationalContentPipeline.arun directly."""
+    from config import set_provider
+    from pipeline import EducationalContentPipeline
+    
+    set_provider(make_provider(args))
+    pipeline = EducationalContentPipeline(cache=None)
+    
+    async def call(i: int):
+        await pipeline.arun(1 + i % 12, f"Topic {i}")
+    
+    return await closed_loop(call, args.requests, args.concurrency)
+
+
+async def bench_api(args: argparse.Namespace) -> dict:
+    """Drive POST /generate on the FastAPI app in-process."""
+    import main
+    from config import set_provider
+    
+    set_provider(make_provider(args))
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://api", timeout=300.0) as client:
+        async def call(i: int):
+            response = await client.post("/generate", json={"grade": 1 + i % 12, "topic": f"Topic {i}"})
+            response.raise_for_status()
+        
+        return await closed_loop(call, args.requests, args.concurrency)
+
+
+TARGETS = {"pipeline": bench_pipeline, "api": bench_api}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline latency/throughput benchmark suite")
+    parser.add_argument("--targets", nargs="+", choices=list(TARGETS), default=list(TARGETS))
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake LLM base seconds per call")
+    parser.add_argument("--distribution", default="constant", choices=["constant", "uniform", "normal", "lognormal", "pareto"])
+    parser.add_argument("--spread", type=float, default=0.0, help="Jitter, std-dev, sigma or tail index, per distribution")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Fake completion token rate (0 = instant)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of first drafts the reviewer rejects")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of LLM calls that raise")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+    
+    # Never touch the real API and measure uncached runs only
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["CACHE_BACKEND"] = "none"
+    
+    results = {name: asyncio.run(TARGETS[name](args)) for name in args.targets}
+    
+    print(f"{'target':<10} {'requests':>8} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, r in results.items():
+        print(
+            f"{name:<10} {r['requests']:>8} {r['errors']:>7} {r['rps']:>8.1f} "
+            f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['max_ms']:>8.1f}"
+        )
+    
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
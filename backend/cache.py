@@ -0,0 +1,359 @@
+"""
+Result Cache Module - Content-addressed caching of pipeline runs
+
+Repeat requests for the same (grade, topic) pay for 2-3 LLM round-trips on
+every call. The ResultCache stores finished pipeline results under a key
+derived from everything that influences the output:
+
+    sha256(normalized topic, grade, model name, temperature, prompt version)
+
+Backends are pluggable:
+- MemoryCacheBackend: in-process LRU with TTL, holding the result objects
+  themselves so a hit needs no parsing or validation
+- SQLiteCacheBackend: on-disk store that survives restarts
+
+With SEMANTIC_CACHE enabled, an exact-key miss falls back to the cached
+result of the most similar topic of the same grade (semantic_cache.py).
+The semantic index is rebuilt from the backend's live entries at startup,
+so persisted and prewarmed results are matched too.
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Iterator, Literal, Optional
+
+from config import (
+    CACHE_BACKEND,
+    CACHE_MAX_ENTRIES,
+    CACHE_PATH,
+    CACHE_TTL_SECONDS,
+    GENERATOR_PROFILE,
+    REVIEWER_PROFILE,
+    SEMANTIC_CACHE,
+    SEMANTIC_CACHE_GRADE_BAND,
+    SEMANTIC_CACHE_INDEX,
+    SEMANTIC_CACHE_THRESHOLD,
+)
+from prompts import prompt_registry
+
+# "default" reads and writes the cache, "no-cache" skips the lookup but stores
+# the fresh result, "no-store" bypasses the cache entirely.
+CacheControl = Literal["default", "no-cache", "no-store"]
+
+
+def normalize_topic(topic: str) -> str:
+    """Normalize a topic so trivial spelling variations share a cache entry."""
+    topic = topic.strip().lower()
+    topic = re.sub(r"\s+", " ", topic)
+    return topic.strip(" .,;:!?\"'")
+
+
+def make_cache_key(
+    grade: int,
+    topic: str,
+    model: str = GENERATOR_PROFILE.model,
+    temperature: float = GENERATOR_PROFILE.temperature,
+    prompt_version: Optional[str] = None,
+    reviewer_model: str = REVIEWER_PROFILE.model,
+) -> str:
+    """
+    Build the content address for a pipeline run.
+
+    `prompt_version` defaults to the ids of every registered prompt template,
+    so bumping a template's version invalidates the results it produced.
+    """
+    prompt_version = prompt_version or prompt_registry.version_key()
+    material = json.dumps(
+        [normalize_topic(topic), grade, model, temperature, reviewer_model, prompt_version],
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+# ============================================================================
+# Backends
+# ============================================================================
+
+class CacheBackend(ABC):
+    """
+    Storage interface for cached pipeline results.
+
+    Values are JSON-ready dicts, except in backends with `keeps_objects`,
+    which hold the PipelineResult as given and return that same object.
+    """
+
+    keeps_objects = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[dict]:
+        """Return the stored value, or None if missing or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: dict) -> None:
+        """Store a value under the given key."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove a key if present."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove all entries."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of stored (possibly expired) entries."""
+
+    def expires_at(self, key: str) -> Optional[float]:
+        """Unix time at which a stored entry expires, or None if it is missing."""
+        return None
+
+    @abstractmethod
+    def topics(self) -> Iterator[tuple[str, int, str]]:
+        """(key, grade, topic) of every unexpired entry, for rebuilding the semantic index."""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-memory LRU cache with per-entry TTL; stored results must not be mutated."""
+
+    keeps_objects = True
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 86400):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def expires_at(self, key: str) -> Optional[float]:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry else None
+
+    def topics(self) -> Iterator[tuple[str, int, str]]:
+        now = time.time()
+        with self._lock:
+            entries = [(key, value) for key, (expires_at, value) in self._entries.items() if expires_at >= now]
+        for key, value in entries:
+            yield key, value.grade, value.topic
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """On-disk cache backed by a single SQLite table."""
+
+    def __init__(self, path: str = "content_cache.db", ttl_seconds: float = 86400):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " grade INTEGER,"
+            " topic TEXT)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(cache)")}
+        if "topic" not in columns:
+            # Caches written before the semantic index needed topics; those rows are
+            # not indexed until they are rewritten
+            self._conn.execute("ALTER TABLE cache ADD COLUMN grade INTEGER")
+            self._conn.execute("ALTER TABLE cache ADD COLUMN topic TEXT")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at < time.time():
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return json.loads(value)
+
+    def set(self, key: str, value: dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, grade, topic) VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(value), time.time() + self.ttl_seconds, value.get("grade"), value.get("topic")),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def expires_at(self, key: str) -> Optional[float]:
+        with self._lock:
+            row = self._conn.execute("SELECT expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            return row[0] if row else None
+
+    def topics(self) -> Iterator[tuple[str, int, str]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, grade, topic FROM cache WHERE expires_at >= ? AND topic IS NOT NULL", (time.time(),)
+            ).fetchall()
+        yield from rows
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+# ============================================================================
+# Result Cache
+# ============================================================================
+
+class ResultCache:
+    """
+    Pipeline result cache with hit/miss accounting.
+
+    Results are PipelineResults. A backend that keeps objects holds them as
+    they are; any other gets their plain-dict form, so any backend that can
+    store JSON can hold them. An optional SemanticIndex answers lookups
+    whose exact key misses with a near-duplicate topic's key; it starts out
+    holding every entry already in the backend.
+    """
+
+    def __init__(self, backend: CacheBackend, semantic=None):
+        self.backend = backend
+        self.semantic = semantic
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.stores = 0
+        if semantic is not None:
+            self._index_backend()
+
+    def _index_backend(self) -> None:
+        """Add the backend's live entries to the semantic index, one batch per grade."""
+        by_grade: dict[int, tuple[list[str], list[str]]] = {}
+        for key, grade, topic in self.backend.topics():
+            # Entries from another model or prompt version are unreachable by exact key; keep it that way
+            if key != make_cache_key(grade, topic):
+                continue
+            topics, keys = by_grade.setdefault(grade, ([], []))
+            topics.append(topic)
+            keys.append(key)
+        for grade, (topics, keys) in by_grade.items():
+            self.semantic.add_many(grade, topics, keys)
+
+    def _semantic_get(self, grade: int, topic: str) -> Optional[Any]:
+        match = self.semantic.lookup(grade, topic)
+        if match is None:
+            return None
+        key, _ = match
+        value = self.backend.get(key)
+        if value is None:
+            # Evicted or expired in the backend: stop matching it
+            self.semantic.remove(grade, key)
+        return value
+
+    def get(self, grade: int, topic: str) -> Optional[Any]:
+        """Look up a cached result: the stored PipelineResult, or its dict form from a serializing backend."""
+        value = self.backend.get(make_cache_key(grade, topic))
+        if value is None and self.semantic is not None:
+            value = self._semantic_get(grade, topic)
+            self.semantic_hits += value is not None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, grade: int, topic: str, result: Any) -> None:
+        """Store a PipelineResult for the given grade and topic."""
+        key = make_cache_key(grade, topic)
+        self.backend.set(key, result if self.backend.keeps_objects else result.model_dump())
+        if self.semantic is not None:
+            self.semantic.add(grade, topic, key)
+        self.stores += 1
+
+    def get_stats(self) -> dict:
+        """Return hit/miss counters for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "semantic": self.semantic.get_stats() if self.semantic is not None else None,
+        }
+
+
+def create_result_cache() -> Optional[ResultCache]:
+    """Build the cache configured by CACHE_BACKEND, or None if disabled."""
+    if CACHE_BACKEND == "none":
+        return None
+    if CACHE_BACKEND == "sqlite":
+        backend = SQLiteCacheBackend(CACHE_PATH, ttl_seconds=CACHE_TTL_SECONDS)
+    elif CACHE_BACKEND == "memory":
+        backend = MemoryCacheBackend(CACHE_MAX_ENTRIES, ttl_seconds=CACHE_TTL_SECONDS)
+    else:
+        raise ValueError(f"Unknown CACHE_BACKEND: {CACHE_BACKEND!r}")
+    semantic = None
+    if SEMANTIC_CACHE:
+        # Imported here so NumPy is only loaded when the semantic cache is on
+        from semantic_cache import SemanticIndex
+
+        semantic = SemanticIndex(
+            threshold=SEMANTIC_CACHE_THRESHOLD,
+            grade_band=SEMANTIC_CACHE_GRADE_BAND,
+            index_type=SEMANTIC_CACHE_INDEX,
+        )
+    return ResultCache(backend, semantic)
@@ -0,0 +1,222 @@
+"""
+LLM Client Manager - Process-wide, pooled GROQ clients
+
+Every completion used to build a fresh ``Groq`` client, paying for a new
+connection pool, TCP/TLS handshake and client setup on each agent call.
+The ClientManager owns one sync and one async client per process, both
+backed by httpx connection pools with keep-alive, and records how well
+those pools are being reused.
+
+httpx and the GROQ SDK are imported when the first client is built, not
+with this module, so importing the service stays fast on a cold start.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import httpx
+    from groq import AsyncGroq, Groq
+
+
+# ============================================================================
+# Pool Configuration & Statistics
+# ============================================================================
+
+@dataclass
+class PoolLimits:
+    """Connection pool sizing for the shared LLM clients."""
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    timeout: float = 60.0
+
+    def to_httpx(self) -> "httpx.Limits":
+        """Convert to httpx pool limits."""
+        import httpx
+
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+
+@dataclass
+class PoolStats:
+    """Counters describing how the connection pool is being used."""
+    requests: int = 0
+    new_connections: int = 0
+    total_wait_time: float = 0.0
+    max_wait_time: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def record_connection(self) -> None:
+        with self._lock:
+            self.new_connections += 1
+
+    def record_acquired(self, wait_time: float) -> None:
+        with self._lock:
+            self.total_wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+
+    def snapshot(self) -> dict:
+        """Return a JSON-serializable view of the statistics."""
+        with self._lock:
+            reused = max(self.requests - self.new_connections, 0)
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "reused_connections": reused,
+                "reuse_rate": reused / self.requests if self.requests else 0.0,
+                "avg_wait_ms": 1000 * self.total_wait_time / self.requests if self.requests else 0.0,
+                "max_wait_ms": 1000 * self.max_wait_time,
+            }
+
+
+class _RequestTracer:
+    """
+    httpcore ``trace`` extension for a single request.
+
+    Counts newly opened connections and measures how long the request waited
+    for a pooled connection (including connect time) before sending headers.
+    """
+
+    def __init__(self, stats: PoolStats):
+        self.stats = stats
+        self.started = time.perf_counter()
+
+    def _on_event(self, name: str) -> None:
+        if name == "connection.connect_tcp.started":
+            self.stats.record_connection()
+        elif name.endswith(".send_request_headers.started"):
+            self.stats.record_acquired(time.perf_counter() - self.started)
+
+    def __call__(self, name: str, info: dict) -> None:
+        self._on_event(name)
+
+
+class _AsyncRequestTracer(_RequestTracer):
+    """Async flavour of the tracer; httpcore requires a coroutine callback."""
+
+    async def __call__(self, name: str, info: dict) -> None:
+        self._on_event(name)
+
+
+# ============================================================================
+# Client Manager
+# ============================================================================
+
+class ClientManager:
+    """
+    Owns the process-wide sync and async GROQ clients.
+
+    Clients are created lazily on first use and share one httpx connection
+    pool each. Call close()/aclose() on shutdown to release connections.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        limits: Optional[PoolLimits] = None,
+        max_retries: int = 2,
+    ):
+        self.api_key = api_key
+        self.max_retries = max_retries
+        self.base_url = base_url
+        self.limits = limits or PoolLimits()
+        self.stats = PoolStats()
+        self._client: Optional["Groq"] = None
+        self._async_client: Optional["AsyncGroq"] = None
+        self._lock = threading.Lock()
+
+    def _sync_hooks(self) -> dict:
+        def on_request(request: "httpx.Request") -> None:
+            self.stats.record_request()
+            request.extensions["trace"] = _RequestTracer(self.stats)
+
+        return {"request": [on_request]}
+
+    def _async_hooks(self) -> dict:
+        async def on_request(request: "httpx.Request") -> None:
+            self.stats.record_request()
+            request.extensions["trace"] = _AsyncRequestTracer(self.stats)
+
+        return {"request": [on_request]}
+
+    def get_client(self) -> "Groq":
+        """Return the shared sync client, creating it on first use."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import httpx
+                    from groq import Groq
+
+                    http_client = httpx.Client(
+                        limits=self.limits.to_httpx(),
+                        timeout=self.limits.timeout,
+                        event_hooks=self._sync_hooks(),
+                    )
+                    self._client = Groq(
+                        api_key=self.api_key,
+                        base_url=self.base_url,
+                        max_retries=self.max_retries,
+                        http_client=http_client,
+                    )
+        return self._client
+
+    def get_async_client(self) -> "AsyncGroq":
+        """Return the shared async client, creating it on first use."""
+        if self._async_client is None:
+            with self._lock:
+                if self._async_client is None:
+                    import httpx
+                    from groq import AsyncGroq
+
+                    http_client = httpx.AsyncClient(
+                        limits=self.limits.to_httpx(),
+                        timeout=self.limits.timeout,
+                        event_hooks=self._async_hooks(),
+                    )
+                    self._async_client = AsyncGroq(
+                        api_key=self.api_key,
+                        base_url=self.base_url,
+                        max_retries=self.max_retries,
+                        http_client=http_client,
+                    )
+        return self._async_client
+
+    def prime(self) -> None:
+        """Create both clients now, so the first request skips the SDK import and client setup."""
+        self.get_client()
+        self.get_async_client()
+
+    def get_stats(self) -> dict:
+        """Return pool statistics together with the configured limits."""
+        return {
+            **self.stats.snapshot(),
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+        }
+
+    def close(self) -> None:
+        """Close the sync client and its connection pool."""
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    async def aclose(self) -> None:
+        """Close both clients; call from the application shutdown hook."""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+        self.close()
@@ -2,25 +2,36 @@
 Configuration module for the Educational Content Generation System.
 
 This module handles:
-- Environment variable loading
-- GROQ LLM (Llama) initialization
-- Model configuration settings
+- Environment variable loading (validated by validate_config(), not at import)
+- LLM provider selection (GROQ Llama or an offline fake)
+- Model configuration settings and per-agent model profiles
+- Completion functions used by the agents
 """
 
 import os
+import threading
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
 from dotenv import load_dotenv
-from groq import Groq
+
+from clients import PoolLimits
+from deadline import check, enforce
+from hedging import HedgedProvider
+from providers import FakeProvider, GroqProvider, LatencyModel, LLMProvider
+from ratelimit import RateLimitedProvider, RateLimiter
+from router import RouterProvider, build_backend, load_backend_spec, load_backend_specs
+from tracing import span
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Validate API key exists
+# GROQ API key; validated when the GROQ provider is created, so the fake
+# provider works without one
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-if not GROQ_API_KEY:
-    raise ValueError(
-        "GROQ_API_KEY not found. Please set it in your .env file.\n"
-        "Get your key from: https://console.groq.com/keys"
-    )
+
+# Optional override of the GROQ API endpoint (e.g. a local fake server for benchmarks)
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None
 
 # Model configuration
 MODEL_NAME = "llama-3.3-70b-versatile"  # Powerful Llama 3.3 model on GROQ
@@ -28,39 +39,439 @@ TEMPERATURE = 0.7  # Balanced creativity
 MAX_TOKENS = 2048
 
 
-def get_client() -> Groq:
+@dataclass(frozen=True)
+class ModelProfile:
+    """
+    Model settings for one agent's LLM calls.
+    
+    `json_mode` asks the backend to constrain the output to a JSON object
+    (GROQ/OpenAI ``response_format``), so the reply needs no fence stripping.
+    """
+    model: str = MODEL_NAME
+    temperature: float = TEMPERATURE
+    max_tokens: int = MAX_TOKENS
+    json_mode: bool = False
+
+
+# Problems found while reading the environment. Importing this module never
+# raises: a bad value falls back to its default, is recorded here and
+# reported by validate_config(), which the server calls at startup.
+_problems: list[str] = []
+
+
+class ConfigError(ValueError):
+    """The environment holds invalid settings; the message lists all of them."""
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    """Read a boolean environment variable ("1", "true", "yes" or "on")."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_number(name: str, default, kind: type):
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        return kind(value)
+    except ValueError:
+        _problems.append(f"{name}={value!r} is not a valid {kind.__name__}")
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer environment variable."""
+    return _env_number(name, default, int)
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float environment variable."""
+    return _env_number(name, default, float)
+
+
+def _env_choice(name: str, default: str, choices: tuple[str, ...]) -> str:
+    """Read a lower-cased environment variable that must be one of `choices`."""
+    value = os.getenv(name, default).strip().lower()
+    if value not in choices:
+        _problems.append(f"{name}={value!r} must be one of {', '.join(choices)}")
+        return default
+    return value
+
+
+def _load_profile(prefix: str, max_tokens: int, json_mode: bool) -> ModelProfile:
+    """Build an agent's profile from <PREFIX>_MODEL, _TEMPERATURE, _MAX_TOKENS and _JSON_MODE."""
+    return ModelProfile(
+        model=os.getenv(f"{prefix}_MODEL", MODEL_NAME),
+        temperature=_env_float(f"{prefix}_TEMPERATURE", TEMPERATURE),
+        max_tokens=_env_int(f"{prefix}_MAX_TOKENS", max_tokens),
+        json_mode=_env_flag(f"{prefix}_JSON_MODE", json_mode),
+    )
+
+
+# Per-agent model tiers. The generator writes the long explanation, so it
+# keeps the big model and the full token budget. The reviewer's verdict is
+# short, so it gets a tight token cap and can run on a small model such as
+# llama-3.1-8b-instant via REVIEWER_MODEL. Both ask for JSON mode, which
+# lets structured.parse_model() validate replies in a single step.
+GENERATOR_PROFILE = _load_profile("GENERATOR", MAX_TOKENS, json_mode=True)
+REVIEWER_PROFILE = _load_profile("REVIEWER", 1024, json_mode=True)
+DEFAULT_PROFILE = ModelProfile()
+
+# Result cache configuration ("memory", "sqlite" or "none")
+CACHE_BACKEND = _env_choice("CACHE_BACKEND", "memory", ("memory", "sqlite", "none"))
+CACHE_TTL_SECONDS = _env_float("CACHE_TTL_SECONDS", 86400.0)
+CACHE_MAX_ENTRIES = _env_int("CACHE_MAX_ENTRIES", 1024)
+CACHE_PATH = os.getenv("CACHE_PATH", "content_cache.db")
+
+# Semantic cache: on an exact-key miss, serve the result of the most similar
+# cached topic of the same grade (see semantic_cache.py). Off by default
+# because a near-duplicate topic is not always the same lesson. A grade band
+# above 1 opts in to serving content written for a neighbouring grade.
+SEMANTIC_CACHE = _env_flag("SEMANTIC_CACHE", False)
+SEMANTIC_CACHE_THRESHOLD = _env_float("SEMANTIC_CACHE_THRESHOLD", 0.7)
+SEMANTIC_CACHE_GRADE_BAND = _env_int("SEMANTIC_CACHE_GRADE_BAND", 1)
+SEMANTIC_CACHE_INDEX = _env_choice("SEMANTIC_CACHE_INDEX", "brute", ("brute", "ivf"))
+
+# Pipeline mode: "serial" (generate -> review -> refine) or "speculative"
+# (parallel per-section review with pre-emptive refinement)
+PIPELINE_MODE = _env_choice("PIPELINE_MODE", "serial", ("serial", "speculative"))
+
+# Batch generation limits
+BATCH_MAX_ITEMS = _env_int("BATCH_MAX_ITEMS", 500)
+BATCH_MAX_CONCURRENCY = _env_int("BATCH_MAX_CONCURRENCY", 16)
+
+# Admission control for /generate (see admission.py): concurrent pipeline runs
+# (0 = unlimited), requests allowed to wait for one, and the longest wait
+# before a request is shed with 503
+ADMISSION_MAX_CONCURRENCY = _env_int("ADMISSION_MAX_CONCURRENCY", 32)
+ADMISSION_MAX_QUEUE = _env_int("ADMISSION_MAX_QUEUE", 64)
+ADMISSION_MAX_WAIT_SECONDS = _env_float("ADMISSION_MAX_WAIT_SECONDS", 10.0)
+
+# Default time budget of a /generate request in seconds (0 = none); requests
+# may set their own. Refinement is skipped or cut short to meet it.
+REQUEST_DEADLINE_SECONDS = _env_float("REQUEST_DEADLINE_SECONDS", 60.0)
+
+# Background job queue ("memory" or "sqlite" store)
+JOB_STORE = _env_choice("JOB_STORE", "memory", ("memory", "sqlite"))
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "jobs.db")
+JOB_WORKERS = _env_int("JOB_WORKERS", 4)
+JOB_QUEUE_SIZE = _env_int("JOB_QUEUE_SIZE", 100)
+# Finished jobs the memory store keeps, and for how long (the SQLite store keeps all)
+JOB_MAX_FINISHED = _env_int("JOB_MAX_FINISHED", 1000)
+JOB_RETENTION_SECONDS = _env_float("JOB_RETENTION_SECONDS", 86400.0)
+
+# Persistent store of every generated result ("sqlite" or "none"), see content_store.py
+CONTENT_STORE = _env_choice("CONTENT_STORE", "sqlite", ("sqlite", "none"))
+CONTENT_DB_PATH = os.getenv("CONTENT_DB_PATH", "content.db")
+
+# Connection pool configuration for the shared LLM clients
+POOL_LIMITS = PoolLimits(
+    max_connections=_env_int("LLM_MAX_CONNECTIONS", 100),
+    max_keepalive_connections=_env_int("LLM_MAX_KEEPALIVE_CONNECTIONS", 20),
+    keepalive_expiry=_env_float("LLM_KEEPALIVE_EXPIRY", 30.0),
+    timeout=_env_float("LLM_TIMEOUT", 60.0),
+)
+
+# LLM backend: "groq" (the real API) or "fake" (deterministic, offline stand-in)
+LLM_PROVIDER = _env_choice("LLM_PROVIDER", "groq", ("groq", "fake"))
+
+# Fake provider behaviour (only used with LLM_PROVIDER=fake)
+FAKE_LLM_LATENCY = _env_float("FAKE_LLM_LATENCY", 0.5)
+FAKE_LLM_DISTRIBUTION = _env_choice(
+    "FAKE_LLM_DISTRIBUTION", "constant", ("constant", "uniform", "normal", "lognormal", "pareto")
+)
+FAKE_LLM_SPREAD = _env_float("FAKE_LLM_SPREAD", 0.0)
+FAKE_LLM_TOKENS_PER_SECOND = _env_float("FAKE_LLM_TOKENS_PER_SECOND", 0.0)
+FAKE_LLM_PROMPT_TOKENS_PER_SECOND = _env_float("FAKE_LLM_PROMPT_TOKENS_PER_SECOND", 0.0)
+FAKE_LLM_FAIL_RATE = _env_float("FAKE_LLM_FAIL_RATE", 0.0)
+FAKE_LLM_ERROR_RATE = _env_float("FAKE_LLM_ERROR_RATE", 0.0)
+FAKE_LLM_SEED = _env_int("FAKE_LLM_SEED", 0)
+
+# Client-side rate limiting (0 = unlimited) and retries of 429s/transient errors
+LLM_RPM_LIMIT = _env_float("LLM_RPM_LIMIT", 0.0)
+LLM_TPM_LIMIT = _env_float("LLM_TPM_LIMIT", 0.0)
+LLM_MAX_RETRIES = _env_int("LLM_MAX_RETRIES", 3)
+LLM_RETRY_BASE_DELAY = _env_float("LLM_RETRY_BASE_DELAY", 1.0)
+LLM_RETRY_MAX_DELAY = _env_float("LLM_RETRY_MAX_DELAY", 30.0)
+
+# Multi-backend routing: a JSON list of backends (see router.py); empty = single LLM_PROVIDER
+LLM_BACKENDS = os.getenv("LLM_BACKENDS", "").strip()
+LLM_ROUTING = _env_choice("LLM_ROUTING", "weighted", ("weighted", "least_latency"))
+LLM_BREAKER_FAILURES = _env_int("LLM_BREAKER_FAILURES", 3)
+LLM_BREAKER_RESET_SECONDS = _env_float("LLM_BREAKER_RESET_SECONDS", 30.0)
+LLM_HEALTH_CHECK_INTERVAL = _env_float("LLM_HEALTH_CHECK_INTERVAL", 15.0)
+
+# Request hedging (see hedging.py): duplicate an async call still running after
+# the given percentile of recent latencies, with at most LLM_HEDGE_BUDGET extra
+# calls per call. Duplicates go to LLM_HEDGE_BACKEND (one JSON backend, as in
+# LLM_BACKENDS) and/or LLM_HEDGE_MODEL when set, else to the same provider.
+LLM_HEDGE = _env_flag("LLM_HEDGE", False)
+LLM_HEDGE_PERCENTILE = _env_float("LLM_HEDGE_PERCENTILE", 95.0)
+LLM_HEDGE_BUDGET = _env_float("LLM_HEDGE_BUDGET", 0.1)
+LLM_HEDGE_MIN_SAMPLES = _env_int("LLM_HEDGE_MIN_SAMPLES", 20)
+LLM_HEDGE_MODEL = os.getenv("LLM_HEDGE_MODEL") or None
+LLM_HEDGE_BACKEND = os.getenv("LLM_HEDGE_BACKEND", "").strip()
+
+
+def validate_config() -> None:
     """
-    Initialize and return the GROQ client.
+    Check the settings read from the environment.
+    
+    Called from the server's startup (lifespan) so a bad deployment fails
+    at boot with every problem listed, while imports stay side-effect free.
+    
+    Raises:
+        ConfigError: If any setting is invalid
+    """
+    problems = list(_problems)
+    for name, value in (
+        ("BATCH_MAX_ITEMS", BATCH_MAX_ITEMS),
+        ("BATCH_MAX_CONCURRENCY", BATCH_MAX_CONCURRENCY),
+        ("JOB_WORKERS", JOB_WORKERS),
+        ("JOB_QUEUE_SIZE", JOB_QUEUE_SIZE),
+        ("JOB_MAX_FINISHED", JOB_MAX_FINISHED),
+        ("CACHE_MAX_ENTRIES", CACHE_MAX_ENTRIES),
+        ("LLM_MAX_CONNECTIONS", POOL_LIMITS.max_connections),
+        ("LLM_HEDGE_MIN_SAMPLES", LLM_HEDGE_MIN_SAMPLES),
+    ):
+        if value < 1:
+            problems.append(f"{name} must be at least 1, got {value}")
+    for name, value in (
+        ("ADMISSION_MAX_CONCURRENCY", ADMISSION_MAX_CONCURRENCY),
+        ("ADMISSION_MAX_QUEUE", ADMISSION_MAX_QUEUE),
+    ):
+        if value < 0:
+            problems.append(f"{name} must not be negative, got {value}")
+    if JOB_RETENTION_SECONDS <= 0:
+        problems.append(f"JOB_RETENTION_SECONDS must be positive, got {JOB_RETENTION_SECONDS}")
+    if REQUEST_DEADLINE_SECONDS < 0:
+        problems.append(f"REQUEST_DEADLINE_SECONDS must not be negative, got {REQUEST_DEADLINE_SECONDS}")
+    if ADMISSION_MAX_WAIT_SECONDS <= 0:
+        problems.append(f"ADMISSION_MAX_WAIT_SECONDS must be positive, got {ADMISSION_MAX_WAIT_SECONDS}")
+    if not 0 < SEMANTIC_CACHE_THRESHOLD <= 1:
+        problems.append(f"SEMANTIC_CACHE_THRESHOLD must be in (0, 1], got {SEMANTIC_CACHE_THRESHOLD}")
+    if not 0 < LLM_HEDGE_PERCENTILE < 100:
+        problems.append(f"LLM_HEDGE_PERCENTILE must be in (0, 100), got {LLM_HEDGE_PERCENTILE}")
+    if not 0 <= LLM_HEDGE_BUDGET <= 1:
+        problems.append(f"LLM_HEDGE_BUDGET must be in [0, 1], got {LLM_HEDGE_BUDGET}")
+    if LLM_HEDGE_BACKEND:
+        try:
+            load_backend_spec(LLM_HEDGE_BACKEND)
+        except (ValueError, TypeError) as e:
+            problems.append(f"LLM_HEDGE_BACKEND: {e}")
+    if LLM_BACKENDS:
+        try:
+            load_backend_specs(LLM_BACKENDS)
+        except (ValueError, TypeError) as e:
+            problems.append(f"LLM_BACKENDS: {e}")
+    elif LLM_PROVIDER == "groq" and not GROQ_API_KEY:
+        problems.append("GROQ_API_KEY is not set (get one at https://console.groq.com/keys, or use LLM_PROVIDER=fake)")
+    if problems:
+        raise ConfigError("Invalid configuration:\n- " + "\n- ".join(problems))
+
+# Process-wide provider, created on first use; the lock keeps the warm-up
+# thread and an early request from building two
+_provider: Optional[LLMProvider] = None
+_provider_lock = threading.Lock()
+
+
+def create_provider(name: str = LLM_PROVIDER) -> LLMProvider:
+    """
+    Build the configured LLM provider behind the shared rate limiter.
+    
+    With LLM_BACKENDS set, calls are routed over those backends (each with
+    its own quota) and LLM_RPM_LIMIT/LLM_TPM_LIMIT cap the total. With
+    LLM_HEDGE set, slow async calls are hedged on top of that, so duplicates
+    sent to the same provider pass the shared limiter too.
+    """
+    if LLM_BACKENDS:
+        backend = RouterProvider(
+            [
+                build_backend(spec, POOL_LIMITS, LLM_BREAKER_FAILURES, LLM_BREAKER_RESET_SECONDS)
+                for spec in load_backend_specs(LLM_BACKENDS)
+            ],
+            default_model=MODEL_NAME,
+            strategy=LLM_ROUTING,
+        )
+    else:
+        backend = _create_backend(name)
+    provider = RateLimitedProvider(
+        backend,
+        RateLimiter(rpm=LLM_RPM_LIMIT, tpm=LLM_TPM_LIMIT),
+        max_retries=LLM_MAX_RETRIES,
+        base_delay=LLM_RETRY_BASE_DELAY,
+        max_delay=LLM_RETRY_MAX_DELAY,
+    )
+    if not LLM_HEDGE:
+        return provider
+    hedge_provider, hedge_model = None, LLM_HEDGE_MODEL
+    if LLM_HEDGE_BACKEND:
+        hedge_backend = build_backend(load_backend_spec(LLM_HEDGE_BACKEND), POOL_LIMITS)
+        hedge_provider, hedge_model = hedge_backend.provider, LLM_HEDGE_MODEL or hedge_backend.spec.model
+    return HedgedProvider(
+        provider,
+        percentile=LLM_HEDGE_PERCENTILE,
+        budget=LLM_HEDGE_BUDGET,
+        hedge_provider=hedge_provider,
+        hedge_model=hedge_model,
+        min_samples=LLM_HEDGE_MIN_SAMPLES,
+    )
+
+
+def _create_backend(name: str) -> LLMProvider:
+    if name == "groq":
+        return GroqProvider(api_key=GROQ_API_KEY, base_url=GROQ_BASE_URL, limits=POOL_LIMITS)
+    if name == "fake":
+        latency = LatencyModel(
+            base=FAKE_LLM_LATENCY,
+            distribution=FAKE_LLM_DISTRIBUTION,
+            spread=FAKE_LLM_SPREAD,
+            prompt_tokens_per_second=FAKE_LLM_PROMPT_TOKENS_PER_SECOND,
+            tokens_per_second=FAKE_LLM_TOKENS_PER_SECOND,
+        )
+        return FakeProvider(latency, fail_rate=FAKE_LLM_FAIL_RATE, error_rate=FAKE_LLM_ERROR_RATE, seed=FAKE_LLM_SEED)
+    raise ValueError(f"Unknown LLM_PROVIDER: {name!r}")
+
+
+def get_provider() -> LLMProvider:
+    """
+    Return the process-wide LLM provider, creating it on first use.
+    
+    Safe to call from several threads: only one provider is ever built.
+    
+    Returns:
+        LLMProvider: The configured backend
+    """
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = create_provider()
+    return _provider
+
+
+def set_provider(provider: LLMProvider) -> Optional[LLMProvider]:
+    """
+    Replace the process-wide LLM provider (e.g. with a FakeProvider in benchmarks).
     
     Returns:
-        Groq: Configured GROQ client instance
+        The previous provider, if one had been created
     """
-    return Groq(api_key=GROQ_API_KEY)
+    global _provider
+    with _provider_lock:
+        previous, _provider = _provider, provider
+    return previous
 
 
-def generate_completion(prompt: str, system_prompt: str = None) -> str:
+def get_router() -> Optional[RouterProvider]:
+    """Return the RouterProvider behind the process-wide provider, if routing is configured."""
+    inner = get_provider()
+    while not isinstance(inner, RouterProvider) and hasattr(inner, "provider"):
+        inner = inner.provider
+    return inner if isinstance(inner, RouterProvider) else None
+
+
+async def aclose_provider() -> None:
+    """Close the process-wide provider; call from the application shutdown hook."""
+    if _provider is not None:
+        await _provider.aclose()
+
+
+def _build_messages(prompt: str, system_prompt: str = None) -> list[dict]:
+    """Build the chat message list for a completion request."""
+    messages = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+def generate_completion(prompt: str, system_prompt: str = None, profile: Optional[ModelProfile] = None) -> str:
     """
-    Generate a completion using GROQ Llama model.
+    Generate a completion using the configured LLM provider.
     
     Args:
         prompt: The user prompt
         system_prompt: Optional system prompt for context
+        profile: Model settings for the call (defaults to MODEL_NAME etc.)
         
     Returns:
         str: Generated text response
+        
+    Raises:
+        DeadlineExceeded: If the request deadline (see deadline.py) has passed;
+            a blocking call that has started is bounded by LLM_TIMEOUT only
     """
-    client = get_client()
+    profile = profile or DEFAULT_PROFILE
+    messages = _build_messages(prompt, system_prompt)
+    check("LLM call")
+    with span("generate_completion", model=profile.model):
+        return get_provider().complete(
+            messages, profile.model, profile.temperature, profile.max_tokens, json_mode=profile.json_mode
+        ).text
+
+
+async def agenerate_completion(prompt: str, system_prompt: str = None, profile: Optional[ModelProfile] = None) -> str:
+    """
+    Async variant of generate_completion that does not block the event loop.
     
-    messages = []
-    if system_prompt:
-        messages.append({"role": "system", "content": system_prompt})
-    messages.append({"role": "user", "content": prompt})
+    The remaining request deadline, if any, is the call's timeout.
     
-    response = client.chat.completions.create(
-        model=MODEL_NAME,
-        messages=messages,
-        temperature=TEMPERATURE,
-        max_tokens=MAX_TOKENS,
-    )
+    Args:
+        prompt: The user prompt
+        system_prompt: Optional system prompt for context
+        profile: Model settings for the call (defaults to MODEL_NAME etc.)
+        
+    Returns:
+        str: Generated text response
+        
+    Raises:
+        DeadlineExceeded: If the request deadline passes before the reply
+    """
+    profile = profile or DEFAULT_PROFILE
+    messages = _build_messages(prompt, system_prompt)
+    with span("generate_completion", model=profile.model):
+        async with enforce("LLM call"):
+            completion = await get_provider().acomplete(
+                messages, profile.model, profile.temperature, profile.max_tokens, json_mode=profile.json_mode
+            )
+    return completion.text
+
+
+async def astream_completion(
+    prompt: str, system_prompt: str = None, profile: Optional[ModelProfile] = None
+) -> AsyncIterator[str]:
+    """
+    Stream a completion, yielding text deltas as the model produces them.
+    
+    Each delta must arrive before the request deadline, if any.
     
-    return response.choices[0].message.content
+    Args:
+        prompt: The user prompt
+        system_prompt: Optional system prompt for context
+        profile: Model settings for the call (defaults to MODEL_NAME etc.)
+        
+    Yields:
+        str: Chunks of generated text
+        
+    Raises:
+        DeadlineExceeded: If the request deadline passes before the stream ends
+    """
+    profile = profile or DEFAULT_PROFILE
+    messages = _build_messages(prompt, system_prompt)
+    stream = get_provider().astream(
+        messages, profile.model, profile.temperature, profile.max_tokens, json_mode=profile.json_mode
+    )
+    with span("generate_completion", model=profile.model, stream=True):
+        try:
+            while True:
+                async with enforce("LLM call"):
+                    delta = await anext(stream, None)
+                if delta is None:
+                    break
+                yield delta
+        finally:
+            await stream.aclose()
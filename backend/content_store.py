@@ -0,0 +1,263 @@
+"""
+Content Store Module - Persistent repository of generated content
+
+Every fresh pipeline result is saved with an integer ID, so a quiz that was
+generated once can be listed, fetched and exported later instead of being
+paid for again. The SQLite table keeps the filterable fields in their own
+indexed columns and the full result as a JSON payload:
+
+    content(id, created_at, grade, topic, normalized_topic, review_status,
+            was_refined, refinement_mode, payload)
+
+Listing is keyset-paginated on the ID (newest first): a page is "the next
+`limit` rows with id < cursor", which each index below serves directly
+because SQLite appends the rowid to every index. The cost of a page does
+not grow with its depth, unlike OFFSET, and listing never reads payloads.
+Use ":memory:" as the path for a throwaway store.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from cache import normalize_topic
+from config import CONTENT_DB_PATH, CONTENT_STORE
+
+# Columns returned by listings; the payload is only read for single records and exports
+_SUMMARY_COLUMNS = "id, created_at, grade, topic, review_status, was_refined, refinement_mode"
+
+_INDEXES = {
+    "idx_content_grade": "grade",
+    "idx_content_topic": "normalized_topic",
+    "idx_content_status": "review_status",
+    "idx_content_refined": "was_refined",
+    "idx_content_created": "created_at",
+}
+
+
+@dataclass
+class ContentSummary:
+    """Indexed fields of one stored result."""
+    id: int
+    created_at: float
+    grade: int
+    topic: str
+    review_status: str
+    was_refined: bool
+    refinement_mode: Optional[str] = None
+
+
+@dataclass
+class ContentFilter:
+    """Listing filters; None means no constraint."""
+    grade: Optional[int] = None
+    topic: Optional[str] = None
+    review_status: Optional[str] = None
+    was_refined: Optional[bool] = None
+    created_after: Optional[float] = None
+    created_before: Optional[float] = None
+
+    def clauses(self) -> tuple[list[str], list]:
+        """SQL conditions and parameters for these filters."""
+        clauses, params = [], []
+        if self.grade is not None:
+            clauses.append("grade = ?")
+            params.append(self.grade)
+        if self.topic is not None:
+            clauses.append("normalized_topic = ?")
+            params.append(normalize_topic(self.topic))
+        if self.review_status is not None:
+            clauses.append("review_status = ?")
+            params.append(self.review_status)
+        if self.was_refined is not None:
+            clauses.append("was_refined = ?")
+            params.append(int(self.was_refined))
+        # Unary + keeps SQLite from scanning the created_at index here; the
+        # store turns the range into ID bounds instead (see _where)
+        if self.created_after is not None:
+            clauses.append("+created_at >= ?")
+            params.append(self.created_after)
+        if self.created_before is not None:
+            clauses.append("+created_at < ?")
+            params.append(self.created_before)
+        return clauses, params
+
+
+def record_payload(result) -> dict:
+    """The stored form of a PipelineResult: everything but the trace and cache flag."""
+    return result.model_dump(exclude={"trace", "cached", "content_id"})
+
+
+class SQLiteContentStore:
+    """Stores pipeline results in an indexed SQLite table."""
+
+    def __init__(self, path: str = "content.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL with synchronous=NORMAL only syncs at checkpoints, which keeps single inserts cheap
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS content ("
+            " id INTEGER PRIMARY KEY,"
+            " created_at REAL NOT NULL,"
+            " grade INTEGER NOT NULL,"
+            " topic TEXT NOT NULL,"
+            " normalized_topic TEXT NOT NULL,"
+            " review_status TEXT NOT NULL,"
+            " was_refined INTEGER NOT NULL,"
+            " refinement_mode TEXT,"
+            " payload TEXT NOT NULL)"
+        )
+        for name, column in _INDEXES.items():
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON content ({column})")
+        self._conn.commit()
+        self.inserts = 0
+
+    @staticmethod
+    def _row(payload: dict, created_at: float) -> tuple:
+        return (
+            created_at,
+            payload["grade"],
+            payload["topic"],
+            normalize_topic(payload["topic"]),
+            payload["review_result"]["status"],
+            int(payload["was_refined"]),
+            payload.get("refinement_mode"),
+            json.dumps(payload, separators=(",", ":")),
+        )
+
+    def add(self, payload: dict, created_at: Optional[float] = None) -> int:
+        """Store one result payload (see record_payload) and return its ID."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO content (created_at, grade, topic, normalized_topic, review_status,"
+                " was_refined, refinement_mode, payload) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                self._row(payload, created_at if created_at is not None else time.time()),
+            )
+            self._conn.commit()
+            self.inserts += 1
+            return cursor.lastrowid
+
+    def add_many(self, payloads: list[dict], created_at: Optional[float] = None) -> None:
+        """Store many results in one transaction."""
+        now = created_at if created_at is not None else time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO content (created_at, grade, topic, normalized_topic, review_status,"
+                " was_refined, refinement_mode, payload) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [self._row(payload, now) for payload in payloads],
+            )
+            self._conn.commit()
+            self.inserts += len(payloads)
+
+    def get(self, content_id: int) -> Optional[tuple[ContentSummary, dict]]:
+        """Return a record's summary and full result payload, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_SUMMARY_COLUMNS}, payload FROM content WHERE id = ?", (content_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return self._summary(row), json.loads(row[-1])
+
+    @staticmethod
+    def _summary(row: tuple) -> ContentSummary:
+        return ContentSummary(
+            id=row[0],
+            created_at=row[1],
+            grade=row[2],
+            topic=row[3],
+            review_status=row[4],
+            was_refined=bool(row[5]),
+            refinement_mode=row[6],
+        )
+
+    def _first_id(self, created_at: float) -> Optional[int]:
+        row = self._conn.execute(
+            "SELECT id FROM content WHERE created_at >= ? ORDER BY created_at LIMIT 1", (created_at,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _where(self, filters: ContentFilter, cursor: Optional[int]) -> tuple[str, list]:
+        """
+        WHERE clause for `filters` and a keyset cursor.
+
+        IDs are assigned in creation order, so a created_at range is also an
+        ID range: its bounds are looked up on the created_at index and the
+        page is read from the primary key instead of sorting the whole range.
+        """
+        clauses, params = filters.clauses()
+        if filters.created_after is not None:
+            first = self._first_id(filters.created_after)
+            clauses.append("id >= ?")
+            # Nothing was created after the bound: no ID qualifies
+            params.append(first if first is not None else 2**63 - 1)
+        if filters.created_before is not None:
+            end = self._first_id(filters.created_before)
+            if end is not None:
+                clauses.append("id < ?")
+                params.append(end)
+        if cursor is not None:
+            clauses.append("id < ?")
+            params.append(cursor)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def list(
+        self, filters: ContentFilter, limit: int = 50, cursor: Optional[int] = None
+    ) -> tuple[list[ContentSummary], Optional[int]]:
+        """
+        Return up to `limit` summaries, newest first, and the cursor of the next page.
+
+        The next cursor is None on the last page.
+        """
+        with self._lock:
+            where, params = self._where(filters, cursor)
+            rows = self._conn.execute(
+                f"SELECT {_SUMMARY_COLUMNS} FROM content{where} ORDER BY id DESC LIMIT ?",
+                params + [limit + 1],
+            ).fetchall()
+        items = [self._summary(row) for row in rows[:limit]]
+        return items, items[-1].id if len(rows) > limit else None
+
+    def export(self, filters: ContentFilter, batch_size: int = 1000) -> Iterator[tuple[ContentSummary, dict]]:
+        """Yield every matching record with its payload, newest first, a keyset page at a time."""
+        cursor = None
+        while True:
+            with self._lock:
+                where, params = self._where(filters, cursor)
+                rows = self._conn.execute(
+                    f"SELECT {_SUMMARY_COLUMNS}, payload FROM content{where} ORDER BY id DESC LIMIT ?",
+                    params + [batch_size],
+                ).fetchall()
+            for row in rows:
+                yield self._summary(row), json.loads(row[-1])
+            if len(rows) < batch_size:
+                return
+            cursor = rows[-1][0]
+
+    def __len__(self) -> int:
+        # Rows are never deleted, so the largest ID is the count without a table scan
+        with self._lock:
+            return self._conn.execute("SELECT MAX(id) FROM content").fetchone()[0] or 0
+
+    def get_stats(self) -> dict:
+        return {"path": self.path, "records": len(self), "inserts": self.inserts}
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def create_content_store() -> Optional[SQLiteContentStore]:
+    """Build the content store configured by CONTENT_STORE, or None if disabled."""
+    if CONTENT_STORE == "none":
+        return None
+    if CONTENT_STORE == "sqlite":
+        return SQLiteContentStore(CONTENT_DB_PATH)
+    raise ValueError(f"Unknown CONTENT_STORE: {CONTENT_STORE!r}")
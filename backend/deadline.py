@@ -0,0 +1,73 @@
+"""
+Deadline Module - Per-request time budgets for LLM calls
+
+A request's time budget is opened once with deadline_scope() around the
+pipeline run. The completion functions in config.py give every LLM call
+made inside it the remaining budget as its timeout (retries and
+rate-limiter waits included), and the pipeline checks remaining() before
+optional work such as refinement. The deadline lives in a context variable,
+so it follows asyncio tasks; a nested scope can only shorten it.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Iterator, Optional
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's time budget ran out before its work finished."""
+
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[None]:
+    """Give the work inside the block at most `seconds` (None keeps any enclosing deadline)."""
+    deadline = _deadline.get()
+    if seconds is not None:
+        own = time.monotonic() + seconds
+        deadline = own if deadline is None else min(deadline, own)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current deadline, or None without one."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def check(what: str = "call") -> Optional[float]:
+    """
+    Return the seconds left before starting `what`.
+
+    Raises:
+        DeadlineExceeded: If the budget is already spent
+    """
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(f"Request deadline passed before the {what}")
+    return left
+
+
+@asynccontextmanager
+async def enforce(what: str = "call") -> AsyncIterator[None]:
+    """Cancel the block when the deadline passes and raise DeadlineExceeded instead."""
+    left = check(what)
+    if left is None:
+        yield
+        return
+    scope = asyncio.timeout(left)
+    try:
+        async with scope:
+            yield
+    except TimeoutError:
+        if not scope.expired():
+            raise
+        raise DeadlineExceeded(f"Request deadline passed during the {what}") from None
@@ -0,0 +1,243 @@
+"""
+Hedging Module - Duplicate slow LLM calls to cut tail latency
+
+A few LLM calls take several times the median and dominate the p99 of a
+pipeline run. HedgedProvider wraps the process-wide provider: when an async
+completion has not returned after the `percentile` of recent call
+latencies, it sends a duplicate (to the same provider, or to a separate
+hedge backend or model), returns the first usable reply and cancels the
+other attempt.
+
+- The hedge delay is learned per call profile (model and max_tokens) from
+  a sliding window of latencies; calls are not hedged until `min_samples`
+  of them have been seen.
+- A budget caps duplicates at `budget` extra calls per call: every call
+  earns `budget` of credit and a hedge spends one, so hedging can never
+  more than add that fraction to the load, even when the backend is slow
+  across the board.
+- The first usable reply wins: a non-empty one that, for a JSON mode call,
+  contains a JSON object. A failed attempt, or one whose reply is unusable,
+  does not end the call while the other is still running; when neither is
+  usable, a reply that came back is still returned for the agent's own
+  parsing and repair. Full schema validation stays with the agents.
+
+Only acomplete() is hedged. complete() cannot cancel a blocking call and a
+stream has already sent text by the time it would be hedged, so both pass
+straight through.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import AsyncIterator, Optional
+
+from metrics import registry
+from providers import Completion, LLMProvider
+from structured import extract_object
+
+registry.describe("llm_hedges_total", "counter", "Duplicate LLM calls sent by hedging, by the attempt that answered first.")
+
+
+class LatencyWindow:
+    """The most recent call latencies of one call profile."""
+
+    def __init__(self, size: int = 512):
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, p: float) -> float:
+        """Nearest-rank percentile of the window (0 < p < 100)."""
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+class HedgeBudget:
+    """
+    Credit for hedges: each call earns `ratio`, each hedge spends 1.
+
+    Credit starts at zero and is capped at `burst`, so hedges never exceed
+    `ratio` times the calls made and a quiet period cannot save up for a
+    storm of duplicates later.
+    """
+
+    def __init__(self, ratio: float, burst: float = 10.0):
+        self.ratio = ratio
+        self.burst = burst
+        self._credit = 0.0
+
+    def earn(self) -> None:
+        self._credit = min(self.burst, self._credit + self.ratio)
+
+    def spend(self) -> bool:
+        if self._credit < 1.0:
+            return False
+        self._credit -= 1.0
+        return True
+
+
+class HedgedProvider(LLMProvider):
+    """
+    Provider wrapper that hedges slow async completions.
+
+    Runs on one event loop and needs no locks. Hedges go to `hedge_provider`
+    (default: the wrapped provider) with `hedge_model` (default: the call's
+    model). Latencies are recorded for successful attempts; a primary
+    cancelled because its hedge won is recorded with the time it had run,
+    a lower bound that keeps the slow tail in the window.
+    """
+
+    def __init__(
+        self,
+        provider: LLMProvider,
+        percentile: float = 95.0,
+        budget: float = 0.1,
+        hedge_provider: Optional[LLMProvider] = None,
+        hedge_model: Optional[str] = None,
+        min_samples: int = 20,
+        window: int = 512,
+    ):
+        super().__init__()
+        self.provider = provider
+        self.name = provider.name
+        self.hedge_provider = hedge_provider or provider
+        self.hedge_model = hedge_model
+        self.percentile = percentile
+        self.budget = HedgeBudget(budget)
+        self.min_samples = min_samples
+        self.window = window
+        self._windows: dict[tuple[str, int], LatencyWindow] = {}
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.over_budget = 0
+        self.unusable = 0
+
+    def _window(self, model: str, max_tokens: int) -> LatencyWindow:
+        key = (model, max_tokens)
+        if key not in self._windows:
+            self._windows[key] = LatencyWindow(self.window)
+        return self._windows[key]
+
+    def hedge_delay(self, model: str, max_tokens: int) -> Optional[float]:
+        """Seconds after which a call of this profile is hedged, or None while there are too few samples."""
+        window = self._window(model, max_tokens)
+        return window.percentile(self.percentile) if len(window) >= self.min_samples else None
+
+    @staticmethod
+    def usable(completion: Completion, json_mode: bool) -> bool:
+        """Whether a reply may win the race: non-empty and, in JSON mode, holding a JSON object."""
+        text = completion.text.strip()
+        return bool(text) and (not json_mode or extract_object(text) is not None)
+
+    def _record_winner(self, task: asyncio.Future, primary: asyncio.Future, hedged: bool) -> None:
+        if hedged:
+            winner = "primary" if task is primary else "hedge"
+            self.hedge_wins += winner == "hedge"
+            registry.inc("llm_hedges_total", winner=winner)
+
+    def complete(self, messages: list[dict], model: str, temperature: float, max_tokens: int, json_mode: bool = False) -> Completion:
+        return self.provider.complete(messages, model, temperature, max_tokens, json_mode=json_mode)
+
+    async def acomplete(self, messages: list[dict], model: str, temperature: float, max_tokens: int, json_mode: bool = False) -> Completion:
+        self.calls += 1
+        self.budget.earn()
+        window = self._window(model, max_tokens)
+        delay = self.hedge_delay(model, max_tokens)
+        began = time.perf_counter()
+        primary = asyncio.ensure_future(self.provider.acomplete(messages, model, temperature, max_tokens, json_mode=json_mode))
+        started = {primary: began}
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if not done:
+                if self.budget.spend():
+                    self.hedges += 1
+                    hedge = asyncio.ensure_future(self.hedge_provider.acomplete(
+                        messages, self.hedge_model or model, temperature, max_tokens, json_mode=json_mode
+                    ))
+                    started[hedge] = time.perf_counter()
+                else:
+                    self.over_budget += 1
+
+            hedged = len(started) > 1
+            pending, last_error, fallback = set(started), None, None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.cancelled():
+                        # Cancelled from below, not by us: it will never answer
+                        last_error = asyncio.CancelledError()
+                        continue
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        continue
+                    window.record(time.perf_counter() - started[task])
+                    if not self.usable(task.result(), json_mode):
+                        self.unusable += 1
+                        fallback = fallback or task
+                        continue
+                    self._record_winner(task, primary, hedged)
+                    return task.result()
+            if fallback is not None:
+                self._record_winner(fallback, primary, hedged)
+                return fallback.result()
+            if hedged:
+                registry.inc("llm_hedges_total", winner="none")
+            self.errors += 1
+            raise last_error
+        finally:
+            for task in started:
+                if task.done():
+                    # Mark a losing attempt's error as retrieved so asyncio does not log it
+                    task.cancelled() or task.exception()
+                    continue
+                task.cancel()
+                if task is primary:
+                    window.record(time.perf_counter() - began)
+
+    async def astream(self, messages: list[dict], model: str, temperature: float, max_tokens: int, json_mode: bool = False) -> AsyncIterator[str]:
+        async for delta in self.provider.astream(messages, model, temperature, max_tokens, json_mode=json_mode):
+            yield delta
+
+    def get_stats(self) -> dict:
+        stats = {
+            **self.provider.get_stats(),
+            "hedging": {
+                "percentile": self.percentile,
+                "budget": self.budget.ratio,
+                "calls": self.calls,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "over_budget": self.over_budget,
+                "unusable": self.unusable,
+                "failed": self.errors,
+                "hedge_ratio": self.hedges / self.calls if self.calls else 0.0,
+                "delays_ms": {
+                    f"{model}/{max_tokens}": 1000 * delay
+                    for model, max_tokens in self._windows
+                    if (delay := self.hedge_delay(model, max_tokens)) is not None
+                },
+            },
+        }
+        if self.hedge_provider is not self.provider:
+            stats["hedge_backend"] = self.hedge_provider.get_stats()
+        return stats
+
+    def _providers(self) -> list[LLMProvider]:
+        return [self.provider] if self.hedge_provider is self.provider else [self.provider, self.hedge_provider]
+
+    def warm_up(self) -> None:
+        for provider in self._providers():
+            provider.warm_up()
+
+    def close(self) -> None:
+        for provider in self._providers():
+            provider.close()
+
+    async def aclose(self) -> None:
+        for provider in self._providers():
+            await provider.aclose()
@@ -0,0 +1,368 @@
+"""
+Job Queue Module - Asynchronous generation jobs with IDs
+
+A full pipeline run can take 30-60s, which is longer than many proxies allow
+a request to stay open. Jobs decouple submission from completion:
+
+    POST /jobs        -> job ID immediately (202)
+    GET /jobs/{id}    -> status and, once finished, the result
+    DELETE /jobs/{id} -> cancel a queued or running job
+
+Jobs are executed by an in-process worker pool fed from a bounded priority
+queue. Job state lives in a pluggable JobStore (in-memory or SQLite); with
+SQLite, queued and interrupted jobs are picked up again after a restart.
+The queue calls the store from a worker thread so SQLite I/O never blocks
+the event loop.
+"""
+
+import asyncio
+import itertools
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, replace
+from typing import Literal, Optional
+
+from config import JOB_DB_PATH, JOB_MAX_FINISHED, JOB_QUEUE_SIZE, JOB_RETENTION_SECONDS, JOB_STORE, JOB_WORKERS
+from pipeline import PipelineResult
+
+JobStatus = Literal["queued", "running", "succeeded", "failed", "cancelled"]
+
+UNFINISHED_STATUSES = ("queued", "running")
+
+
+@dataclass
+class Job:
+    """A single content generation job and its outcome."""
+    id: str
+    grade: int
+    topic: str
+    priority: int = 0
+    cache_control: str = "default"
+    deadline_seconds: Optional[float] = None
+    status: JobStatus = "queued"
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[PipelineResult] = None
+    error: Optional[str] = None
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue has no room for another job."""
+
+
+# ============================================================================
+# Job Stores
+# ============================================================================
+
+class JobStore(ABC):
+    """Persistence interface for jobs."""
+
+    @abstractmethod
+    def save(self, job: Job) -> None:
+        """Insert or update a job."""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return a job by ID, or None."""
+
+    @abstractmethod
+    def list_unfinished(self) -> list[Job]:
+        """Return queued and running jobs, oldest first."""
+
+
+class MemoryJobStore(JobStore):
+    """
+    Keeps jobs in a dict; state is lost on restart.
+
+    Finished jobs are dropped `retention_seconds` after they finish, and
+    beyond the newest `max_finished` of them, so memory stays bounded.
+    """
+
+    def __init__(self, max_finished: int = 1000, retention_seconds: float = 86400.0):
+        self.max_finished = max_finished
+        self.retention_seconds = retention_seconds
+        self._jobs: dict[str, Job] = {}
+        # Finished job IDs and when they finished, oldest first
+        self._finished: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self) -> None:
+        cutoff = time.time() - self.retention_seconds
+        while self._finished:
+            job_id, finished_at = next(iter(self._finished.items()))
+            if len(self._finished) <= self.max_finished and finished_at >= cutoff:
+                break
+            del self._finished[job_id]
+            self._jobs.pop(job_id, None)
+
+    def save(self, job: Job) -> None:
+        with self._lock:
+            self._jobs[job.id] = job
+            if job.status not in UNFINISHED_STATUSES:
+                self._finished[job.id] = job.finished_at or time.time()
+                self._finished.move_to_end(job.id)
+            self._evict()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._evict()
+            return self._jobs.get(job_id)
+
+    def list_unfinished(self) -> list[Job]:
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if job.status in UNFINISHED_STATUSES]
+        return sorted(jobs, key=lambda job: job.created_at)
+
+
+def _job_payload(job: Job) -> str:
+    """A job as JSON; the result is the only field that is not plain data."""
+    payload = asdict(replace(job, result=None))
+    payload["result"] = job.result.model_dump() if job.result is not None else None
+    return json.dumps(payload)
+
+
+def _job_from_payload(payload: str) -> Job:
+    data = json.loads(payload)
+    if data["result"] is not None:
+        data["result"] = PipelineResult.model_validate(data["result"])
+    return Job(**data)
+
+
+class SQLiteJobStore(JobStore):
+    """Stores jobs in SQLite so queued work survives a restart."""
+
+    def __init__(self, path: str = "jobs.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " payload TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+        self._conn.commit()
+
+    def save(self, job: Job) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, status, created_at, payload) VALUES (?, ?, ?, ?)",
+                (job.id, job.status, job.created_at, _job_payload(job)),
+            )
+            self._conn.commit()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job_from_payload(row[0]) if row else None
+
+    def list_unfinished(self) -> list[Job]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                UNFINISHED_STATUSES,
+            ).fetchall()
+        return [_job_from_payload(row[0]) for row in rows]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def create_job_store() -> JobStore:
+    """Build the job store configured by JOB_STORE."""
+    if JOB_STORE == "sqlite":
+        return SQLiteJobStore(JOB_DB_PATH)
+    if JOB_STORE == "memory":
+        return MemoryJobStore(JOB_MAX_FINISHED, JOB_RETENTION_SECONDS)
+    raise ValueError(f"Unknown JOB_STORE: {JOB_STORE!r}")
+
+
+# ============================================================================
+# Job Queue
+# ============================================================================
+
+class JobQueue:
+    """
+    Bounded priority queue of jobs drained by a pool of async workers.
+
+    Higher priority values run first; equal priorities run in submission
+    order. Call start() from the application lifespan and stop() on shutdown.
+
+    Store calls run in a worker thread. Status changes that read a job and
+    write it back (start, finish, cancel) hold `_transition`, so a cancel
+    cannot interleave with a worker picking up or finishing the same job.
+    """
+
+    def __init__(
+        self,
+        pipeline,
+        store: JobStore,
+        workers: int = JOB_WORKERS,
+        max_queued: int = JOB_QUEUE_SIZE,
+    ):
+        self.pipeline = pipeline
+        self.store = store
+        self.workers = workers
+        self.max_queued = max_queued
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._sequence = itertools.count()
+        self._running: dict[str, asyncio.Task] = {}
+        self._workers: list[asyncio.Task] = []
+        self._transition = asyncio.Lock()
+        # Jobs being saved by submit() but not yet queued, counted against max_queued
+        self._submitting = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    async def start(self) -> None:
+        """Re-enqueue unfinished jobs from the store and start the workers."""
+        for job in await asyncio.to_thread(self.store.list_unfinished):
+            if job.status == "running":
+                job.status = "queued"
+                job.started_at = None
+                await self._save(job)
+            self._enqueue(job)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Stop the workers; interrupted jobs stay 'running' and resume on restart."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def _enqueue(self, job: Job) -> None:
+        self._queue.put_nowait((-job.priority, next(self._sequence), job.id))
+
+    async def _save(self, job: Job) -> None:
+        await asyncio.to_thread(self.store.save, job)
+
+    async def _load(self, job_id: str) -> Optional[Job]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def submit(
+        self,
+        grade: int,
+        topic: str,
+        priority: int = 0,
+        cache_control: str = "default",
+        deadline_seconds: Optional[float] = None,
+    ) -> Job:
+        """
+        Queue a new job; raises QueueFullError if the queue is at capacity.
+
+        `deadline_seconds` bounds the pipeline run once the job starts.
+        """
+        if self._queue.qsize() + self._submitting >= self.max_queued:
+            raise QueueFullError(f"Job queue is full ({self.max_queued} jobs waiting)")
+        job = Job(
+            id=uuid.uuid4().hex,
+            grade=grade,
+            topic=topic,
+            priority=priority,
+            cache_control=cache_control,
+            deadline_seconds=deadline_seconds,
+            created_at=time.time(),
+        )
+        self._submitting += 1
+        try:
+            await self._save(job)
+        finally:
+            self._submitting -= 1
+        self._enqueue(job)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        """Return a job by ID."""
+        return await self._load(job_id)
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued or running job; finished jobs are returned unchanged."""
+        async with self._transition:
+            job = await self._load(job_id)
+            if job is None or job.status not in UNFINISHED_STATUSES:
+                return job
+            job.status = "cancelled"
+            job.finished_at = time.time()
+            await self._save(job)
+            # Cancelled only once the status is stored, which is what the worker checks
+            task = self._running.get(job_id)
+            if task is not None:
+                task.cancel()
+        self.cancelled += 1
+        return job
+
+    async def _was_cancelled(self, job_id: str) -> bool:
+        job = await self._load(job_id)
+        return job is not None and job.status == "cancelled"
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, job_id = await self._queue.get()
+            async with self._transition:
+                job = await self._load(job_id)
+                if job is None or job.status != "queued":
+                    continue  # Cancelled while waiting in the queue
+                job.status = "running"
+                job.started_at = time.time()
+                await self._save(job)
+
+            task = asyncio.create_task(
+                self.pipeline.arun(
+                    job.grade, job.topic, cache_control=job.cache_control, deadline_seconds=job.deadline_seconds
+                )
+            )
+            self._running[job_id] = task
+            try:
+                result = await task
+            except asyncio.CancelledError:
+                if not await self._was_cancelled(job_id):
+                    # The worker itself is shutting down: do not leave the run behind
+                    task.cancel()
+                    raise
+                continue  # cancel() already recorded the job as cancelled
+            except Exception as e:
+                result, error = None, str(e)
+            else:
+                error = None
+            finally:
+                self._running.pop(job_id, None)
+
+            async with self._transition:
+                # cancel() may have come after the run finished but before this worker resumed
+                if await self._was_cancelled(job_id):
+                    continue
+                if error is None:
+                    job.status = "succeeded"
+                    job.result = result
+                    self.completed += 1
+                else:
+                    job.status = "failed"
+                    job.error = error
+                    self.failed += 1
+                job.finished_at = time.time()
+                await self._save(job)
+
+    def get_stats(self) -> dict:
+        """Return queue depth and outcome counters for monitoring."""
+        return {
+            "queued": self._queue.qsize(),
+            "running": len(self._running),
+            "workers": self.workers,
+            "max_queued": self.max_queued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+        }
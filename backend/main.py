@@ -3,26 +3,110 @@ FastAPI Server - REST API for Educational Content Generation
 
 Endpoints:
 - POST /generate - Generate educational content with full pipeline
-- GET /health - Health check
+- POST /generate/batch - Generate content for many (grade, topic) pairs
+- POST /generate/stream - Server-Sent Events as each pipeline stage finishes
+- POST /jobs - Queue a generation job and return its ID immediately
+- GET /jobs/{job_id} - Job status and result
+- DELETE /jobs/{job_id} - Cancel a queued or running job
+- GET /content - List stored results (filtered, keyset-paginated)
+- GET /content/export - Stream every matching stored result as NDJSON
+- GET /content/{content_id} - One stored result
+- GET /health - Liveness check
+- GET /ready - Readiness: 200 once warm-up has finished, 503 before
+- GET /stats - Runtime statistics (LLM backends, cache, request coalescing)
+- GET /metrics - Prometheus metrics
 """
 
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+
+import asyncio
+import json
+import threading
+import time
+
+from fastapi import Depends, FastAPI, HTTPException, Query, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Optional
-import uvicorn
+from pydantic_core import to_json
+from typing import Callable, Optional
 
-from pipeline import EducationalContentPipeline
+from admission import AdmissionController, OverloadedError
+from cache import CacheControl, create_result_cache
+from config import (
+    ADMISSION_MAX_CONCURRENCY,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_MAX_WAIT_SECONDS,
+    BATCH_MAX_CONCURRENCY,
+    BATCH_MAX_ITEMS,
+    LLM_BACKENDS,
+    LLM_HEALTH_CHECK_INTERVAL,
+    PIPELINE_MODE,
+    REQUEST_DEADLINE_SECONDS,
+    aclose_provider,
+    get_provider,
+    get_router,
+    validate_config,
+)
+from content_store import ContentFilter, ContentSummary, create_content_store
+from deadline import DeadlineExceeded
+from jobs import Job, JobQueue, JobStatus, QueueFullError, create_job_store
+from metrics import registry
+from pipeline import BatchItemResult, EducationalContentPipeline, PipelineResult
+from prompts import prompt_registry
+from providers import RateLimitError
 
 
 # ============================================================================
 # FastAPI Application
 # ============================================================================
 
+# Warm-up state reported by /ready
+startup = {"ready": False, "warmup_seconds": None, "error": None}
+
+
+async def warm_up() -> None:
+    """Build the LLM provider and its client pool and compile the prompt templates."""
+    began = time.perf_counter()
+    try:
+        # Provider construction and the SDK import block, so they run off the event loop
+        await asyncio.to_thread(lambda: get_provider().warm_up())
+        prompt_registry.compile()
+    except Exception as e:
+        startup["error"] = f"{type(e).__name__}: {e}"
+        return
+    startup["warmup_seconds"] = time.perf_counter() - began
+    startup["ready"] = True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Validate the configuration, start the job workers, health checks and
+    warm-up; stop them and release the LLM provider on shutdown.
+
+    /health answers while warm-up runs in the background; /ready turns 200
+    when it is done.
+    """
+    validate_config()
+    await get_job_queue().start()
+    router = get_router() if LLM_BACKENDS else None
+    health_checks = asyncio.create_task(router.run_health_checks(LLM_HEALTH_CHECK_INTERVAL)) if router else None
+    warming = asyncio.create_task(warm_up())
+    yield
+    warming.cancel()
+    if health_checks is not None:
+        health_checks.cancel()
+    await get_job_queue().stop()
+    await aclose_provider()
+
+
 app = FastAPI(
     title="Educational Content Generator API",
     description="AI-powered educational content generation with automatic review and refinement",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -33,43 +117,216 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-pipeline = EducationalContentPipeline()
+admission = AdmissionController(ADMISSION_MAX_CONCURRENCY, ADMISSION_MAX_QUEUE, ADMISSION_MAX_WAIT_SECONDS)
+
+# The pipeline (with its result cache and content store) and the job queue open
+# databases, so they are built at startup, or on first use when the lifespan
+# does not run (in-process benchmarks), never at import
+_pipeline: Optional[EducationalContentPipeline] = None
+_job_queue: Optional[JobQueue] = None
+_services_lock = threading.Lock()
+
+
+def get_pipeline() -> EducationalContentPipeline:
+    """Return the process-wide pipeline, building it and its stores on first use."""
+    global _pipeline
+    if _pipeline is None:
+        with _services_lock:
+            if _pipeline is None:
+                _pipeline = EducationalContentPipeline(
+                    cache=create_result_cache(),
+                    speculative=PIPELINE_MODE == "speculative",
+                    store=create_content_store(),
+                )
+    return _pipeline
+
+
+def get_job_queue() -> JobQueue:
+    """Return the process-wide job queue, building it and its store on first use."""
+    global _job_queue
+    pipeline = get_pipeline()
+    if _job_queue is None:
+        with _services_lock:
+            if _job_queue is None:
+                _job_queue = JobQueue(pipeline, create_job_store())
+    return _job_queue
 
 
 # ============================================================================
 # Request/Response Models
 # ============================================================================
 
+class ModelResponse(JSONResponse):
+    """
+    JSON response written straight from a pydantic model by pydantic-core.
+
+    Returning a model from an endpoint makes FastAPI validate it against the
+    response_model, dump it to a dict and encode that with json.dumps. Our
+    results are validated once, when the agent's reply is parsed, so routes
+    return ModelResponse(model) instead: one serialization pass in Rust,
+    no re-validation. response_model stays on the route for the docs.
+    """
+
+    def render(self, content) -> bytes:
+        return to_json(content)
+
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse holding an admission slot until the response ends.
+
+    `release` runs once the response is over, however it ended: finished,
+    failed, or the client left before the body was ever iterated (an
+    unstarted generator never runs its own finally block).
+    """
+
+    def __init__(self, content, release: Callable[[], None], **kwargs):
+        super().__init__(content, **kwargs)
+        self.release = release
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.release()
+
+
 class GenerateRequest(BaseModel):
     """Request body for content generation."""
     grade: int = Field(..., ge=1, le=12, description="Student grade level (1-12)")
     topic: str = Field(..., min_length=1, description="Educational topic")
+    cache_control: CacheControl = Field(
+        "default",
+        description="'no-cache' forces a fresh run (result is still stored), 'no-store' bypasses the cache",
+    )
+    include_trace: bool = Field(
+        False,
+        description="Include per-stage token usage and the timing span tree in the response",
+    )
+    deadline_seconds: Optional[float] = Field(
+        None,
+        gt=0,
+        le=600,
+        description="Time budget for the run (default REQUEST_DEADLINE_SECONDS; jobs have none by default). "
+        "Refinement is skipped or cut short to meet it and the result is marked `degraded`",
+    )
+
 
+# The pipeline's own result model is the response: it is served as built,
+# with token usage and trace cleared unless requested (PipelineResult.public)
+GenerateResponse = PipelineResult
 
-class MCQResponse(BaseModel):
-    question: str
-    options: list[str]
-    answer: str
 
+class BatchGenerateRequest(BaseModel):
+    """Request body for batch content generation."""
+    items: list[GenerateRequest] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+    concurrency: int = Field(4, ge=1, le=BATCH_MAX_CONCURRENCY, description="Max items processed at once")
+    stream: bool = Field(False, description="Stream NDJSON results as they complete instead of waiting for all")
 
-class GeneratorOutputResponse(BaseModel):
-    explanation: str
-    mcqs: list[MCQResponse]
 
+class BatchGenerateResponse(BaseModel):
+    """Complete response from a batch run, in request order."""
+    results: list[BatchItemResult]
+    succeeded: int
+    failed: int
 
-class ReviewResultResponse(BaseModel):
-    status: str
-    feedback: list[str]
+
+class JobRequest(GenerateRequest):
+    """Request body for queueing a generation job."""
+    priority: int = Field(0, ge=-10, le=10, description="Higher priority jobs run first")
+
+
+class JobResponse(BaseModel):
+    """Status of a generation job; `result` is set once it has succeeded."""
+    id: str
+    status: JobStatus
+    grade: int
+    topic: str
+    priority: int
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[GenerateResponse] = None
+    error: Optional[str] = None
 
 
-class GenerateResponse(BaseModel):
-    """Complete response from the generation pipeline."""
+class ContentSummaryResponse(BaseModel):
+    """Indexed fields of one stored result."""
+    id: int
+    created_at: float
     grade: int
     topic: str
-    initial_content: GeneratorOutputResponse
-    review_result: ReviewResultResponse
-    refined_content: Optional[GeneratorOutputResponse] = None
+    review_status: str
     was_refined: bool
+    refinement_mode: Optional[str] = None
+
+
+class ContentPageResponse(BaseModel):
+    """One page of stored results, newest first."""
+    items: list[ContentSummaryResponse]
+    next_cursor: Optional[int] = Field(None, description="Pass as `cursor` for the next page; null on the last page")
+
+
+class ContentResponse(ContentSummaryResponse):
+    """A stored result with its full content."""
+    result: GenerateResponse
+
+
+def content_filter(
+    grade: Optional[int] = Query(None, ge=1, le=12),
+    topic: Optional[str] = Query(None, description="Exact topic, compared after normalization"),
+    review_status: Optional[str] = Query(None, pattern="^(pass|fail)$"),
+    was_refined: Optional[bool] = None,
+    created_after: Optional[float] = Query(None, description="Unix time, inclusive"),
+    created_before: Optional[float] = Query(None, description="Unix time, exclusive"),
+) -> ContentFilter:
+    """Query parameters shared by content listing and export."""
+    return ContentFilter(grade, topic, review_status, was_refined, created_after, created_before)
+
+
+def to_content_response(summary: ContentSummary, payload: dict) -> ContentResponse:
+    """Convert a stored record into the API response model."""
+    return ContentResponse(
+        **asdict(summary),
+        result=PipelineResult.model_validate({**payload, "content_id": summary.id}),
+    )
+
+
+def require_content_store():
+    """Return the content store, or 404 when CONTENT_STORE=none."""
+    store = get_pipeline().store
+    if store is None:
+        raise HTTPException(status_code=404, detail="Content store is disabled (CONTENT_STORE=none)")
+    return store
+
+
+def to_job_response(job: Job) -> JobResponse:
+    """Convert a job into the API response model."""
+    return JobResponse(
+        id=job.id,
+        status=job.status,
+        grade=job.grade,
+        topic=job.topic,
+        priority=job.priority,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        result=job.result.public() if job.result is not None else None,
+        error=job.error,
+    )
+
+
+def request_deadline(request: GenerateRequest, waited: float = 0.0) -> Optional[float]:
+    """The run's time budget: the request's own or the default, less the time it waited for admission."""
+    budget = request.deadline_seconds or REQUEST_DEADLINE_SECONDS
+    return max(0.0, budget - waited) if budget else None
+
+
+def to_batch_item_response(item: BatchItemResult) -> BatchItemResult:
+    """A batch item as the API returns it (results without token usage and trace)."""
+    if item.result is None:
+        return item
+    return item.model_copy(update={"result": item.result.public()})
 
 
 # ============================================================================
@@ -88,30 +345,266 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
+    """Liveness check: the process is up, possibly still warming up."""
     return {"status": "healthy"}
 
 
+@app.get("/ready")
+async def ready():
+    """Readiness check: 503 until warm-up has finished (or if it failed)."""
+    if not startup["ready"]:
+        status_text = "failed" if startup["error"] else "warming_up"
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={"status": status_text, "error": startup["error"]},
+            headers={"Retry-After": "1"},
+        )
+    return {"status": "ready", "warmup_seconds": startup["warmup_seconds"]}
+
+
+@app.get("/stats")
+async def stats():
+    """Runtime statistics for sizing the service."""
+    pipeline = get_pipeline()
+    return {
+        "llm": get_provider().get_stats(),
+        "models": {"generator": asdict(pipeline.generator.profile), "reviewer": asdict(pipeline.reviewer.profile)},
+        "cache": pipeline.cache.get_stats() if pipeline.cache else None,
+        "singleflight": pipeline.singleflight.get_stats(),
+        "speculation": pipeline.speculation_stats if pipeline.speculative else None,
+        "refinement": pipeline.refinement_stats,
+        "deadline": pipeline.deadline_stats,
+        "output_repair": pipeline.generator.get_output_stats(),
+        "prompts": prompt_registry.get_stats(),
+        "jobs": get_job_queue().get_stats(),
+        "content_store": pipeline.store.get_stats() if pipeline.store else None,
+        "admission": admission.get_stats(),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: span timings and tokens plus gauges from /stats."""
+    pipeline = get_pipeline()
+    llm_stats = get_provider().get_stats()
+    gauges = {
+        "llm": llm_stats,
+        "llm_pool": llm_stats.get("pool"),
+        "rate_limiter": llm_stats.get("rate_limiter"),
+        "llm_hedging": llm_stats.get("hedging"),
+        "cache": pipeline.cache.get_stats() if pipeline.cache else None,
+        "singleflight": pipeline.singleflight.get_stats(),
+        "speculation": pipeline.speculation_stats if pipeline.speculative else None,
+        "refinement": pipeline.refinement_stats,
+        "deadline": pipeline.deadline_stats,
+        "output_repair": pipeline.generator.get_output_stats(),
+        "jobs": get_job_queue().get_stats(),
+        "admission": admission.get_stats(),
+    }
+    return PlainTextResponse(registry.render(gauges), media_type="text/plain; version=0.0.4")
+
+
+def overloaded(e: OverloadedError) -> HTTPException:
+    """The 503 for a request shed by admission control."""
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(max(1, round(e.retry_after)))})
+
+
 @app.post("/generate", response_model=GenerateResponse)
 async def generate_content(request: GenerateRequest):
-    """Generate educational content for a given grade and topic."""
+    """
+    Generate educational content for a given grade and topic.
+    
+    Cached results are served without taking a pipeline slot. Returns 503
+    with Retry-After when admission control sheds the request, and 504 when
+    its deadline passes before the content has been reviewed.
+    """
+    pipeline = get_pipeline()
+    cached = pipeline.cached_result(request.grade, request.topic, request.cache_control)
+    if cached is not None:
+        # Not admitted: a near-zero run time would skew the queue-wait estimate used for shedding
+        return ModelResponse(cached.public(request.include_trace))
+    
     try:
-        result = pipeline.run(grade=request.grade, topic=request.topic)
+        async with admission.admit() as waited:
+            result = await pipeline.arun(
+                grade=request.grade,
+                topic=request.topic,
+                cache_control=request.cache_control,
+                deadline_seconds=request_deadline(request, waited),
+            )
         
-        return GenerateResponse(
-            grade=result.grade,
-            topic=result.topic,
-            initial_content=GeneratorOutputResponse(**result.initial_content),
-            review_result=ReviewResultResponse(**result.review_result),
-            refined_content=GeneratorOutputResponse(**result.refined_content) if result.refined_content else None,
-            was_refined=result.was_refined
-        )
+        return ModelResponse(result.public(request.include_trace))
+    except OverloadedError as e:
+        raise overloaded(e)
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except RateLimitError as e:
+        # Still rate limited after the provider's retries: tell the client when to come back
+        retry_after = max(1, round(e.retry_after or 30))
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(retry_after)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def format_sse(event: str, data: str) -> str:
+    """Format one Server-Sent Event frame."""
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+@app.post("/generate/stream")
+async def generate_stream(request: GenerateRequest):
+    """
+    Stream pipeline progress as Server-Sent Events.
+    
+    Emits `token` events with explanation text as the LLM produces it, then
+    `generated`, `reviewed` and (if needed) `refined` as each agent finishes,
+    and finally `result` with the full GenerateResponse. Failures are
+    reported as an `error` event since the HTTP status is already sent;
+    a request shed by admission control gets a 503 before the stream starts.
+    Cached results are streamed without taking a pipeline slot.
+    """
+    pipeline = get_pipeline()
+    admitted = pipeline.cached_result(request.grade, request.topic, request.cache_control) is None
+    waited = 0.0
+    if admitted:
+        try:
+            waited = await admission.acquire()
+        except OverloadedError as e:
+            raise overloaded(e)
+    began = time.monotonic()
+    
+    async def events():
+        try:
+            async for event, data in pipeline.astream(
+                grade=request.grade,
+                topic=request.topic,
+                cache_control=request.cache_control,
+                deadline_seconds=request_deadline(request, waited),
+            ):
+                if event == "result":
+                    payload = data.public(request.include_trace).model_dump_json()
+                elif isinstance(data, BaseModel):
+                    payload = data.model_dump_json()
+                else:
+                    payload = json.dumps(data)
+                yield format_sse(event, payload)
+        except Exception as e:
+            yield format_sse("error", json.dumps({"detail": str(e)}))
+    
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if not admitted:
+        return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
+    return AdmittedStreamingResponse(
+        events(),
+        release=lambda: admission.release(time.monotonic() - began),
+        media_type="text/event-stream",
+        headers=headers,
+    )
+
+
+@app.post("/generate/batch", response_model=BatchGenerateResponse)
+async def generate_batch(request: BatchGenerateRequest):
+    """
+    Generate content for many (grade, topic) pairs with bounded concurrency.
+    
+    Per-item failures are reported in the item's `error` field and never fail
+    the whole batch. With `stream=true` the response is NDJSON, one
+    BatchItemResult per line in completion order. Each item's deadline
+    counts from when that item starts.
+    """
+    items = [{**item.model_dump(), "deadline_seconds": request_deadline(item)} for item in request.items]
+    
+    if request.stream:
+        async def ndjson():
+            async for item in get_pipeline().astream_many(items, concurrency=request.concurrency):
+                yield to_batch_item_response(item).model_dump_json() + "\n"
+        
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+    
+    results = [to_batch_item_response(item) for item in await get_pipeline().arun_many(items, concurrency=request.concurrency)]
+    failed = sum(1 for item in results if item.error is not None)
+    return ModelResponse(BatchGenerateResponse(results=results, succeeded=len(results) - failed, failed=failed))
+
+
+@app.post("/jobs", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_job(request: JobRequest):
+    """Queue a generation job and return immediately; poll GET /jobs/{id} for the result."""
+    try:
+        job = await get_job_queue().submit(
+            grade=request.grade,
+            topic=request.topic,
+            priority=request.priority,
+            cache_control=request.cache_control,
+            deadline_seconds=request.deadline_seconds,
+        )
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    return ModelResponse(to_job_response(job), status_code=status.HTTP_202_ACCEPTED)
+
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """Return a job's status, and its result once it has succeeded."""
+    job = await get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return ModelResponse(to_job_response(job))
+
+
+@app.delete("/jobs/{job_id}", response_model=JobResponse)
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job."""
+    job = await get_job_queue().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return ModelResponse(to_job_response(job))
+
+
+@app.get("/content", response_model=ContentPageResponse)
+async def list_content(
+    filters: ContentFilter = Depends(content_filter),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[int] = Query(None, description="next_cursor of the previous page"),
+):
+    """List stored results newest first, one keyset page at a time."""
+    store = require_content_store()
+    items, next_cursor = store.list(filters, limit=limit, cursor=cursor)
+    return ModelResponse(ContentPageResponse(
+        items=[ContentSummaryResponse(**asdict(item)) for item in items],
+        next_cursor=next_cursor,
+    ))
+
+
+@app.get("/content/export")
+def export_content(filters: ContentFilter = Depends(content_filter)):
+    """Stream every matching stored result as NDJSON, one ContentResponse per line, newest first."""
+    store = require_content_store()
+    
+    def ndjson():
+        for summary, payload in store.export(filters):
+            yield to_content_response(summary, payload).model_dump_json() + "\n"
+    
+    return StreamingResponse(
+        ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="content.ndjson"'},
+    )
+
+
+@app.get("/content/{content_id}", response_model=ContentResponse)
+async def get_content(content_id: int):
+    """Return one stored result with its full content."""
+    record = require_content_store().get(content_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Content not found")
+    return ModelResponse(to_content_response(*record))
+
+
 if __name__ == "__main__":
     import os
+
+    import uvicorn
+
     port = int(os.environ.get("PORT", 8000))
     uvicorn.run("main:app", host="0.0.0.0", port=port, reload=False)
 
@@ -0,0 +1,115 @@
+"""
+Metrics Module - Process-wide counters and histograms in Prometheus format
+
+Spans (see tracing.py) feed their durations and token counts into the
+shared ``registry``; GET /metrics renders it in the Prometheus text
+exposition format together with gauges taken from the runtime stats.
+"""
+
+import threading
+from typing import Optional
+
+# Histogram buckets in seconds, from prompt building (sub-ms) to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: tuple[tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+class MetricsRegistry:
+    """Thread-safe counters and cumulative histograms keyed by name and labels."""
+
+    def __init__(self, namespace: str = "edu", buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.namespace = namespace
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._help: dict[str, tuple[str, str]] = {}
+        self._counters: dict[str, dict[tuple, float]] = {}
+        self._histograms: dict[str, dict[tuple, list]] = {}
+
+    def describe(self, name: str, metric_type: str, help_text: str) -> None:
+        """Register the TYPE and HELP lines for a metric."""
+        self._help[name] = (metric_type, help_text)
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        """Add to a counter."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Record one observation in a histogram."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            # [per-bucket counts..., sum, count]
+            state = series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def _header(self, name: str, default_type: str) -> list[str]:
+        full = f"{self.namespace}_{name}"
+        metric_type, help_text = self._help.get(name, (default_type, ""))
+        lines = [f"# HELP {full} {help_text}"] if help_text else []
+        lines.append(f"# TYPE {full} {metric_type}")
+        return lines
+
+    def render(self, gauges: Optional[dict[str, dict]] = None) -> str:
+        """
+        Render all metrics in the Prometheus text format.
+
+        `gauges` maps a group name to a stats dict; its numeric values are
+        exported as ``<namespace>_<group>_<key>`` gauges.
+        """
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines += self._header(name, "counter")
+                for labels, value in series.items():
+                    lines.append(f"{self.namespace}_{name}{_format_labels(labels)} {value:g}")
+
+            for name, series in sorted(self._histograms.items()):
+                lines += self._header(name, "histogram")
+                full = f"{self.namespace}_{name}"
+                for labels, state in series.items():
+                    cumulative = 0
+                    for bound, count in zip(self.buckets, state):
+                        cumulative += count
+                        lines.append(f"{full}_bucket{_format_labels(labels + (('le', f'{bound:g}'),))} {cumulative}")
+                    lines.append(f"{full}_bucket{_format_labels(labels + (('le', '+Inf'),))} {state[-1]}")
+                    lines.append(f"{full}_sum{_format_labels(labels)} {state[-2]:g}")
+                    lines.append(f"{full}_count{_format_labels(labels)} {state[-1]}")
+
+        for group, stats in (gauges or {}).items():
+            for key, value in (stats or {}).items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                full = f"{self.namespace}_{group}_{key}"
+                lines.append(f"# TYPE {full} gauge")
+                lines.append(f"{full} {value:g}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Drop all recorded values."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+# Process-wide registry
+registry = MetricsRegistry()
+registry.describe("span_duration_seconds", "histogram", "Wall time of traced operations by span name.")
+registry.describe("span_tokens_total", "counter", "LLM tokens consumed inside traced operations by span name and type.")
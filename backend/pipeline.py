@@ -8,20 +8,75 @@ Flow:
 └─────────────┘     └─────────────┘     └─────────────────────┘
 """
 
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
-from typing import Optional
+from typing import AsyncIterator, Optional, Union
+
+from pydantic import BaseModel, Field
+
 from agents import GeneratorAgent, ReviewerAgent
+from agents.generator import GeneratorInput, GeneratorOutput, PartialGeneratorOutput
+from agents.reviewer import ReviewerInput, ReviewerOutput
+from cache import CacheControl, ResultCache, normalize_topic
+from config import ModelProfile
+from content_store import SQLiteContentStore, record_payload
+from deadline import DeadlineExceeded, deadline_scope, enforce, remaining
+from singleflight import SingleFlight
+from tracing import span, start_trace, traced_call
+from usage import TokenUsage, track_usage
 
 
-@dataclass
-class PipelineResult:
-    """Complete result from running the educational content pipeline."""
+class PipelineResult(BaseModel):
+    """
+    Complete result from running the educational content pipeline.
+    
+    The agents' validated output models are kept as they are, and the same
+    object is what the API serializes, so a result is validated once, when
+    the LLM reply is parsed.
+    """
     grade: int
     topic: str
-    initial_content: dict
-    review_result: dict
-    refined_content: Optional[dict] = None
+    initial_content: GeneratorOutput
+    review_result: ReviewerOutput
+    refined_content: Optional[GeneratorOutput] = None
     was_refined: bool = False
+    refinement_mode: Optional[str] = None
+    degraded: bool = Field(
+        False,
+        description="Refinement was skipped or cut short to meet the deadline: the content is the unrefined draft",
+    )
+    cached: bool = False
+    cached_from_grade: Optional[int] = Field(
+        None,
+        description="Grade the cached content was written for, when a semantic cache hit came from another grade in its band",
+    )
+    token_usage: Optional[dict] = Field(default_factory=dict)
+    trace: Optional[dict] = None
+    content_id: Optional[int] = Field(None, description="ID of the stored result, for GET /content/{content_id}")
+    
+    def public(self, include_trace: bool = False) -> "PipelineResult":
+        """The result as the API returns it: without token usage and trace unless asked for."""
+        if include_trace:
+            return self
+        return self.model_copy(update={"token_usage": None, "trace": None})
+
+
+@dataclass
+class RefinementPlan:
+    """Which parts of the content a partial refinement regenerates."""
+    regenerate_explanation: bool
+    mcq_indexes: list[int]
+
+
+class BatchItemResult(BaseModel):
+    """Outcome of one item in a batch run: a result or an error, never both."""
+    index: int
+    grade: int
+    topic: str
+    result: Optional[PipelineResult] = None
+    error: Optional[str] = None
 
 
 class EducationalContentPipeline:
@@ -31,49 +86,626 @@ class EducationalContentPipeline:
     This pipeline:
     1. Generates initial content using the Generator Agent
     2. Reviews the content using the Reviewer Agent
-    3. If review fails, refines content once with feedback
+    3. If review fails, refines content once with feedback, regenerating
+       only the parts the reviewer failed when it gives per-item verdicts
+    
+    Finished results are stored in an optional ResultCache so repeat
+    requests for the same grade and topic skip the LLM calls entirely, and
+    in an optional content store that keeps every generated result.
+    Concurrent async runs for the same grade and topic are coalesced into
+    a single execution whose result is shared by every caller.
+    
+    With `speculative=True` the async path reviews each section in parallel
+    and starts refinement before every review has finished. Each agent runs
+    on its own ModelProfile (GENERATOR_PROFILE/REVIEWER_PROFILE by default).
     """
     
-    def __init__(self):
-        """Initialize both agents."""
-        self.generator = GeneratorAgent()
-        self.reviewer = ReviewerAgent()
+    def __init__(
+        self,
+        cache: Optional[ResultCache] = None,
+        speculative: bool = False,
+        generator_profile: Optional[ModelProfile] = None,
+        reviewer_profile: Optional[ModelProfile] = None,
+        store: Optional[SQLiteContentStore] = None,
+    ):
+        """Initialize both agents, the optional result cache and content store, and the pipeline mode."""
+        self.generator = GeneratorAgent(generator_profile)
+        self.reviewer = ReviewerAgent(reviewer_profile)
+        self.cache = cache
+        self.store = store
+        self.speculative = speculative
+        self.singleflight = SingleFlight()
+        self.speculation_stats = {"runs": 0, "refinements_started": 0, "refinements_cancelled": 0}
+        self.refinement_stats = {
+            "full": 0,
+            "partial": 0,
+            "partial_fallbacks": 0,
+            "completion_tokens": 0,
+            "full_equivalent_completion_tokens": 0,
+        }
+        self.deadline_stats = {"degraded": 0, "refinements_skipped": 0, "refinements_cut": 0}
     
-    def run(self, grade: int, topic: str) -> PipelineResult:
-        """Execute the full pipeline."""
-        # Step 1: Generate initial content
-        initial_content = self.generator.generate_from_dict({
-            "grade": grade,
-            "topic": topic
+    def _cache_lookup(self, grade: int, topic: str, cache_control: CacheControl) -> Optional[PipelineResult]:
+        """Return a cached result unless caching is disabled or bypassed."""
+        if self.cache is None or cache_control != "default":
+            return None
+        cached = self.cache.get(grade, topic)
+        if cached is None:
+            return None
+        if isinstance(cached, dict):
+            # Read back from a backend that serializes (SQLite); the memory backend returns the model itself
+            cached = PipelineResult.model_validate(cached)
+        # A semantic hit may come from another grade of the band: answer for the grade asked for, and say so
+        cached_from_grade = cached.grade if cached.grade != grade else None
+        return cached.model_copy(update={
+            "grade": grade, "topic": topic, "cached": True, "cached_from_grade": cached_from_grade, "trace": None,
         })
+    
+    def cached_result(self, grade: int, topic: str, cache_control: CacheControl = "default") -> Optional[PipelineResult]:
+        """The cached result run() would serve, if any, without running the pipeline."""
+        return self._cache_lookup(grade, topic, cache_control)
+    
+    def _cache_store(self, result: PipelineResult, cache_control: CacheControl) -> None:
+        """Store a fresh result unless the caller asked for no-store or it is degraded."""
+        # A degraded result only reflects one request's deadline; the next caller may have time to refine
+        if self.cache is None or cache_control == "no-store" or result.degraded:
+            return
+        self.cache.set(result.grade, result.topic, result)
+    
+    def _save(self, result: PipelineResult, cache_control: CacheControl) -> None:
+        """Keep a fresh result in the content store, then the cache, unless the caller asked for no-store."""
+        if cache_control == "no-store":
+            return
+        if self.store is not None:
+            # Saved first so cached copies carry the content ID too
+            result.content_id = self.store.add(record_payload(result))
+        self._cache_store(result, cache_control)
+    
+    async def _asave(self, result: PipelineResult, cache_control: CacheControl) -> None:
+        """_save() in a worker thread, so SQLite writes do not block the event loop."""
+        if cache_control == "no-store" or (self.store is None and self.cache is None):
+            return
+        await asyncio.to_thread(self._save, result, cache_control)
+    
+    def run(
+        self,
+        grade: int,
+        topic: str,
+        cache_control: CacheControl = "default",
+        deadline_seconds: Optional[float] = None,
+    ) -> PipelineResult:
+        """
+        Execute the full pipeline, serving from the cache when possible.
         
-        # Step 2: Review the generated content
-        review_result = self.reviewer.review_from_dict(
-            generator_output=initial_content,
-            grade=grade,
-            topic=topic
+        With `deadline_seconds`, every LLM call gets the remaining time as
+        its budget and refinement is skipped or cut short when it would not
+        finish in time (the result is then marked `degraded`).
+        
+        Raises:
+            DeadlineExceeded: If the deadline passes before the content is reviewed
+        """
+        cached = self._cache_lookup(grade, topic, cache_control)
+        if cached is not None:
+            return cached
+        
+        with start_trace("pipeline", grade=grade, topic=topic) as trace, deadline_scope(deadline_seconds):
+            result = self._run(grade, topic)
+        result.trace = trace.to_dict()
+        self._save(result, cache_control)
+        return result
+    
+    async def arun(
+        self,
+        grade: int,
+        topic: str,
+        cache_control: CacheControl = "default",
+        deadline_seconds: Optional[float] = None,
+    ) -> PipelineResult:
+        """
+        Execute the full pipeline without blocking the event loop.
+        
+        See run() for `deadline_seconds`. Concurrent requests for the same
+        grade, topic and `cache_control` share one run. A joined run keeps
+        the deadline of the request that started it, so its result may be
+        degraded even if this caller had time to refine (degraded results are
+        never cached, so the next request refines); a caller with a deadline
+        still waits for the shared run no longer than its own budget.
+        """
+        cached = self._cache_lookup(grade, topic, cache_control)
+        if cached is not None:
+            return cached
+        
+        async def execute() -> PipelineResult:
+            with start_trace("pipeline", grade=grade, topic=topic) as trace, deadline_scope(deadline_seconds):
+                if self.speculative:
+                    result = await self._arun_speculative(grade, topic)
+                else:
+                    result = await self._arun(grade, topic)
+            result.trace = trace.to_dict()
+            await self._asave(result, cache_control)
+            return result
+        
+        # Only share runs whose cache handling (e.g. no-store) the caller asked for too
+        key = (grade, normalize_topic(topic), cache_control)
+        if deadline_seconds is not None and self.singleflight.running(key):
+            with deadline_scope(deadline_seconds):
+                async with enforce("shared pipeline run"):
+                    result = await self.singleflight.do(key, execute)
+        else:
+            result = await self.singleflight.do(key, execute)
+        return result if result.topic == topic else result.model_copy(update={"topic": topic})
+    
+    async def astream(
+        self,
+        grade: int,
+        topic: str,
+        cache_control: CacheControl = "default",
+        deadline_seconds: Optional[float] = None,
+    ) -> AsyncIterator[tuple[str, Union[dict, BaseModel]]]:
+        """
+        Run the pipeline, yielding (event, data) pairs as each stage finishes.
+        
+        Events:
+        - token: {"stage": "generate" | "refine", "delta": str} explanation text as it streams
+        - generated: initial content, once the Generator Agent finishes
+        - reviewed: review result, once the Reviewer Agent finishes
+        - refined: refined content, only if refinement ran and finished in time
+        - result: the complete PipelineResult
+        
+        Stage events carry the agents' output models; token events are dicts.
+        See run() for `deadline_seconds`.
+        """
+        cached = self._cache_lookup(grade, topic, cache_control)
+        if cached is not None:
+            yield "generated", cached.initial_content
+            yield "reviewed", cached.review_result
+            if cached.refined_content:
+                yield "refined", cached.refined_content
+            yield "result", cached
+            return
+        
+        events: asyncio.Queue[tuple[str, Union[dict, BaseModel]]] = asyncio.Queue()
+        done = object()
+        
+        def on_token(stage: str):
+            return lambda delta: events.put_nowait(("token", {"stage": stage, "delta": delta}))
+        
+        async def execute():
+            with start_trace("pipeline", grade=grade, topic=topic) as trace, deadline_scope(deadline_seconds):
+                input_data = GeneratorInput(grade=grade, topic=topic)
+                
+                # Step 1: Generate initial content, streaming the explanation
+                started = time.perf_counter()
+                with span("generate"), track_usage() as generate_usage:
+                    initial_content = await self.generator.astream_generate(input_data, on_token("generate"))
+                generate_seconds = time.perf_counter() - started
+                events.put_nowait(("generated", initial_content))
+                
+                # Step 2: Review the generated content
+                with span("review"), track_usage() as review_usage:
+                    review_result = await self.reviewer.areview(self._review_input(input_data, initial_content))
+                events.put_nowait(("reviewed", review_result))
+                
+                # Step 3: Refinement (if needed and there is time - exactly ONE pass)
+                refined_content = None
+                refinement_mode = None
+                refine_usage = TokenUsage()
+                degraded = False
+                
+                if review_result.status == "fail" and review_result.feedback:
+                    if not self._refinement_fits(generate_seconds):
+                        degraded = self._degrade("refinements_skipped")
+                    else:
+                        try:
+                            with span("refine"), track_usage(refine_usage):
+                                if self._plan_refinement(initial_content, review_result) is None:
+                                    refined_content = await self.generator.astream_generate(
+                                        input_data, on_token("refine"), feedback=review_result.feedback
+                                    )
+                                    refinement_mode = "full"
+                                else:
+                                    refined_content, refinement_mode = await self._arefine(
+                                        input_data, initial_content, review_result
+                                    )
+                        except DeadlineExceeded:
+                            degraded = self._degrade("refinements_cut")
+                        else:
+                            self._record_refinement(refinement_mode, refine_usage, generate_usage)
+                            events.put_nowait(("refined", refined_content))
+                
+                result = self._build_result(
+                    grade, topic, initial_content, review_result, refined_content, refinement_mode,
+                    {"generate": generate_usage, "review": review_usage, "refine": refine_usage},
+                    degraded,
+                )
+            result.trace = trace.to_dict()
+            await self._asave(result, cache_control)
+            events.put_nowait(("result", result))
+        
+        task = asyncio.create_task(execute())
+        task.add_done_callback(lambda _: events.put_nowait(done))
+        try:
+            while (event := await events.get()) is not done:
+                yield event
+            task.result()  # Re-raise any pipeline failure
+        finally:
+            task.cancel()
+    
+    def run_many(self, items: list[dict], concurrency: int = 8) -> list[BatchItemResult]:
+        """
+        Run the pipeline for many {"grade", "topic"[, "cache_control", "deadline_seconds"]} items.
+        
+        Items run on a pool of at most `concurrency` threads. Results are
+        returned in input order and a failing item does not fail the batch.
+        """
+        results: list[Optional[BatchItemResult]] = [None] * len(items)
+        
+        def run_item(index: int, item: dict) -> BatchItemResult:
+            grade, topic = item["grade"], item["topic"]
+            try:
+                result = self.run(grade, topic, item.get("cache_control", "default"), item.get("deadline_seconds"))
+                return BatchItemResult(index=index, grade=grade, topic=topic, result=result)
+            except Exception as e:
+                return BatchItemResult(index=index, grade=grade, topic=topic, error=str(e))
+        
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            futures = [executor.submit(run_item, i, item) for i, item in enumerate(items)]
+            for future in as_completed(futures):
+                item_result = future.result()
+                results[item_result.index] = item_result
+        return results
+    
+    async def arun_many(self, items: list[dict], concurrency: int = 8) -> list[BatchItemResult]:
+        """Async variant of run_many(); results are returned in input order."""
+        results: list[Optional[BatchItemResult]] = [None] * len(items)
+        async for item_result in self.astream_many(items, concurrency):
+            results[item_result.index] = item_result
+        return results
+    
+    async def astream_many(self, items: list[dict], concurrency: int = 8) -> AsyncIterator[BatchItemResult]:
+        """
+        Run many items with bounded concurrency, yielding results as they complete.
+        
+        A fixed pool of `concurrency` workers pulls items from a shared
+        iterator, so memory and in-flight LLM calls depend on the concurrency
+        limit rather than on the length of the batch.
+        """
+        completed: asyncio.Queue[BatchItemResult] = asyncio.Queue()
+        pending = iter(enumerate(items))
+        
+        async def worker():
+            for index, item in pending:
+                grade, topic = item["grade"], item["topic"]
+                try:
+                    result = await self.arun(
+                        grade, topic, item.get("cache_control", "default"), item.get("deadline_seconds")
+                    )
+                    item_result = BatchItemResult(index=index, grade=grade, topic=topic, result=result)
+                except Exception as e:
+                    item_result = BatchItemResult(index=index, grade=grade, topic=topic, error=str(e))
+                completed.put_nowait(item_result)
+        
+        workers = [asyncio.create_task(worker()) for _ in range(min(max(1, concurrency), len(items)))]
+        try:
+            for _ in range(len(items)):
+                yield await completed.get()
+        finally:
+            for task in workers:
+                task.cancel()
+    
+    def _review_input(self, input_data: GeneratorInput, content: GeneratorOutput) -> ReviewerInput:
+        """The reviewer's view of generated content."""
+        return ReviewerInput(
+            grade=input_data.grade,
+            topic=input_data.topic,
+            explanation=content.explanation,
+            mcqs=[mcq.model_dump() for mcq in content.mcqs],
         )
+    
+    def _plan_refinement(self, content: GeneratorOutput, review_result: ReviewerOutput) -> Optional[RefinementPlan]:
+        """
+        Decide which parts to regenerate from the reviewer's per-item verdicts.
         
-        # Step 3: Refinement (if needed - exactly ONE pass)
-        refined_content = None
-        was_refined = False
+        Returns None when a full regeneration is needed: no usable item
+        verdicts, or the explanation and every MCQ failed.
+        """
+        failed = [item for item in review_result.items if item.status == "fail"]
+        regenerate_explanation = any(item.target == "explanation" for item in failed)
+        mcq_indexes = sorted({
+            item.index for item in failed
+            if item.target == "mcq" and item.index is not None and item.index < len(content.mcqs)
+        })
         
-        if review_result["status"] == "fail" and review_result["feedback"]:
-            refined_content = self.generator.generate_from_dict(
-                data={"grade": grade, "topic": topic},
-                feedback=review_result["feedback"]
-            )
-            was_refined = True
+        if not regenerate_explanation and not mcq_indexes:
+            return None
+        if regenerate_explanation and len(mcq_indexes) == len(content.mcqs):
+            return None
+        return RefinementPlan(regenerate_explanation=regenerate_explanation, mcq_indexes=mcq_indexes)
+    
+    def _refinement_feedback(self, review_result: ReviewerOutput) -> list[str]:
+        """Overall feedback plus any per-item feedback not already included."""
+        feedback = list(review_result.feedback)
+        for item in review_result.items:
+            if item.status == "fail":
+                feedback.extend(fb for fb in item.feedback if fb not in feedback)
+        return feedback
+    
+    def _splice(
+        self, content: GeneratorOutput, plan: RefinementPlan, partial: PartialGeneratorOutput
+    ) -> Optional[GeneratorOutput]:
+        """
+        Replace the failing parts of `content` with the regenerated ones.
+        
+        Returns None when the partial reply lacks a requested part (invalid
+        questions are dropped when it is parsed), since splicing it would
+        keep content the reviewer failed.
+        """
+        if len(partial.mcqs) < len(plan.mcq_indexes) or (plan.regenerate_explanation and not partial.explanation):
+            self.refinement_stats["partial_fallbacks"] += 1
+            return None
+        mcqs = list(content.mcqs)
+        for index, mcq in zip(plan.mcq_indexes, partial.mcqs):
+            mcqs[index] = mcq
+        explanation = partial.explanation if plan.regenerate_explanation else content.explanation
+        return GeneratorOutput.model_construct(explanation=explanation, mcqs=mcqs)
+    
+    def _partial_args(self, content: GeneratorOutput, review_result: ReviewerOutput, plan: RefinementPlan) -> dict:
+        """Keyword arguments for the generator's partial refinement call."""
+        return {
+            "feedback": self._refinement_feedback(review_result),
+            "regenerate_explanation": plan.regenerate_explanation,
+            "mcq_count": len(plan.mcq_indexes),
+            "keep_mcqs": [mcq.model_dump() for i, mcq in enumerate(content.mcqs) if i not in plan.mcq_indexes],
+        }
+    
+    def _refine(
+        self, input_data: GeneratorInput, content: GeneratorOutput, review_result: ReviewerOutput
+    ) -> tuple[GeneratorOutput, str]:
+        """
+        Refine failing content; returns (refined content, "full" | "partial").
+        
+        A partial reply missing some of the requested parts falls back to a
+        full regeneration.
+        """
+        plan = self._plan_refinement(content, review_result)
+        if plan is None:
+            return self.generator.generate(input_data, feedback=review_result.feedback), "full"
+        partial = self.generator.generate_partial(input_data, **self._partial_args(content, review_result, plan))
+        refined = self._splice(content, plan, partial)
+        if refined is None:
+            return self.generator.generate(input_data, feedback=review_result.feedback), "full"
+        return refined, "partial"
+    
+    async def _arefine(
+        self, input_data: GeneratorInput, content: GeneratorOutput, review_result: ReviewerOutput
+    ) -> tuple[GeneratorOutput, str]:
+        """Async variant of _refine()."""
+        plan = self._plan_refinement(content, review_result)
+        if plan is None:
+            return await self.generator.agenerate(input_data, feedback=review_result.feedback), "full"
+        partial = await self.generator.agenerate_partial(input_data, **self._partial_args(content, review_result, plan))
+        refined = self._splice(content, plan, partial)
+        if refined is None:
+            return await self.generator.agenerate(input_data, feedback=review_result.feedback), "full"
+        return refined, "partial"
+    
+    def _refinement_fits(self, generate_seconds: float) -> bool:
+        """
+        Whether refinement is expected to finish before the request deadline.
         
+        Refinement is one generator call, estimated to take as long as this
+        run's first generation did. Partial refinements write less, so this
+        errs on the side of skipping them; a refinement that overruns anyway
+        is cut short by the deadline.
+        """
+        left = remaining()
+        return left is None or left > generate_seconds
+    
+    def _degrade(self, reason: str) -> bool:
+        """Count a result served without refinement because of the deadline."""
+        self.deadline_stats["degraded"] += 1
+        self.deadline_stats[reason] += 1
+        return True
+    
+    def _record_refinement(self, mode: str, refine_usage: TokenUsage, generate_usage: TokenUsage) -> None:
+        """Account refinement tokens against what a full regeneration would have cost."""
+        self.refinement_stats[mode] += 1
+        self.refinement_stats["completion_tokens"] += refine_usage.completion_tokens
+        self.refinement_stats["full_equivalent_completion_tokens"] += generate_usage.completion_tokens
+    
+    def _build_result(
+        self,
+        grade: int,
+        topic: str,
+        initial_content: GeneratorOutput,
+        review_result: ReviewerOutput,
+        refined_content: Optional[GeneratorOutput],
+        refinement_mode: Optional[str],
+        usage: dict[str, TokenUsage],
+        degraded: bool = False,
+    ) -> PipelineResult:
+        """Assemble a PipelineResult with per-stage token usage."""
         return PipelineResult(
             grade=grade,
             topic=topic,
             initial_content=initial_content,
             review_result=review_result,
             refined_content=refined_content,
-            was_refined=was_refined
+            was_refined=refined_content is not None,
+            refinement_mode=refinement_mode,
+            degraded=degraded,
+            token_usage={stage: stage_usage.to_dict() for stage, stage_usage in usage.items()},
+        )
+    
+    def _run(self, grade: int, topic: str) -> PipelineResult:
+        """Run generator, reviewer and optional refinement synchronously."""
+        input_data = GeneratorInput(grade=grade, topic=topic)
+        
+        # Step 1: Generate initial content
+        started = time.perf_counter()
+        with span("generate"), track_usage() as generate_usage:
+            initial_content = self.generator.generate(input_data)
+        generate_seconds = time.perf_counter() - started
+        
+        # Step 2: Review the generated content
+        with span("review"), track_usage() as review_usage:
+            review_result = self.reviewer.review(self._review_input(input_data, initial_content))
+        
+        # Step 3: Refinement (if needed and there is time - exactly ONE pass, only the failing parts)
+        refined_content = None
+        refinement_mode = None
+        refine_usage = TokenUsage()
+        degraded = False
+        
+        if review_result.status == "fail" and review_result.feedback:
+            if not self._refinement_fits(generate_seconds):
+                degraded = self._degrade("refinements_skipped")
+            else:
+                try:
+                    with span("refine"), track_usage(refine_usage):
+                        refined_content, refinement_mode = self._refine(input_data, initial_content, review_result)
+                except DeadlineExceeded:
+                    degraded = self._degrade("refinements_cut")
+                else:
+                    self._record_refinement(refinement_mode, refine_usage, generate_usage)
+        
+        return self._build_result(
+            grade, topic, initial_content, review_result, refined_content, refinement_mode,
+            {"generate": generate_usage, "review": review_usage, "refine": refine_usage},
+            degraded,
+        )
+    
+    async def _arun(self, grade: int, topic: str) -> PipelineResult:
+        """Run generator, reviewer and optional refinement asynchronously."""
+        input_data = GeneratorInput(grade=grade, topic=topic)
+        
+        # Step 1: Generate initial content
+        started = time.perf_counter()
+        with span("generate"), track_usage() as generate_usage:
+            initial_content = await self.generator.agenerate(input_data)
+        generate_seconds = time.perf_counter() - started
+        
+        # Step 2: Review the generated content
+        with span("review"), track_usage() as review_usage:
+            review_result = await self.reviewer.areview(self._review_input(input_data, initial_content))
+        
+        # Step 3: Refinement (if needed and there is time - exactly ONE pass, only the failing parts)
+        refined_content = None
+        refinement_mode = None
+        refine_usage = TokenUsage()
+        degraded = False
+        
+        if review_result.status == "fail" and review_result.feedback:
+            if not self._refinement_fits(generate_seconds):
+                degraded = self._degrade("refinements_skipped")
+            else:
+                try:
+                    with span("refine"), track_usage(refine_usage):
+                        refined_content, refinement_mode = await self._arefine(input_data, initial_content, review_result)
+                except DeadlineExceeded:
+                    degraded = self._degrade("refinements_cut")
+                else:
+                    self._record_refinement(refinement_mode, refine_usage, generate_usage)
+        
+        return self._build_result(
+            grade, topic, initial_content, review_result, refined_content, refinement_mode,
+            {"generate": generate_usage, "review": review_usage, "refine": refine_usage},
+            degraded,
+        )
+    
+    async def _arun_speculative(self, grade: int, topic: str) -> PipelineResult:
+        """
+        Speculative variant of _arun().
+        
+        The explanation and every MCQ are reviewed in parallel. As soon as a
+        section fails, refinement starts with the feedback gathered so far
+        while the other reviews are still pending. If a later section adds
+        feedback, the in-flight refinement is cancelled and restarted with the
+        combined feedback. Anything left running is cancelled on exit.
+        
+        Under a deadline, a refinement that would not finish in time is not
+        started (or not restarted: the one in flight keeps running).
+        """
+        input_data = GeneratorInput(grade=grade, topic=topic)
+        self.speculation_stats["runs"] += 1
+        
+        # Step 1: Generate initial content
+        started = time.perf_counter()
+        with span("generate"), track_usage() as generate_usage:
+            initial_content = await self.generator.agenerate(input_data)
+        generate_seconds = time.perf_counter() - started
+        
+        # Step 2: Review every section in parallel
+        review_input = self._review_input(input_data, initial_content)
+        sections = ["explanation", *range(len(initial_content.mcqs))]
+        with track_usage() as review_usage:
+            reviews = [
+                asyncio.create_task(traced_call(
+                    "review",
+                    self.reviewer.areview_section(review_input, section),
+                    section=section,
+                ))
+                for section in sections
+            ]
+        refinement: Optional[asyncio.Task] = None
+        refine_usage = TokenUsage()
+        degraded = False
+        
+        def merged_review() -> ReviewerOutput:
+            verdicts = [task.result() for task in reviews if task.done()]
+            return ReviewerOutput.model_construct(
+                status="fail" if any(v.status == "fail" for v in verdicts) else "pass",
+                feedback=[fb for v in verdicts for fb in v.feedback],
+                items=[item for v in verdicts for item in v.items],
+            )
+        
+        try:
+            pending = set(reviews)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                if not any(t.result().status == "fail" and t.result().feedback for t in done):
+                    continue
+                if not self._refinement_fits(generate_seconds):
+                    continue
+                
+                # Step 3 (pre-emptive): refine with everything known so far
+                if refinement is not None:
+                    refinement.cancel()
+                    self.speculation_stats["refinements_cancelled"] += 1
+                with track_usage(refine_usage):
+                    refinement = asyncio.create_task(
+                        traced_call("refine", self._arefine(input_data, initial_content, merged_review()))
+                    )
+                self.speculation_stats["refinements_started"] += 1
+            
+            review_result = merged_review()
+            refined_content, refinement_mode = None, None
+            if refinement is not None:
+                try:
+                    refined_content, refinement_mode = await refinement
+                except DeadlineExceeded:
+                    degraded = self._degrade("refinements_cut")
+            elif review_result.status == "fail" and review_result.feedback:
+                # Every failing verdict came too late to refine in time
+                degraded = self._degrade("refinements_skipped")
+        finally:
+            for task in [*reviews, refinement]:
+                if task is None:
+                    continue
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    # Reviews that failed alongside the one being raised (e.g. all hit the deadline)
+                    task.exception()
+        
+        if refinement_mode is not None:
+            self._record_refinement(refinement_mode, refine_usage, generate_usage)
+        
+        return self._build_result(
+            grade, topic, initial_content, review_result, refined_content, refinement_mode,
+            {"generate": generate_usage, "review": review_usage, "refine": refine_usage},
+            degraded,
         )
-
 
 def generate_educational_content(grade: int, topic: str) -> PipelineResult:
     """Generate educational content for a given grade and topic."""
@@ -0,0 +1,242 @@
+"""
+Prewarm - Fill the persistent result cache from a curriculum file
+
+Demand peaks at the start of a school term, for topics known in advance.
+Running them ahead of time turns that peak into cache hits:
+
+    cd backend && python -m prewarm curriculum.csv --concurrency 8
+
+The curriculum is a CSV of grade and topic (a "grade,topic" header is
+optional; blank lines and lines starting with # are skipped). Each entry is
+run through the pipeline and stored in the SQLite result cache the server
+reads with CACHE_BACKEND=sqlite, under the same cache key a /generate
+request would use, and in the content store.
+
+- Bounded: at most --concurrency pipeline runs are in flight. LLM calls go
+  through the process-wide provider, so LLM_RPM_LIMIT/LLM_TPM_LIMIT pace
+  them and 429s are retried with backoff.
+- Rate-limit aware: an entry that still fails with a rate limit is put back
+  in the queue and every worker pauses for the backend's retry-after.
+- Resumable: each result is committed as soon as it finishes. Entries
+  whose cached result outlives --min-ttl are skipped, so rerunning after an
+  interruption only does the remaining work.
+
+A throughput report (entries and tokens per second) is printed at the end
+and, with --progress, periodically while running.
+"""
+
+import argparse
+import asyncio
+import csv
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from cache import ResultCache, SQLiteCacheBackend, make_cache_key
+from config import CACHE_PATH, CACHE_TTL_SECONDS, aclose_provider, get_provider
+from content_store import create_content_store
+from pipeline import EducationalContentPipeline
+from providers import RateLimitError
+from usage import TokenUsage, track_usage
+
+
+@dataclass
+class CurriculumEntry:
+    """One (grade, topic) line of the curriculum file."""
+    line: int
+    grade: int
+    topic: str
+    attempts: int = 0
+
+
+@dataclass
+class PrewarmReport:
+    """Progress and throughput of a prewarm run."""
+    total: int = 0
+    fresh: int = 0
+    generated: int = 0
+    failed: int = 0
+    rate_limited: int = 0
+    usage: TokenUsage = field(default_factory=TokenUsage)
+    errors: list[str] = field(default_factory=list)
+    llm: dict = field(default_factory=dict)
+    started: float = field(default_factory=time.monotonic)
+    finished: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def remaining(self) -> int:
+        return self.total - self.fresh - self.generated - self.failed
+
+    def summary(self) -> str:
+        elapsed = max(self.elapsed, 1e-9)
+        return (
+            f"{self.generated} generated, {self.fresh} already fresh, {self.failed} failed, "
+            f"{self.remaining} remaining of {self.total} in {self.elapsed:.1f}s | "
+            f"{self.generated / elapsed:.2f} entries/s, {self.usage.total_tokens / elapsed:.0f} tokens/s, "
+            f"{self.usage.calls} LLM calls, {self.rate_limited} rate-limit requeues"
+        )
+
+
+def read_curriculum(path: str) -> tuple[list[CurriculumEntry], list[str]]:
+    """
+    Parse a curriculum CSV into entries, dropping duplicates by cache key.
+
+    Returns the entries and a list of problems with lines that were skipped.
+    """
+    entries, problems, seen = [], [], set()
+    with open(path, newline="", encoding="utf-8") as f:
+        for line, row in enumerate(csv.reader(f), start=1):
+            if not row or not "".join(row).strip() or row[0].lstrip().startswith("#"):
+                continue
+            if line == 1 and row[0].strip().lower() == "grade":
+                continue
+            if len(row) < 2:
+                problems.append(f"line {line}: expected grade,topic")
+                continue
+            try:
+                grade = int(row[0])
+            except ValueError:
+                problems.append(f"line {line}: grade {row[0]!r} is not a number")
+                continue
+            topic = ",".join(row[1:]).strip()
+            if not 1 <= grade <= 12 or not topic or len(topic) > 200:
+                problems.append(f"line {line}: needs a grade from 1 to 12 and a topic of 1-200 characters")
+                continue
+            key = make_cache_key(grade, topic)
+            if key not in seen:
+                seen.add(key)
+                entries.append(CurriculumEntry(line, grade, topic))
+    return entries, problems
+
+
+async def prewarm(
+    entries: list[CurriculumEntry],
+    pipeline: EducationalContentPipeline,
+    backend: SQLiteCacheBackend,
+    report: PrewarmReport,
+    concurrency: int = 4,
+    min_ttl: float = 0.0,
+    max_attempts: int = 3,
+    progress_interval: float = 0.0,
+) -> PrewarmReport:
+    """Generate and store every entry without a result fresh for `min_ttl` more seconds."""
+    report.total = len(entries)
+    queue: asyncio.Queue[CurriculumEntry] = asyncio.Queue()
+    now = time.time()
+    for entry in entries:
+        expires_at = backend.expires_at(make_cache_key(entry.grade, entry.topic))
+        if expires_at is not None and expires_at - now >= min_ttl:
+            report.fresh += 1
+        else:
+            queue.put_nowait(entry)
+    resume_at = 0.0  # Monotonic time before which no worker starts an entry
+
+    async def worker() -> None:
+        nonlocal resume_at
+        while not queue.empty():
+            entry = queue.get_nowait()
+            pause = resume_at - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            entry.attempts += 1
+            try:
+                # Freshness was checked above; "no-cache" stores the new result
+                await pipeline.arun(entry.grade, entry.topic, cache_control="no-cache")
+                report.generated += 1
+            except RateLimitError as e:
+                if entry.attempts >= max_attempts:
+                    report.failed += 1
+                    report.errors.append(f"line {entry.line} ({entry.topic}): {e}")
+                    continue
+                report.rate_limited += 1
+                resume_at = max(resume_at, time.monotonic() + (e.retry_after or 30.0))
+                queue.put_nowait(entry)
+            except Exception as e:
+                report.failed += 1
+                report.errors.append(f"line {entry.line} ({entry.topic}): {e}")
+
+    async def show_progress() -> None:
+        while True:
+            await asyncio.sleep(progress_interval)
+            print(report.summary(), file=sys.stderr, flush=True)
+
+    reporter = asyncio.create_task(show_progress()) if progress_interval > 0 else None
+    try:
+        with track_usage(report.usage):
+            await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, queue.qsize())))))
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+        report.finished = time.monotonic()
+    return report
+
+
+async def _main(args: argparse.Namespace, report: PrewarmReport) -> None:
+    entries, problems = read_curriculum(args.curriculum)
+    for problem in problems:
+        print(f"skipped {problem}", file=sys.stderr)
+    backend = SQLiteCacheBackend(args.cache_path, ttl_seconds=args.ttl)
+    # Results also go to the content store (CONTENT_STORE), like /generate results
+    pipeline = EducationalContentPipeline(cache=ResultCache(backend), store=create_content_store())
+    try:
+        await prewarm(
+            entries,
+            pipeline,
+            backend,
+            report,
+            concurrency=args.concurrency,
+            min_ttl=args.min_ttl,
+            max_attempts=args.max_attempts,
+            progress_interval=args.progress,
+        )
+    finally:
+        report.llm = get_provider().get_stats()
+        backend.close()
+        await aclose_provider()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Populate the SQLite result cache from a curriculum CSV (grade,topic)")
+    parser.add_argument("curriculum", help="CSV file of grade,topic lines")
+    parser.add_argument("--concurrency", type=int, default=4, help="Pipeline runs in flight")
+    parser.add_argument("--cache-path", default=CACHE_PATH, help="SQLite result cache file (CACHE_PATH)")
+    parser.add_argument("--ttl", type=float, default=CACHE_TTL_SECONDS, help="Seconds the new results stay fresh")
+    parser.add_argument("--min-ttl", type=float, default=0.0,
+                        help="Regenerate cached results that expire within this many seconds")
+    parser.add_argument("--max-attempts", type=int, default=3, help="Attempts per entry when rate limited")
+    parser.add_argument("--progress", type=float, default=10.0, help="Seconds between progress lines (0 = off)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.curriculum):
+        parser.error(f"no such file: {args.curriculum}")
+    report = PrewarmReport()
+    interrupted = False
+    try:
+        asyncio.run(_main(args, report))
+    except KeyboardInterrupt:
+        interrupted = True
+        report.finished = report.finished or time.monotonic()
+        print("interrupted; finished entries are stored, rerun to resume", file=sys.stderr)
+    print(report.summary())
+    limiter = report.llm.get("rate_limiter")
+    if limiter:
+        print(
+            f"LLM retries {report.llm['retries']}, calls delayed by the rate limiter {limiter['delayed']} "
+            f"(avg wait {limiter['avg_wait_ms']:.0f}ms, max {limiter['max_wait_ms']:.0f}ms)"
+        )
+    for error in report.errors[:20]:
+        print(f"failed {error}", file=sys.stderr)
+    if interrupted:
+        sys.exit(130)
+    if report.failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
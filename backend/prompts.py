@@ -0,0 +1,116 @@
+"""
+Prompts Module - Versioned prompt templates with a cache-friendly layout
+
+Each agent prompt is a PromptTemplate: a constant prefix (instructions and
+the output schema) followed by a short variable suffix (grade, topic and the
+content to work on). Keeping everything constant first means consecutive
+calls share the longest possible token prefix, which providers with prompt
+(KV) caching process once instead of on every call. The prefix is built
+once at import; a render only formats the suffix. PromptRegistry.compile()
+checks every suffix and counts prefix tokens up front, during warm-up.
+
+Templates are registered under a name and a version, e.g.
+``generator.full@v3``. Bump the version whenever a template's text changes:
+the result cache is keyed by every registered template id, so stale content
+is never served for a new prompt. The registry counts renders and prompt
+tokens per template id for /stats and /metrics.
+"""
+
+import string
+import threading
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Optional
+
+from metrics import registry
+from providers import estimate_tokens
+
+registry.describe("prompt_renders_total", "counter", "Prompts rendered, by template id")
+registry.describe("prompt_tokens_total", "counter", "Estimated prompt tokens rendered, by template id")
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """A versioned prompt: a constant `prefix` and a str.format `suffix`."""
+    name: str
+    version: int
+    prefix: str
+    suffix: str
+
+    @property
+    def id(self) -> str:
+        return f"{self.name}@v{self.version}"
+
+    @cached_property
+    def prefix_tokens(self) -> int:
+        return estimate_tokens(self.prefix)
+
+    @cached_property
+    def fields(self) -> frozenset[str]:
+        """Names the suffix formats; raises ValueError if it is not a valid format string."""
+        return frozenset(name for _, name, _, _ in string.Formatter().parse(self.suffix) if name)
+
+    def render(self, **values) -> str:
+        return self.prefix + self.suffix.format(**values)
+
+
+class PromptRegistry:
+    """Registered templates by name (latest version wins) and their usage."""
+
+    def __init__(self):
+        self._templates: dict[str, PromptTemplate] = {}
+        self._lock = threading.Lock()
+        self._renders: dict[str, int] = {}
+        self._tokens: dict[str, int] = {}
+
+    def register(self, template: PromptTemplate) -> PromptTemplate:
+        current = self._templates.get(template.name)
+        if current is None or template.version >= current.version:
+            self._templates[template.name] = template
+        return template
+
+    def get(self, name: str) -> PromptTemplate:
+        return self._templates[name]
+
+    def render(self, name: str, **values) -> str:
+        """Render the current version of `name` and count its prompt tokens."""
+        template = self._templates[name]
+        text = template.render(**values)
+        tokens = estimate_tokens(text)
+        with self._lock:
+            self._renders[template.id] = self._renders.get(template.id, 0) + 1
+            self._tokens[template.id] = self._tokens.get(template.id, 0) + tokens
+        registry.inc("prompt_renders_total", template=template.id)
+        registry.inc("prompt_tokens_total", tokens, template=template.id)
+        return text
+
+    def compile(self) -> int:
+        """Parse every suffix and count every prefix now; returns the number of templates."""
+        for template in self._templates.values():
+            _ = (template.fields, template.prefix_tokens)
+        return len(self._templates)
+
+    def version_key(self) -> str:
+        """Every current template id, for keys of results that depend on the prompts."""
+        return ",".join(sorted(template.id for template in self._templates.values()))
+
+    def get_stats(self, name: Optional[str] = None) -> dict:
+        """Renders, average prompt tokens and the cacheable prefix per template."""
+        with self._lock:
+            stats = {}
+            for template in self._templates.values():
+                if name is not None and template.name != name:
+                    continue
+                renders = self._renders.get(template.id, 0)
+                average = self._tokens.get(template.id, 0) / renders if renders else 0.0
+                stats[template.id] = {
+                    "renders": renders,
+                    "avg_prompt_tokens": average,
+                    "prefix_tokens": template.prefix_tokens,
+                    "prefix_share": min(1.0, template.prefix_tokens / average) if average else 0.0,
+                }
+            return stats
+
+
+# Process-wide registry the agents register their templates with
+prompt_registry = PromptRegistry()
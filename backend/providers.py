@@ -0,0 +1,590 @@
+"""
+LLM Providers - Pluggable backends behind the completion functions
+
+The agents only ever call ``generate_completion`` and friends in config.py;
+those delegate to the process-wide LLMProvider. Three providers ship:
+
+- GroqProvider: the real GROQ API through the pooled ClientManager
+- OpenAICompatibleProvider: any OpenAI-style chat completions endpoint
+- FakeProvider: a deterministic, offline stand-in that answers with valid
+  generator/reviewer JSON after a configurable, seeded latency
+
+Select one with ``LLM_PROVIDER=groq|fake``. The fake provider needs no API
+key or network, so the whole service and its benchmarks run in CI.
+
+The GROQ SDK and httpx are imported by the providers that use them, on
+first use or in warm_up(), not when this module is imported.
+"""
+
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, AsyncIterator, Literal, Optional
+
+from clients import ClientManager, PoolLimits
+from usage import record_usage
+
+if TYPE_CHECKING:
+    import httpx
+
+
+@dataclass
+class Completion:
+    """Text and token usage of one completion."""
+    text: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+class ProviderError(Exception):
+    """Raised when an LLM backend fails to produce a completion."""
+
+    def __init__(self, message: str, retryable: bool = False, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class RateLimitError(ProviderError):
+    """The backend rejected the call for exceeding its rate limit (HTTP 429)."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message, retryable=True, retry_after=retry_after)
+
+
+def parse_retry_after(headers) -> Optional[float]:
+    """Seconds to wait from a retry-after (or retry-after-ms) response header."""
+    if headers is None:
+        return None
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return max(0.0, float(value) * scale)
+        except ValueError:
+            continue
+    return None
+
+
+# OpenAI-style response_format that constrains a completion to a JSON object
+JSON_RESPONSE_FORMAT = {"type": "json_object"}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count used where a backend reports none (~4 chars per token)."""
+    return len(text) // 4
+
+
+# ============================================================================
+# Provider Interface
+# ============================================================================
+
+class LLMProvider(ABC):
+    """
+    Interface every LLM backend implements.
+
+    Implementations report each call's usage with record_usage() so that
+    track_usage() blocks see it regardless of the backend in use. With
+    `json_mode` a backend that supports it constrains the reply to a single
+    JSON object; others ignore the flag.
+    """
+
+    name = "provider"
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+
+    @abstractmethod
+    def complete(self, messages: list[dict], model: str, temperature: float, max_tokens: int, json_mode: bool = False) -> Completion:
+        """Return a full completion, blocking the calling thread."""
+
+    @abstractmethod
+    async def acomplete(self, messages: list[dict], model: str, temperature: float, max_tokens: int, json_mode: bool = False) -> Completion:
+        """Return a full completion without blocking the event loop."""
+
+    @abstractmethod
+    def astream(self, messages: list[dict], model: str, temperature: float, max_tokens: int, json_mode: bool = False) -> AsyncIterator[str]:
+        """Yield text deltas as the completion is produced."""
+
+    def get_stats(self) -> dict:
+        """Return call counters for monitoring."""
+        return {"provider": self.name, "calls": self.calls, "errors": self.errors}
+
+    def warm_up(self) -> None:
+        """Load libraries and open clients ahead of the first call (blocking)."""
+
+    def close(self) -> None:
+        """Release sync resources."""
+
+    async def aclose(self) -> None:
+        """Release all resources; call from the application shutdown hook."""
+        self.close()
+
+
+# ============================================================================
+# GROQ
+# ============================================================================
+
+class GroqProvider(LLMProvider):
+    """Completions from the GROQ API over the shared, pooled clients."""
+
+    name = "groq"
+
+    def __init__(self, api_key: Optional[str], base_url: Optional[str] = None, limits: Optional[PoolLimits] = None):
+        super().__init__()
+        if not api_key:
+            raise ValueError(
+                "GROQ_API_KEY not found. Please set it in your .env file.\n"
+                "Get your key from: https://console.groq.com/keys"
+            )
+        # Retries are left to RateLimitedProvider so every attempt passes the rate limiter
+        self.clients = ClientManager(api_key=api_key, base_url=base_url, limits=limits, max_retries=0)
+
+    @staticmethod
+    def _translate(error: Exception) -> Exception:
+        """Map GROQ SDK errors onto ProviderError so callers can decide on retries."""
+        import groq
+
+        if isinstance(error, groq.RateLimitError):
+            return RateLimitError(str(error), retry_after=parse_retry_after(error.response.headers))
+        if isinstance(error, (groq.APIConnectionError, groq.InternalServerError)):
+            return ProviderError(str(error), retryable=True)
+        return error
+
+    @staticmethod
+    def _response_format(json_mode: bool):
+        from groq import NOT_GIVEN
+
+        return JSON_RESPONSE_FORMAT if json_mode else NOT_GIVEN
+
+    def complete(self, messages: list[dict], model: str, temperature: float, max_tokens: int, json_mode: bool = False) -> Completion:
+        self.calls += 1
+        try:
+            response = self.clients.get_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                response_format=self._response_format(json_mode),
+            )
+        except Exception as e:
+            self.errors += 1
+            raise self._translate(e) from e
+        return self._to_completion(response)
+
+    async def acomplete(self, messages: list[dict], model: str, temperature: float, max_tokens: int, json_mode: bool = False) -> Completion:
+        self.calls += 1
+        try:
+            response = await self.clients.get_async_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                response_format=self._response_format(json_mode),
+            )
+        except Exception as e:
+            self.errors += 1
+            raise self._translate(e) from e
+        return self._to_completion(response)
+
+    async def astream(self, messages: list[dict], model: str, temperature: float, max_tokens: int, json_mode: bool = False) -> AsyncIterator[str]:
+        self.calls += 1
+        try:
+            stream = await self.clients.get_async_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                # GROQ rejects JSON mode on streamed calls; the stream parser copes without it
+                stream=True,
+            )
+        except Exception as e:
+            self.errors += 1
+            raise self._translate(e) from e
+
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            # GROQ reports usage on the final chunk under x_groq
+            x_groq = getattr(chunk, "x_groq", None)
+            if x_groq is not None and getattr(x_groq, "usage", None) is not None:
+                record_usage(x_groq.usage)
+
+    @staticmethod
+    def _to_completion(response) -> Completion:
+        record_usage(response.usage)
+        return Completion(
+            text=response.choices[0].message.content,
+            prompt_tokens=response.usage.prompt_tokens if response.usage else 0,
+            completion_tokens=response.usage.completion_tokens if response.usage else 0,
+        )
+
+    def warm_up(self) -> None:
+        self.clients.prime()
+
+    def get_stats(self) -> dict:
+        return {**super().get_stats(), "pool": self.clients.get_stats()}
+
+    def close(self) -> None:
+        self.clients.close()
+
+    async def aclose(self) -> None:
+        await self.clients.aclose()
+
+
+# ============================================================================
+# OpenAI-compatible endpoints
+# ============================================================================
+
+def _httpx():
+    """The httpx module, imported on first use."""
+    import httpx
+
+    return httpx
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """
+    Completions from any server speaking the OpenAI chat completions API
+    (a local llama.cpp/vLLM/Ollama server, OpenRouter, OpenAI itself).
+
+    `base_url` is the API root that ``/chat/completions`` is appended to,
+    e.g. ``http://localhost:8080/v1``.
+    """
+
+    name = "openai"
+
+    def __init__(self, base_url: str, api_key: Optional[str] = None, limits: Optional[PoolLimits] = None):
+        super().__init__()
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.limits = limits or PoolLimits()
+        self._client: Optional["httpx.Client"] = None
+        self._async_client: Optional["httpx.AsyncClient"] = None
+        # warm_up() runs in a worker thread while requests may already be creating clients
+        self._lock = threading.Lock()
+
+    def _get_client(self) -> "httpx.Client":
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = _httpx().Client(limits=self.limits.to_httpx(), timeout=self.limits.timeout, headers=self.headers)
+        return self._client
+
+    def _get_async_client(self) -> "httpx.AsyncClient":
+        if self._async_client is None:
+            with self._lock:
+                if self._async_client is None:
+                    self._async_client = _httpx().AsyncClient(
+                        limits=self.limits.to_httpx(), timeout=self.limits.timeout, headers=self.headers
+                    )
+        return self._async_client
+
+    def warm_up(self) -> None:
+        self._get_client()
+        self._get_async_client()
+
+    def _check(self, response: "httpx.Response") -> None:
+        """Raise a ProviderError for a failed HTTP response."""
+        if response.status_code < 400:
+            return
+        self.errors += 1
+        message = f"{self.url} returned HTTP {response.status_code}"
+        if response.status_code == 429:
+            raise RateLimitError(message, retry_after=parse_retry_after(response.headers))
+        raise ProviderError(message, retryable=response.status_code >= 500)
+
+    @staticmethod
+    def _payload(messages: list[dict], model: str, temperature: float, max_tokens: int, json_mode: bool) -> dict:
+        payload = {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens}
+        if json_mode:
+            payload["response_format"] = JSON_RESPONSE_FORMAT
+        return payload
+
+    def _to_completion(self, messages: list[dict], body: dict) -> Completion:
+        text = body["choices"][0]["message"]["content"]
+        usage = body.get("usage") or {}
+        completion = Completion(
+            text=text,
+            prompt_tokens=usage.get("prompt_tokens") or sum(estimate_tokens(m["content"]) for m in messages),
+            completion_tokens=usage.get("completion_tokens") or estimate_tokens(text),
+        )
+        record_usage(completion)
+        return completion
+
+    def complete(self, messages: list[dict], model: str, temperature: float, max_tokens: int, json_mode: bool = False) -> Completion:
+        self.calls += 1
+        payload = self._payload(messages, model, temperature, max_tokens, json_mode)
+        try:
+            response = self._get_client().post(self.url, json=payload)
+        except _httpx().TransportError as e:
+            self.errors += 1
+            raise ProviderError(str(e), retryable=True) from e
+        self._check(response)
+        return self._to_completion(messages, response.json())
+
+    async def acomplete(self, messages: list[dict], model: str, temperature: float, max_tokens: int, json_mode: bool = False) -> Completion:
+        self.calls += 1
+        payload = self._payload(messages, model, temperature, max_tokens, json_mode)
+        try:
+            response = await self._get_async_client().post(self.url, json=payload)
+        except _httpx().TransportError as e:
+            self.errors += 1
+            raise ProviderError(str(e), retryable=True) from e
+        self._check(response)
+        return self._to_completion(messages, response.json())
+
+    async def astream(self, messages: list[dict], model: str, temperature: float, max_tokens: int, json_mode: bool = False) -> AsyncIterator[str]:
+        self.calls += 1
+        payload = {**self._payload(messages, model, temperature, max_tokens, json_mode), "stream": True}
+        text = ""
+        usage = None
+        try:
+            async with self._get_async_client().stream("POST", self.url, json=payload) as response:
+                if response.status_code >= 400:
+                    await response.aread()
+                    self._check(response)
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    usage = chunk.get("usage") or usage
+                    if chunk.get("choices") and chunk["choices"][0].get("delta", {}).get("content"):
+                        delta = chunk["choices"][0]["delta"]["content"]
+                        text += delta
+                        yield delta
+        except _httpx().TransportError as e:
+            self.errors += 1
+            raise ProviderError(str(e), retryable=True) from e
+        # Servers that do not report streaming usage get an estimate
+        record_usage(Completion(
+            text=text,
+            prompt_tokens=(usage or {}).get("prompt_tokens") or sum(estimate_tokens(m["content"]) for m in messages),
+            completion_tokens=(usage or {}).get("completion_tokens") or estimate_tokens(text),
+        ))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        self.close()
+
+
+# ============================================================================
+# Fake Provider
+# ============================================================================
+
+# Marker planted in a flawed draft; the fake reviewer rejects any content containing it
+FLAW_MARKER = "(ambiguous)"
+# Line of a generator prompt naming the fields to return
+RETURN_FIELDS = "**Return these fields:**"
+
+# Index of the MCQ that carries the flaw marker in a flawed draft
+FLAWED_MCQ_INDEX = 1
+
+
+def generator_payload(
+    topic: str = "the topic",
+    flawed: bool = False,
+    explanation: bool = True,
+    mcq_count: int = 5,
+) -> dict:
+    """Build a Generator Agent response body, optionally with one flawed MCQ."""
+    payload = {}
+    if explanation:
+        payload["explanation"] = f"This is an explanation about {topic}. " * 20
+    payload["mcqs"] = [
+        {
+            "question": f"Question {i + 1} about {topic}?"
+            + (f" {FLAW_MARKER}" if flawed and i == FLAWED_MCQ_INDEX else ""),
+            "options": ["A. First", "B. Second", "C. Third", "D. Fourth"],
+            "answer": "ABCD"[i % 4],
+        }
+        for i in range(mcq_count)
+    ]
+    return payload
+
+
+def reviewer_payload(fail: bool = False) -> dict:
+    """Build a Reviewer Agent response body with per-item verdicts."""
+    items = [{"target": "explanation", "status": "pass", "feedback": []}]
+    for i in range(5):
+        if fail and i == FLAWED_MCQ_INDEX:
+            items.append({"target": "mcq", "index": i, "status": "fail", "feedback": ["This question is ambiguous."]})
+        else:
+            items.append({"target": "mcq", "index": i, "status": "pass", "feedback": []})
+    if fail:
+        return {"status": "fail", "feedback": ["Question 2 is ambiguous for this grade."], "items": items}
+    return {"status": "pass", "feedback": [], "items": items}
+
+
+def fake_response(messages: list[dict], fail_rate: float = 0.0) -> str:
+    """
+    Answer a generator or reviewer prompt with schema-valid JSON.
+
+    First drafts are flawed at `fail_rate`, decided by the prompt text so the
+    same topic is flawed in every run; drafts written from feedback are clean
+    and the reviewer rejects exactly the flawed ones.
+    """
+    system = next((m["content"] for m in messages if m["role"] == "system"), "")
+    prompt = messages[-1]["content"]
+
+    if "reviewer" in system:
+        return json.dumps(reviewer_payload(fail=FLAW_MARKER in prompt))
+
+    first_draft = "Address this feedback" not in prompt and "Revise part" not in prompt
+    flawed = first_draft and random.Random(prompt).random() < fail_rate
+    # Answer with exactly the fields the prompt's last "Return these fields" line asks for
+    fields = prompt[prompt.rfind(RETURN_FIELDS):].split("\n", 1)[0]
+    count = re.search(r"exactly (\d+) question", fields)
+    return json.dumps(generator_payload(
+        flawed=flawed,
+        explanation='"explanation"' in fields,
+        mcq_count=int(count.group(1)) if '"mcqs"' in fields and count else 0,
+    ))
+
+
+LatencyDistribution = Literal["constant", "uniform", "normal", "lognormal", "pareto"]
+
+
+@dataclass
+class LatencyModel:
+    """
+    Per-call latency of the fake provider.
+
+    `base` seconds drawn from `distribution` (with `spread` as the jitter,
+    standard deviation or tail shape depending on the distribution), plus
+    prompt and completion tokens at the given token rates.
+    """
+    base: float = 0.5
+    distribution: LatencyDistribution = "constant"
+    spread: float = 0.0
+    prompt_tokens_per_second: float = 0.0
+    tokens_per_second: float = 0.0
+
+    def sample_base(self, rng: random.Random) -> float:
+        """Draw the fixed part of one call's latency."""
+        if self.distribution == "constant" or self.spread <= 0:
+            return self.base
+        if self.distribution == "uniform":
+            return max(0.0, self.base + rng.uniform(-self.spread, self.spread))
+        if self.distribution == "normal":
+            return max(0.0, rng.gauss(self.base, self.spread))
+        if self.distribution == "lognormal":
+            # Median `base`, `spread` is the sigma of the underlying normal
+            return self.base * math.exp(rng.gauss(0.0, self.spread))
+        if self.distribution == "pareto":
+            # Minimum `base`, `spread` is the tail index (smaller = heavier tail)
+            return self.base * rng.paretovariate(self.spread)
+        raise ValueError(f"Unknown latency distribution: {self.distribution!r}")
+
+    def token_time(self, prompt_tokens: int, completion_tokens: int) -> tuple[float, float]:
+        """Return (prompt processing, completion generation) seconds."""
+        prompt_time = prompt_tokens / self.prompt_tokens_per_second if self.prompt_tokens_per_second > 0 else 0.0
+        output_time = completion_tokens / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        return prompt_time, output_time
+
+
+class FakeProvider(LLMProvider):
+    """
+    Deterministic offline provider for benchmarks and CI.
+
+    Latencies come from a seeded RNG and flawed drafts are chosen by prompt,
+    so a given seed and workload replays the same run. `error_rate` makes a
+    fraction of calls raise ProviderError after their latency has elapsed.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        latency: Optional[LatencyModel] = None,
+        fail_rate: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+        chunk_size: int = 16,
+    ):
+        super().__init__()
+        self.latency = latency or LatencyModel()
+        self.fail_rate = fail_rate
+        self.error_rate = error_rate
+        self.chunk_size = chunk_size
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def _plan(self, messages: list[dict]) -> tuple[Completion, float, float, bool]:
+        """Build the answer and draw its latency: (completion, ttft, generation time, error)."""
+        text = fake_response(messages, self.fail_rate)
+        completion = Completion(
+            text=text,
+            prompt_tokens=sum(estimate_tokens(m["content"]) for m in messages),
+            completion_tokens=estimate_tokens(text),
+        )
+        with self._lock:
+            self.calls += 1
+            base = self.latency.sample_base(self._rng)
+            error = self._rng.random() < self.error_rate
+            if error:
+                self.errors += 1
+            else:
+                self.prompt_tokens += completion.prompt_tokens
+                self.completion_tokens += completion.completion_tokens
+        prompt_time, output_time = self.latency.token_time(completion.prompt_tokens, completion.completion_tokens)
+        # A quarter of the fixed latency is spent before the first token
+        return completion, base / 4 + prompt_time, 0.75 * base + output_time, error
+
+    def complete(self, messages: list[dict], model: str, temperature: float, max_tokens: int, json_mode: bool = False) -> Completion:
+        completion, ttft, generation, error = self._plan(messages)
+        time.sleep(ttft + generation)
+        if error:
+            raise ProviderError("Injected fake provider error", retryable=True)
+        record_usage(completion)
+        return completion
+
+    async def acomplete(self, messages: list[dict], model: str, temperature: float, max_tokens: int, json_mode: bool = False) -> Completion:
+        completion, ttft, generation, error = self._plan(messages)
+        await asyncio.sleep(ttft + generation)
+        if error:
+            raise ProviderError("Injected fake provider error", retryable=True)
+        record_usage(completion)
+        return completion
+
+    async def astream(self, messages: list[dict], model: str, temperature: float, max_tokens: int, json_mode: bool = False) -> AsyncIterator[str]:
+        completion, ttft, generation, error = self._plan(messages)
+        await asyncio.sleep(ttft)
+        if error:
+            raise ProviderError("Injected fake provider error", retryable=True)
+        text = completion.text
+        pieces = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+        for i, piece in enumerate(pieces):
+            if i:
+                await asyncio.sleep(generation / len(pieces))
+            yield piece
+        record_usage(completion)
+
+    def get_stats(self) -> dict:
+        return {
+            **super().get_stats(),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "latency": self.latency.distribution,
+        }
@@ -0,0 +1,283 @@
+"""
+Rate Limit Module - Client-side RPM/TPM budgeting and retry scheduling
+
+GROQ enforces requests-per-minute and tokens-per-minute quotas; exceeding
+them returns 429 and, without this module, a 500 from /generate. Two
+pieces keep the service inside its quota:
+
+- RateLimiter: a pair of token buckets (requests and tokens). Each call
+  reserves one request and an estimated token cost (prompt tokens plus
+  MAX_TOKENS) and waits until both buckets cover it, so calls queue instead
+  of failing. Over-estimates are refunded once the real usage is known.
+- RateLimitedProvider: wraps any LLMProvider, acquires from the shared
+  limiter before each call and retries rate-limited or transient failures
+  with jittered backoff, honouring the backend's retry-after.
+
+Both agents share the process-wide provider and therefore one limiter.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from typing import AsyncIterator, Optional
+
+from providers import Completion, LLMProvider, ProviderError, RateLimitError, estimate_tokens
+
+
+class TokenBucket:
+    """
+    Token bucket that may go into debt.
+
+    reserve() always succeeds and returns how long the caller must wait for
+    the bucket to be back in credit, which makes waiting callers first come,
+    first served without any polling. A rate of 0 disables the bucket.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._level = capacity
+        self._updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.refill_per_second > 0
+
+    def _refill(self, now: float) -> None:
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take `amount` and return the seconds until the bucket is no longer in debt."""
+        if not self.enabled:
+            return 0.0
+        self._refill(now)
+        self._level -= amount
+        return max(0.0, -self._level / self.refill_per_second)
+
+    def refund(self, amount: float, now: float) -> None:
+        """Return unused tokens to the bucket."""
+        if self.enabled:
+            self._refill(now)
+            self._level = min(self.capacity, self._level + amount)
+
+    def available(self, now: float) -> float:
+        if not self.enabled:
+            return float("inf")
+        self._refill(now)
+        return self._level
+
+
+class RateLimiter:
+    """
+    Shared requests-per-period and tokens-per-period budget.
+
+    `period` is 60 seconds for per-minute quotas; simulations shrink it to
+    run faster. A limit of 0 means unlimited.
+    """
+
+    def __init__(self, rpm: float = 0, tpm: float = 0, period: float = 60.0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.period = period
+        self.requests = TokenBucket(rpm, rpm / period)
+        self.tokens = TokenBucket(tpm, tpm / period)
+        self._lock = threading.Lock()
+        self._blocked_until = 0.0
+        self.acquired = 0
+        self.delayed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.throttled = 0
+
+    def reserve(self, cost: int) -> float:
+        """Reserve one request and `cost` tokens; return the seconds to wait first."""
+        with self._lock:
+            now = time.monotonic()
+            # A single call larger than the whole token budget could never run
+            cost = min(cost, self.tpm) if self.tpm else cost
+            wait = max(
+                self.requests.reserve(1, now),
+                self.tokens.reserve(cost, now),
+                self._blocked_until - now,
+                0.0,
+            )
+            self.acquired += 1
+            if wait > 0:
+                self.delayed += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            return wait
+
+    def expected_wait(self, cost: int) -> float:
+        """Seconds a call of `cost` tokens would wait right now, without reserving."""
+        with self._lock:
+            now = time.monotonic()
+            cost = min(cost, self.tpm) if self.tpm else cost
+            waits = [self._blocked_until - now, 0.0]
+            if self.requests.enabled:
+                waits.append((1 - self.requests.available(now)) / self.requests.refill_per_second)
+            if self.tokens.enabled:
+                waits.append((cost - self.tokens.available(now)) / self.tokens.refill_per_second)
+            return max(waits)
+
+    async def acquire(self, cost: int) -> None:
+        """Wait (without blocking the event loop) until the call fits the budget."""
+        wait = self.reserve(cost)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self, cost: int) -> None:
+        """Blocking variant of acquire() for the sync completion path."""
+        wait = self.reserve(cost)
+        if wait > 0:
+            time.sleep(wait)
+
+    def settle(self, reserved: int, used: int) -> None:
+        """Refund the part of a reservation the call did not use."""
+        if used < reserved:
+            with self._lock:
+                self.tokens.refund(reserved - used, time.monotonic())
+
+    def penalize(self, retry_after: float) -> None:
+        """Hold back every caller after the backend reported a rate limit."""
+        with self._lock:
+            self.throttled += 1
+            self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+
+    def get_stats(self) -> dict:
+        """Return budget and waiting counters for monitoring."""
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "rpm": self.rpm,
+                "tpm": self.tpm,
+                "acquired": self.acquired,
+                "delayed": self.delayed,
+                "avg_wait_ms": 1000 * self.total_wait / self.acquired if self.acquired else 0.0,
+                "max_wait_ms": 1000 * self.max_wait,
+                "throttled": self.throttled,
+                "requests_available": self.requests.available(now) if self.rpm else None,
+                "tokens_available": self.tokens.available(now) if self.tpm else None,
+            }
+
+
+def estimate_cost(messages: list[dict], max_tokens: int) -> int:
+    """Worst-case token cost of a call: the prompt plus the full completion budget."""
+    return sum(estimate_tokens(m["content"]) for m in messages) + max_tokens
+
+
+class RateLimitedProvider(LLMProvider):
+    """
+    Provider wrapper that budgets calls and retries rate limits.
+
+    Rate-limited (429) and other retryable ProviderErrors are retried up to
+    `max_retries` times. The delay is the backend's retry-after when given,
+    otherwise exponential backoff from `base_delay`, plus up to `jitter` of
+    it at random so waiting callers do not retry in lockstep.
+    """
+
+    def __init__(
+        self,
+        provider: LLMProvider,
+        limiter: Optional[RateLimiter] = None,
+        max_retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        jitter: float = 0.25,
+    ):
+        super().__init__()
+        self.provider = provider
+        self.name = provider.name
+        self.limiter = limiter or RateLimiter()
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.retries = 0
+
+    def _retry_delay(self, error: ProviderError, attempt: int) -> float:
+        delay = error.retry_after if error.retry_after is not None else self.base_delay * 2 ** attempt
+        delay = min(delay, self.max_delay)
+        return delay * (1 + random.uniform(0, self.jitter))
+
+    def _should_retry(self, error: ProviderError, attempt: int) -> bool:
+        if not error.retryable or attempt >= self.max_retries:
+            return False
+        self.retries += 1
+        if isinstance(error, RateLimitError):
+            self.limiter.penalize(error.retry_after or self.base_delay)
+        return True
+
+    def complete(self, messages: list[dict], model: str, temperature: float, max_tokens: int, json_mode: bool = False) -> Completion:
+        cost = estimate_cost(messages, max_tokens)
+        self.calls += 1
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire_sync(cost)
+            try:
+                completion = self.provider.complete(messages, model, temperature, max_tokens, json_mode=json_mode)
+            except ProviderError as e:
+                self.limiter.settle(cost, 0)
+                if not self._should_retry(e, attempt):
+                    self.errors += 1
+                    raise
+                time.sleep(self._retry_delay(e, attempt))
+                continue
+            self.limiter.settle(cost, completion.prompt_tokens + completion.completion_tokens)
+            return completion
+
+    async def acomplete(self, messages: list[dict], model: str, temperature: float, max_tokens: int, json_mode: bool = False) -> Completion:
+        cost = estimate_cost(messages, max_tokens)
+        self.calls += 1
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(cost)
+            try:
+                completion = await self.provider.acomplete(messages, model, temperature, max_tokens, json_mode=json_mode)
+            except ProviderError as e:
+                self.limiter.settle(cost, 0)
+                if not self._should_retry(e, attempt):
+                    self.errors += 1
+                    raise
+                await asyncio.sleep(self._retry_delay(e, attempt))
+                continue
+            self.limiter.settle(cost, completion.prompt_tokens + completion.completion_tokens)
+            return completion
+
+    async def astream(self, messages: list[dict], model: str, temperature: float, max_tokens: int, json_mode: bool = False) -> AsyncIterator[str]:
+        cost = estimate_cost(messages, max_tokens)
+        self.calls += 1
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(cost)
+            streamed = 0
+            try:
+                async for delta in self.provider.astream(messages, model, temperature, max_tokens, json_mode=json_mode):
+                    streamed += len(delta)
+                    yield delta
+            except ProviderError as e:
+                self.limiter.settle(cost, 0)
+                # Text already sent to the caller cannot be taken back
+                if streamed or not self._should_retry(e, attempt):
+                    self.errors += 1
+                    raise
+                await asyncio.sleep(self._retry_delay(e, attempt))
+                continue
+            self.limiter.settle(cost, estimate_cost(messages, streamed // 4))
+            return
+
+    def get_stats(self) -> dict:
+        return {
+            **self.provider.get_stats(),
+            "retries": self.retries,
+            "failed_after_retries": self.errors,
+            "rate_limiter": self.limiter.get_stats(),
+        }
+
+    def warm_up(self) -> None:
+        self.provider.warm_up()
+
+    def close(self) -> None:
+        self.provider.close()
+
+    async def aclose(self) -> None:
+        await self.provider.aclose()
@@ -0,0 +1,427 @@
+"""
+Router Module - Spread LLM calls across several keys, models and endpoints
+
+One GROQ key means one key's quota as the throughput ceiling, and one
+outage takes the whole service down. The RouterProvider sits behind the
+completion functions like any other provider and fans calls out over
+several backends (GROQ keys, other models, OpenAI-compatible servers):
+
+- selection: weighted random or least (EWMA) latency, preferring backends
+  whose own rate limiter has budget right now
+- circuit breakers: a backend that keeps failing is skipped until a
+  cool-down passes, then probed with a single call
+- failover: a failed or rate-limited call moves on to the next backend
+- health checks: open breakers are probed in the background so a
+  recovered backend rejoins without waiting for real traffic
+
+Backends are configured as a JSON list in LLM_BACKENDS, for example:
+
+    [{"name": "groq-a", "api_key_env": "GROQ_API_KEY", "rpm": 30, "tpm": 6000},
+     {"name": "groq-b", "api_key_env": "GROQ_API_KEY_2", "model": "llama-3.1-8b-instant"},
+     {"name": "local", "kind": "openai", "base_url": "http://localhost:8080/v1", "weight": 0.5}]
+"""
+
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Literal, Optional
+
+from clients import PoolLimits
+from metrics import registry
+from providers import (
+    Completion,
+    FakeProvider,
+    GroqProvider,
+    LatencyModel,
+    LLMProvider,
+    OpenAICompatibleProvider,
+    ProviderError,
+    RateLimitError,
+)
+from ratelimit import RateLimitedProvider, RateLimiter, estimate_cost
+
+RoutingStrategy = Literal["weighted", "least_latency"]
+
+# Tiny request used to probe a backend whose breaker is open
+HEALTH_CHECK_MESSAGES = [{"role": "user", "content": "Reply with OK."}]
+
+
+@dataclass
+class BackendSpec:
+    """Configuration of one routed backend."""
+    name: str
+    kind: Literal["groq", "openai", "fake"] = "groq"
+    model: Optional[str] = None
+    api_key: Optional[str] = None
+    api_key_env: Optional[str] = None
+    base_url: Optional[str] = None
+    weight: float = 1.0
+    rpm: float = 0
+    tpm: float = 0
+    # Only for kind="fake": per-call latency and injected error rate
+    latency: float = 0.5
+    error_rate: float = 0.0
+
+    def resolve_api_key(self) -> Optional[str]:
+        return self.api_key or (os.getenv(self.api_key_env) if self.api_key_env else None)
+
+
+def load_backend_spec(raw: str) -> BackendSpec:
+    """Parse a single backend JSON object, such as LLM_HEDGE_BACKEND."""
+    return BackendSpec(**json.loads(raw))
+
+
+def load_backend_specs(raw: str) -> list[BackendSpec]:
+    """Parse the LLM_BACKENDS JSON list."""
+    specs = [BackendSpec(**entry) for entry in json.loads(raw)]
+    names = [spec.name for spec in specs]
+    if len(set(names)) != len(names):
+        raise ValueError(f"LLM_BACKENDS names must be unique: {names}")
+    return specs
+
+
+# ============================================================================
+# Circuit Breaker & Statistics
+# ============================================================================
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive failures; open ->
+    half-open after `reset_timeout` seconds, where a single probe call decides
+    whether it closes again or re-opens.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state: Literal["closed", "open", "half_open"] = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def ready_in(self) -> float:
+        """Seconds until the breaker lets a call through (0 if it would now)."""
+        if self.state == "closed":
+            return 0.0
+        if self.state == "open":
+            return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+        return float("inf") if self._probing else 0.0
+
+    def allow(self) -> bool:
+        """Admit a call; in half-open state only one probe at a time."""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open":
+                if time.monotonic() < self.opened_at + self.reset_timeout:
+                    return False
+                self.state = "half_open"
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.trips += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """End a call that neither succeeded nor failed (e.g. rate limited)."""
+        with self._lock:
+            self._probing = False
+
+
+@dataclass
+class BackendStats:
+    """Latency and outcome counters for one backend."""
+    calls: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    ewma_latency: Optional[float] = None
+    latencies: deque = field(default_factory=lambda: deque(maxlen=256))
+
+    def record(self, latency: float, alpha: float = 0.2) -> None:
+        self.latencies.append(latency)
+        self.ewma_latency = latency if self.ewma_latency is None else alpha * latency + (1 - alpha) * self.ewma_latency
+
+    def snapshot(self) -> dict:
+        ordered = sorted(self.latencies)
+
+        def pct(p: float) -> float:
+            return 1000 * ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else 0.0
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            "error_rate": self.errors / self.calls if self.calls else 0.0,
+            "ewma_latency_ms": 1000 * self.ewma_latency if self.ewma_latency is not None else None,
+            "p50_ms": pct(0.5),
+            "p95_ms": pct(0.95),
+        }
+
+
+class RoutedBackend:
+    """A backend provider with its own rate limiter, breaker and statistics."""
+
+    def __init__(self, spec: BackendSpec, provider: LLMProvider, breaker: CircuitBreaker):
+        self.spec = spec
+        self.name = spec.name
+        # Per-key quota; failover replaces retries, so the wrapper never retries itself
+        self.limiter = RateLimiter(rpm=spec.rpm, tpm=spec.tpm)
+        self.provider = RateLimitedProvider(provider, self.limiter, max_retries=0)
+        self.breaker = breaker
+        self.stats = BackendStats()
+
+    def model(self, default: str) -> str:
+        return self.spec.model or default
+
+
+def build_backend(spec: BackendSpec, limits: Optional[PoolLimits] = None, failure_threshold: int = 3, reset_timeout: float = 30.0) -> RoutedBackend:
+    """Create the provider described by a BackendSpec."""
+    if spec.kind == "groq":
+        provider = GroqProvider(api_key=spec.resolve_api_key(), base_url=spec.base_url, limits=limits)
+    elif spec.kind == "openai":
+        if not spec.base_url:
+            raise ValueError(f"Backend {spec.name!r}: kind 'openai' needs a base_url")
+        provider = OpenAICompatibleProvider(spec.base_url, api_key=spec.resolve_api_key(), limits=limits)
+    elif spec.kind == "fake":
+        provider = FakeProvider(LatencyModel(base=spec.latency), error_rate=spec.error_rate)
+    else:
+        raise ValueError(f"Backend {spec.name!r}: unknown kind {spec.kind!r}")
+    return RoutedBackend(spec, provider, CircuitBreaker(failure_threshold, reset_timeout))
+
+
+# ============================================================================
+# Router
+# ============================================================================
+
+class RouterProvider(LLMProvider):
+    """
+    Provider that routes each call to one of several backends with failover.
+
+    If every backend fails, the last error is raised; when all of them were
+    rate limited or had open breakers, a RateLimitError/ProviderError with the
+    shortest wait is raised so an outer RateLimitedProvider can retry.
+    """
+
+    name = "router"
+
+    def __init__(
+        self,
+        backends: list[RoutedBackend],
+        default_model: str,
+        strategy: RoutingStrategy = "weighted",
+        seed: Optional[int] = None,
+    ):
+        super().__init__()
+        if not backends:
+            raise ValueError("RouterProvider needs at least one backend")
+        if strategy not in ("weighted", "least_latency"):
+            raise ValueError(f"Unknown routing strategy: {strategy!r}")
+        self.backends = backends
+        self.default_model = default_model
+        self.strategy = strategy
+        self.failovers = 0
+        self._rng = random.Random(seed)
+
+    def _order(self, cost: int) -> list[RoutedBackend]:
+        """Backends in the order they should be tried for a call of `cost` tokens."""
+        if self.strategy == "least_latency":
+            # Unmeasured backends sort first so each one gets explored
+            ordered = sorted(self.backends, key=lambda b: b.stats.ewma_latency or 0.0)
+        else:
+            # Weighted random order without replacement (Efraimidis-Spirakis keys)
+            ordered = sorted(
+                self.backends,
+                key=lambda b: self._rng.random() ** (1.0 / b.spec.weight) if b.spec.weight > 0 else 0.0,
+                reverse=True,
+            )
+        # Prefer backends whose own quota has room right now (stable sort keeps the order otherwise)
+        return sorted(ordered, key=lambda b: b.limiter.expected_wait(cost) > 0)
+
+    def _exhausted(self, last_error: Optional[Exception]) -> Exception:
+        """The error to raise once no backend could serve the call."""
+        if last_error is not None and not isinstance(last_error, RateLimitError):
+            return last_error
+        waits = [wait for wait in (b.breaker.ready_in() for b in self.backends) if wait != float("inf")]
+        if last_error is not None:
+            if last_error.retry_after is not None:
+                waits.append(last_error.retry_after)
+            return RateLimitError("All LLM backends are rate limited", retry_after=min(waits, default=1.0))
+        return ProviderError("No healthy LLM backend", retryable=True, retry_after=min(waits, default=1.0))
+
+    def _on_success(self, backend: RoutedBackend, started: float) -> None:
+        latency = time.perf_counter() - started
+        backend.breaker.record_success()
+        backend.stats.record(latency)
+        registry.observe("llm_backend_latency_seconds", latency, backend=backend.name)
+        registry.inc("llm_backend_calls_total", backend=backend.name, outcome="ok")
+
+    def _on_error(self, backend: RoutedBackend, error: Exception) -> None:
+        if isinstance(error, RateLimitError):
+            # Busy, not broken: skip it without counting towards the breaker
+            backend.stats.rate_limited += 1
+            backend.breaker.release()
+            registry.inc("llm_backend_calls_total", backend=backend.name, outcome="rate_limited")
+        else:
+            backend.stats.errors += 1
+            backend.breaker.record_failure()
+            registry.inc("llm_backend_calls_total", backend=backend.name, outcome="error")
+
+    def _attempts(self, messages: list[dict], max_tokens: int) -> list[RoutedBackend]:
+        self.calls += 1
+        return self._order(estimate_cost(messages, max_tokens))
+
+    def complete(self, messages: list[dict], model: str, temperature: float, max_tokens: int, json_mode: bool = False) -> Completion:
+        last_error = None
+        for backend in self._attempts(messages, max_tokens):
+            if not backend.breaker.allow():
+                continue
+            if last_error is not None:
+                self.failovers += 1
+            backend.stats.calls += 1
+            started = time.perf_counter()
+            try:
+                completion = backend.provider.complete(messages, backend.model(model), temperature, max_tokens, json_mode=json_mode)
+            except Exception as e:
+                self._on_error(backend, e)
+                last_error = e
+                continue
+            except BaseException:
+                # Interrupted: free a half-open probe slot
+                backend.breaker.release()
+                raise
+            self._on_success(backend, started)
+            return completion
+        self.errors += 1
+        raise self._exhausted(last_error)
+
+    async def acomplete(self, messages: list[dict], model: str, temperature: float, max_tokens: int, json_mode: bool = False) -> Completion:
+        last_error = None
+        for backend in self._attempts(messages, max_tokens):
+            if not backend.breaker.allow():
+                continue
+            if last_error is not None:
+                self.failovers += 1
+            backend.stats.calls += 1
+            started = time.perf_counter()
+            try:
+                completion = await backend.provider.acomplete(messages, backend.model(model), temperature, max_tokens, json_mode=json_mode)
+            except Exception as e:
+                self._on_error(backend, e)
+                last_error = e
+                continue
+            except BaseException:
+                # Cancelled (deadline, losing hedge, client gone): free a half-open probe slot
+                backend.breaker.release()
+                raise
+            self._on_success(backend, started)
+            return completion
+        self.errors += 1
+        raise self._exhausted(last_error)
+
+    async def astream(self, messages: list[dict], model: str, temperature: float, max_tokens: int, json_mode: bool = False) -> AsyncIterator[str]:
+        last_error = None
+        for backend in self._attempts(messages, max_tokens):
+            if not backend.breaker.allow():
+                continue
+            if last_error is not None:
+                self.failovers += 1
+            backend.stats.calls += 1
+            started = time.perf_counter()
+            streamed = False
+            try:
+                async for delta in backend.provider.astream(messages, backend.model(model), temperature, max_tokens, json_mode=json_mode):
+                    streamed = True
+                    yield delta
+            except Exception as e:
+                self._on_error(backend, e)
+                # Text already sent to the caller cannot be replayed from another backend
+                if streamed:
+                    self.errors += 1
+                    raise
+                last_error = e
+                continue
+            except BaseException:
+                # Cancelled (deadline, losing hedge, stream closed early): free a half-open probe slot
+                backend.breaker.release()
+                raise
+            self._on_success(backend, started)
+            return
+        self.errors += 1
+        raise self._exhausted(last_error)
+
+    async def check_health(self) -> None:
+        """Probe every backend whose breaker is ready for a half-open call."""
+        async def probe(backend: RoutedBackend) -> None:
+            if backend.breaker.state == "closed" or not backend.breaker.allow():
+                return
+            started = time.perf_counter()
+            try:
+                await backend.provider.acomplete(HEALTH_CHECK_MESSAGES, backend.model(self.default_model), 0.0, 1)
+            except Exception as e:
+                self._on_error(backend, e)
+            except BaseException:
+                backend.breaker.release()
+                raise
+            else:
+                self._on_success(backend, started)
+
+        await asyncio.gather(*(probe(backend) for backend in self.backends))
+
+    async def run_health_checks(self, interval: float = 15.0) -> None:
+        """Probe open breakers every `interval` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            await self.check_health()
+
+    def get_stats(self) -> dict:
+        return {
+            **super().get_stats(),
+            "strategy": self.strategy,
+            "failovers": self.failovers,
+            "backends": {
+                backend.name: {
+                    "kind": backend.spec.kind,
+                    "model": backend.spec.model,
+                    "weight": backend.spec.weight,
+                    "state": backend.breaker.state,
+                    "breaker_trips": backend.breaker.trips,
+                    **backend.stats.snapshot(),
+                    "rate_limiter": backend.limiter.get_stats(),
+                }
+                for backend in self.backends
+            },
+        }
+
+    def warm_up(self) -> None:
+        for backend in self.backends:
+            backend.provider.warm_up()
+
+    def close(self) -> None:
+        for backend in self.backends:
+            backend.provider.close()
+
+    async def aclose(self) -> None:
+        for backend in self.backends:
+            await backend.provider.aclose()
@@ -0,0 +1,334 @@
+"""
+Semantic Cache Module - Near-duplicate topic lookup for the result cache
+
+The exact cache key only absorbs case, whitespace and punctuation, so
+"Photosynthesis" and "photosynthesis in plants" are separate entries that
+each pay for a full pipeline run. The SemanticIndex embeds every stored
+topic and, when the exact lookup misses, returns the cache key of the most
+similar stored topic of the same grade (or grade band) if it clears a
+threshold.
+
+Topics are embedded locally on the CPU by a hashed character n-gram
+vectorizer: stop words are dropped, the remaining words are lightly
+stemmed, and each word's padded 3- to 5-grams plus the word itself are
+hashed into a fixed number of signed dimensions. Vectors are L2-normalized,
+so a dot product is the cosine similarity. This catches rewordings that
+share words ("plants and photosynthesis", "Photosynthesis in plants"); it
+does not know synonyms ("how plants make food").
+
+Two index types hold the vectors of each grade band:
+- BruteForceIndex: one NumPy matrix-vector product over every entry (exact)
+- IVFIndex: k-means inverted lists; only the lists nearest the query are
+  scanned (approximate, for 100k+ entries)
+
+The index lives in memory and only maps vectors to cache keys; the results
+themselves stay in the cache backend.
+"""
+
+import re
+import threading
+import time
+import zlib
+from array import array
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
+from metrics import registry
+
+registry.describe("semantic_cache_lookup_seconds", "histogram", "Semantic cache index lookup latency")
+
+STOP_WORDS = frozenset(
+    "a about all an and are as at basic basics by can do does explained explaining for from how in "
+    "intro introduction is it its learn learning lesson of on or overview the their to understanding "
+    "what when where which why with".split()
+)
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _stem(word: str) -> str:
+    """Strip common English plural and -ing endings ("plants" -> "plant")."""
+    if len(word) <= 3 or word.endswith("ss"):
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("oes"):
+        return word[:-2]
+    if word.endswith("ing") and len(word) > 5:
+        return word[:-3]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+# ============================================================================
+# Vectorizer
+# ============================================================================
+
+class TopicVectorizer:
+    """
+    Hashed character n-gram embeddings of topics.
+
+    A topic's vector is the sum of its content words' vectors, so word
+    vectors are computed once and cached.
+    """
+
+    def __init__(self, dim: int = 256, ngram_range: tuple[int, int] = (3, 5), word_cache_size: int = 65536):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self._word_vector = lru_cache(maxsize=word_cache_size)(self._compute_word_vector)
+
+    def words(self, topic: str) -> list[str]:
+        """Content words of a topic, stemmed, in order."""
+        words = _WORD.findall(topic.lower().replace("'", ""))
+        return [_stem(word) for word in words if word not in STOP_WORDS]
+
+    def _compute_word_vector(self, word: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        padded = f" {word} "
+        low, high = self.ngram_range
+        features = [padded] + [
+            padded[i:i + n] for n in range(low, high + 1) for i in range(len(padded) - n + 1)
+        ]
+        for feature in features:
+            digest = zlib.crc32(feature.encode("utf-8"))
+            vector[digest % self.dim] += 1.0 if digest & 0x80000000 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, topic: str) -> np.ndarray:
+        """Embed one topic as a unit vector (all zeros if it has no content words)."""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in dict.fromkeys(self.words(topic)):
+            vector += self._word_vector(word)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode_many(self, topics: list[str]) -> np.ndarray:
+        """Embed many topics into a (len(topics), dim) matrix."""
+        matrix = np.empty((len(topics), self.dim), dtype=np.float32)
+        for i, topic in enumerate(topics):
+            matrix[i] = self.encode(topic)
+        return matrix
+
+
+# ============================================================================
+# Vector Indexes
+# ============================================================================
+
+class BruteForceIndex:
+    """Exact nearest neighbour by one matrix-vector product over all entries."""
+
+    def __init__(self, dim: int, initial_capacity: int = 1024):
+        self.dim = dim
+        self._vectors = np.zeros((initial_capacity, dim), dtype=np.float32)
+        self._keys: list[Optional[str]] = []
+        self._rows: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _append(self, vectors: np.ndarray) -> int:
+        """Copy vectors into the next free rows, growing the matrix; return the first row."""
+        first = len(self._keys)
+        needed = first + len(vectors)
+        if needed > len(self._vectors):
+            grown = np.zeros((max(needed, 2 * len(self._vectors)), self.dim), dtype=np.float32)
+            grown[:first] = self._vectors[:first]
+            self._vectors = grown
+        self._vectors[first:needed] = vectors
+        return first
+
+    def add(self, key: str, vector: np.ndarray) -> None:
+        self.add_many([key], vector[None, :])
+
+    def add_many(self, keys: list[str], vectors: np.ndarray) -> None:
+        """Add or replace entries; a replaced key's old row becomes a tombstone."""
+        for key in keys:
+            if key in self._rows:
+                self.remove(key)
+        first = self._append(vectors)
+        for offset, key in enumerate(keys):
+            self._rows[key] = first + offset
+            self._keys.append(key)
+        self._added(first, len(keys))
+
+    def _added(self, first: int, count: int) -> None:
+        """Hook for subclasses that index new rows."""
+
+    def remove(self, key: str) -> None:
+        """Drop a key; its zeroed row can no longer match."""
+        row = self._rows.pop(key, None)
+        if row is not None:
+            self._vectors[row] = 0.0
+            self._keys[row] = None
+
+    def _best(self, rows: Optional[np.ndarray], query: np.ndarray) -> tuple[Optional[str], float]:
+        if rows is None:
+            scores = self._vectors[:len(self._keys)] @ query
+        else:
+            scores = self._vectors[rows] @ query
+        if not len(scores):
+            return None, 0.0
+        best = int(np.argmax(scores))
+        row = best if rows is None else int(rows[best])
+        return self._keys[row], float(scores[best])
+
+    def search(self, query: np.ndarray) -> tuple[Optional[str], float]:
+        """Return (key, cosine similarity) of the closest entry, or (None, 0.0) when empty."""
+        return self._best(None, query)
+
+
+class IVFIndex(BruteForceIndex):
+    """
+    Inverted-file index: entries are grouped by their nearest k-means centroid
+    and a query scans only the `nprobe` groups closest to it.
+
+    Below `train_size` entries it searches like BruteForceIndex. Centroids
+    are trained on a sample and retrained whenever the index has doubled.
+    """
+
+    def __init__(self, dim: int, nprobe: int = 8, train_size: int = 10000, sample_size: int = 20000, seed: int = 0):
+        super().__init__(dim)
+        self.nprobe = nprobe
+        self.train_size = train_size
+        self.sample_size = sample_size
+        self._rng = np.random.default_rng(seed)
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: list[array] = []
+        self._trained_at = 0
+
+    def _added(self, first: int, count: int) -> None:
+        size = len(self._keys)
+        if size >= self.train_size and size >= 2 * self._trained_at:
+            self._train()
+        elif self._centroids is not None:
+            self._assign(np.arange(first, first + count))
+
+    def _train(self) -> None:
+        size = len(self._keys)
+        lists = max(1, min(4096, int(4 * np.sqrt(size))))
+        sample = self._vectors[self._rng.choice(size, min(size, self.sample_size), replace=False)]
+        centroids = sample[self._rng.choice(len(sample), lists, replace=False)]
+        for _ in range(8):  # Spherical k-means: unit centroids, dot-product assignment
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+        self._centroids = centroids.astype(np.float32)
+        self._lists = [array("q") for _ in range(lists)]
+        self._trained_at = size
+        self._assign(np.arange(size))
+
+    def _assign(self, rows: np.ndarray, chunk: int = 16384) -> None:
+        for start in range(0, len(rows), chunk):
+            part = rows[start:start + chunk]
+            for row, centroid in zip(part.tolist(), np.argmax(self._vectors[part] @ self._centroids.T, axis=1).tolist()):
+                self._lists[centroid].append(row)
+
+    def search(self, query: np.ndarray) -> tuple[Optional[str], float]:
+        if self._centroids is None:
+            return super().search(query)
+        nearest = np.argpartition(-(self._centroids @ query), min(self.nprobe, len(self._lists)) - 1)[:self.nprobe]
+        rows = np.concatenate([np.frombuffer(self._lists[c], dtype=np.int64) for c in nearest.tolist()])
+        return self._best(rows, query)
+
+
+# ============================================================================
+# Semantic Index
+# ============================================================================
+
+class SemanticIndex:
+    """
+    Maps (grade band, topic) to the cache key of the closest stored topic.
+
+    Grades are grouped into bands of `grade_band` consecutive grades; the
+    default 1 keeps matches to the same grade, and 3 gives 1-3, 4-6, 7-9 and
+    10-12, the generator's language bands.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        grade_band: int = 1,
+        index_type: str = "brute",
+        vectorizer: Optional[TopicVectorizer] = None,
+    ):
+        if index_type not in ("brute", "ivf"):
+            raise ValueError(f"Unknown semantic index type: {index_type!r}")
+        self.threshold = threshold
+        self.grade_band = max(1, grade_band)
+        self.index_type = index_type
+        self.vectorizer = vectorizer or TopicVectorizer()
+        self._indexes: dict[int, BruteForceIndex] = {}
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.matches = 0
+        self.lookup_seconds = 0.0
+
+    def band(self, grade: int) -> int:
+        return (grade - 1) // self.grade_band
+
+    def _index(self, band: int) -> BruteForceIndex:
+        index = self._indexes.get(band)
+        if index is None:
+            dim = self.vectorizer.dim
+            index = IVFIndex(dim) if self.index_type == "ivf" else BruteForceIndex(dim)
+            self._indexes[band] = index
+        return index
+
+    def add(self, grade: int, topic: str, key: str) -> None:
+        """Index a stored result's topic under its cache key."""
+        vector = self.vectorizer.encode(topic)
+        if not vector.any():
+            return
+        with self._lock:
+            self._index(self.band(grade)).add(key, vector)
+
+    def add_many(self, grade: int, topics: list[str], keys: list[str]) -> None:
+        """Index many topics of one grade at once."""
+        vectors = self.vectorizer.encode_many(topics)
+        with self._lock:
+            self._index(self.band(grade)).add_many(keys, vectors)
+
+    def remove(self, grade: int, key: str) -> None:
+        """Forget a key whose result is gone from the cache backend."""
+        with self._lock:
+            index = self._indexes.get(self.band(grade))
+            if index is not None:
+                index.remove(key)
+
+    def lookup(self, grade: int, topic: str) -> Optional[tuple[str, float]]:
+        """Return (cache key, similarity) of the best match at or above the threshold."""
+        began = time.perf_counter()
+        vector = self.vectorizer.encode(topic)
+        match = None
+        if vector.any():
+            with self._lock:
+                index = self._indexes.get(self.band(grade))
+                if index is not None:
+                    key, score = index.search(vector)
+                    if key is not None and score >= self.threshold:
+                        match = (key, score)
+        elapsed = time.perf_counter() - began
+        registry.observe("semantic_cache_lookup_seconds", elapsed)
+        with self._lock:
+            self.lookups += 1
+            self.matches += match is not None
+            self.lookup_seconds += elapsed
+        return match
+
+    def __len__(self) -> int:
+        return sum(len(index) for index in self._indexes.values())
+
+    def get_stats(self) -> dict:
+        return {
+            "index": self.index_type,
+            "threshold": self.threshold,
+            "entries": len(self),
+            "lookups": self.lookups,
+            "matches": self.matches,
+            "avg_lookup_ms": 1000 * self.lookup_seconds / self.lookups if self.lookups else 0.0,
+        }
@@ -0,0 +1,55 @@
+"""
+Single-Flight Module - Coalesce concurrent identical work
+
+When a whole class submits the same topic at once, every request would
+otherwise start its own pipeline. SingleFlight lets the first caller for a
+key start the work and makes every concurrent caller with the same key
+await that same task instead.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent async calls sharing a key.
+
+    The shared work runs in its own task and callers await it through
+    asyncio.shield(), so a disconnecting client does not cancel the run for
+    everyone else waiting on it.
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.executions = 0
+        self.collapsed = 0
+
+    def running(self, key: Hashable) -> bool:
+        """Whether a run for key is in flight, i.e. do() would join it."""
+        return key in self._inflight
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn() for key, or join the run already in flight for it."""
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.collapsed += 1
+        return await asyncio.shield(task)
+
+    def get_stats(self) -> dict:
+        """Return coalescing counters for monitoring."""
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "collapsed": self.collapsed,
+            "in_flight": len(self._inflight),
+        }
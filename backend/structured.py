@@ -0,0 +1,377 @@
+"""
+Structured Output Module - Parsing LLM replies into pydantic models
+
+Both agents ask for a single JSON object. With JSON mode (see ModelProfile)
+the reply is exactly that and parse_model() validates it in one step with
+pydantic's native JSON parser, without building an intermediate dict.
+Replies from models or backends without JSON mode may still come wrapped
+in code fences or prose, or be malformed, so parsing falls back through:
+
+1. model_validate_json() on the raw text (the JSON mode fast path)
+2. the first balanced top-level object, found by a linear scan that
+   respects strings (instead of a greedy regex over the whole reply)
+3. local repair of common malformations: trailing commas, single quotes,
+   Python literals, raw newlines in strings and truncated output
+
+Schema errors are never repaired; they are raised as StructuredOutputError.
+
+JSONStream runs the same scan incrementally over a token stream so one
+string field (the explanation) can be shown as it arrives.
+"""
+
+import json
+import re
+from typing import Optional, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from metrics import registry
+
+M = TypeVar("M", bound=BaseModel)
+
+# Structural characters outside strings, and the characters that end a run of string content
+_STRUCTURAL = re.compile(r'[{}\[\]",:]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+registry.describe("structured_parse_total", "counter", "LLM replies parsed, by the step that succeeded")
+
+
+class StructuredOutputError(ValueError):
+    """An LLM reply could not be parsed into the expected model."""
+
+
+# ============================================================================
+# Incremental Scanning
+# ============================================================================
+
+class JSONStream:
+    """
+    Incremental scanner for the first JSON object in a reply.
+
+    Feed chunks in arrival order. Text before the opening brace (a code fence
+    or prose) is skipped, and each character is looked at once however the
+    reply is chunked. Without `field` scanning runs until the object closes.
+    With `field` naming a top-level string field, feed() returns its newly
+    decoded text (escape sequences resolved) so it can be shown before the
+    reply ends, and scanning stops once that field is complete; parse() then
+    works on the buffered reply.
+    """
+
+    def __init__(self, field: Optional[str] = None):
+        self.field = field
+        self._buffer = ""
+        self._pos = 0
+        self._start: Optional[int] = None
+        self._end: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._string_start = 0
+        self._expect_key = False
+        self._key: Optional[str] = None
+        self._value_key: Optional[str] = None
+        self._capturing = False
+        self._field_done = False
+
+    @property
+    def complete(self) -> bool:
+        """True once the outermost object has closed."""
+        return self._end is not None
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return self._buffer
+
+    def object_text(self) -> Optional[str]:
+        """The complete top-level object, or None while it is still open."""
+        if self._end is None:
+            return None
+        return self._buffer[self._start:self._end]
+
+    def feed(self, chunk: str) -> str:
+        """Consume a chunk and return any newly available text of `field`."""
+        self._buffer += chunk
+        if self._end is not None or self._field_done:
+            return ""
+        if self._start is None:
+            start = self._buffer.find("{", self._pos)
+            if start < 0:
+                self._pos = len(self._buffer)
+                return ""
+            self._start = self._pos = start
+        return self._scan()
+
+    def _scan(self) -> str:
+        out = []
+        buffer = self._buffer
+        pos = self._pos
+        while pos < len(buffer):
+            if self._in_string:
+                match = _STRING_SPECIAL.search(buffer, pos)
+                end = match.start() if match else len(buffer)
+                if self._capturing:
+                    out.append(buffer[pos:end])
+                pos = end
+                if match is None:
+                    break
+                if buffer[pos] == "\\":
+                    length = 6 if buffer[pos + 1:pos + 2] == "u" else 2
+                    if pos + length > len(buffer):
+                        break  # Escape sequence split across chunks; wait for more
+                    if self._capturing:
+                        try:
+                            out.append(json.loads(f'"{buffer[pos:pos + length]}"'))
+                        except json.JSONDecodeError:
+                            out.append(buffer[pos + 1:pos + length])
+                    pos += length
+                    continue
+                self._close_string(buffer, pos)
+                pos += 1
+                if self._field_done:
+                    break
+                continue
+
+            match = _STRUCTURAL.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            pos = match.start()
+            char = buffer[pos]
+            pos += 1
+            if char == '"':
+                self._open_string(pos)
+            elif char in "{[":
+                self._depth += 1
+                self._expect_key = self._depth == 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._end = pos
+                    break
+            elif self._depth == 1 and char == ",":
+                self._expect_key = True
+                self._value_key = None
+            elif self._depth == 1 and char == ":":
+                self._value_key = self._key
+        self._pos = pos
+        return "".join(out)
+
+    def _open_string(self, pos: int) -> None:
+        self._in_string = True
+        self._string_start = pos
+        self._capturing = (
+            self.field is not None and self._depth == 1
+            and not self._expect_key and self._value_key == self.field
+        )
+
+    def _close_string(self, buffer: str, pos: int) -> None:
+        self._in_string = False
+        self._field_done = self._capturing
+        self._capturing = False
+        if self._depth == 1 and self._expect_key:
+            self._expect_key = False
+            try:
+                self._key = json.loads(buffer[self._string_start - 1:pos + 1])
+            except json.JSONDecodeError:
+                self._key = None
+
+    def parse(self, model: type[M]) -> M:
+        """Validate the streamed reply into `model`, repairing it if needed."""
+        return parse_model(self._buffer, model, candidate=self.object_text())
+
+
+def extract_object(text: str) -> Optional[str]:
+    """Return the first balanced top-level JSON object in `text`, if it has one."""
+    stream = JSONStream()
+    stream.feed(text)
+    return stream.object_text()
+
+
+# ============================================================================
+# Repair
+# ============================================================================
+
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_STRING_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+
+# Characters the repair scanner acts on outside and inside strings; runs of anything else are copied
+_REPAIR_OUTSIDE = re.compile(r'[{}\[\]"\',A-Za-z_]')
+_REPAIR_STRING = re.compile(r'[\\"\'\n\r\t]')
+_WORD = re.compile(r"\w+")
+
+
+def repair_json(text: str) -> str:
+    """
+    Fix common malformations in an LLM's JSON without another model call.
+
+    Handles code fences and surrounding prose, single-quoted strings,
+    Python True/False/None, raw control characters inside strings, trailing
+    commas, and truncation: the open string and containers are closed, a
+    dangling key is dropped and so is a cut-off array element (a half-written
+    MCQ), leaving the complete ones. Content that is not JSON-like is
+    returned as is for the caller's parser to reject.
+    """
+    start = text.find("{")
+    if start < 0:
+        return text
+    out: list[str] = []
+    stack: list[tuple[str, int]] = []  # (closing character, output index of the opening one)
+    expect_key = False
+    key_start = -1  # Output index where an unfinished object key began
+    quote = None  # Delimiter of the open string, if any
+    i = start
+    n = len(text)
+    while i < n:
+        if quote is not None:
+            match = _REPAIR_STRING.search(text, i)
+            if match is None:
+                out.append(text[i:])
+                break
+            out.append(text[i:match.start()])
+            i = match.start()
+            char = text[i]
+            if char == "\\":
+                # \' is not a JSON escape; inside a single-quoted string it is just '
+                out.append("'" if quote == "'" and text[i + 1:i + 2] == "'" else text[i:i + 2])
+                i += 2
+                continue
+            if char == quote:
+                out.append('"')
+                quote = None
+                if expect_key:
+                    expect_key = False
+                    key_start = -1
+            elif char == '"':
+                out.append('\\"')  # A double quote inside a single-quoted string
+            else:
+                out.append(_STRING_ESCAPES.get(char, char))
+            i += 1
+            continue
+
+        match = _REPAIR_OUTSIDE.search(text, i)
+        if match is None:
+            out.append(text[i:])
+            break
+        out.append(text[i:match.start()])
+        i = match.start()
+        char = text[i]
+        if char in "\"'":
+            quote = char
+            if expect_key:
+                key_start = len(out)
+            out.append('"')
+        elif char in "{[":
+            stack.append(("}" if char == "{" else "]", len(out)))
+            expect_key = char == "{"
+            out.append(char)
+        elif char in "}]":
+            _strip_trailing_comma(out)
+            if stack:
+                stack.pop()
+            out.append(char)
+            if not stack:
+                break
+            expect_key = False
+        elif char == ",":
+            expect_key = stack[-1][0] == "}" if stack else False
+            out.append(char)
+        else:
+            word = _WORD.match(text, i).group()
+            out.append(_LITERALS.get(word, word))
+            i += len(word)
+            continue
+        i += 1
+
+    if quote is not None:
+        # Truncated inside a string: drop an unfinished key, close a value
+        if key_start >= 0:
+            del out[key_start:]
+        else:
+            out.append('"')
+    if stack:
+        for depth in range(len(stack) - 1, 0, -1):
+            if stack[depth][0] == "}" and stack[depth - 1][0] == "]":
+                del out[stack[depth][1]:]
+                del stack[depth:]
+                break
+        _strip_dangling(out, in_object=stack[-1][0] == "}")
+        out.extend(closer for closer, _ in reversed(stack))
+    return "".join(out)
+
+
+def _strip_trailing_comma(out: list[str]) -> None:
+    """Drop a comma (and whitespace) right before a closing bracket."""
+    while out:
+        tail = out[-1].rstrip()
+        if tail:
+            out[-1] = tail[:-1] if tail.endswith(",") else tail
+            return
+        out.pop()
+
+
+def _strip_dangling(out: list[str], in_object: bool) -> None:
+    """Drop a trailing comma, or an object key with no value, left by truncation."""
+    text = "".join(out).rstrip()
+    if in_object:
+        # In an object a string right after "{" or "," is a key, whatever follows it
+        text = re.sub(r'([,{])\s*"(?:[^"\\]|\\.)*"\s*:?\s*$', r"\1", text)
+    out[:] = [re.sub(r",\s*$", "", text)]
+
+
+# ============================================================================
+# Parsing
+# ============================================================================
+
+def _is_json_error(error: ValidationError) -> bool:
+    """True when validation failed on the JSON syntax rather than the schema."""
+    return any(e["type"] == "json_invalid" for e in error.errors())
+
+
+def _validate(text: str, model: type[M]) -> Optional[M]:
+    """Validate `text` as `model`; None on a JSON syntax error, raise on a schema error."""
+    try:
+        return model.model_validate_json(text)
+    except ValidationError as e:
+        if _is_json_error(e):
+            return None
+        raise StructuredOutputError(f"Reply does not match {model.__name__}: {e}") from e
+
+
+def _candidates(text: str):
+    """Likely object texts inside a reply, cheapest first."""
+    start, end = text.find("{"), text.rfind("}") + 1
+    # The outermost braces: right for fences and notes around the object
+    if 0 <= start < end:
+        yield text[start:end]
+    # The first balanced object: right when the surrounding text has braces too
+    yield extract_object(text)
+
+
+def parse_model(text: str, model: type[M], candidate: Optional[str] = None) -> M:
+    """
+    Parse an LLM reply into `model`, trying the cheapest step first.
+
+    `candidate` is the already extracted object when the caller scanned the
+    reply itself (JSONStream does this while streaming).
+    """
+    result = _validate(text, model)
+    if result is not None:
+        registry.inc("structured_parse_total", outcome="direct")
+        return result
+
+    tried = {text}
+    for option in [candidate] if candidate is not None else _candidates(text):
+        if option is None or option in tried:
+            continue
+        tried.add(option)
+        result = _validate(option, model)
+        if result is not None:
+            registry.inc("structured_parse_total", outcome="extracted")
+            return result
+
+    result = _validate(repair_json(text), model)
+    if result is not None:
+        registry.inc("structured_parse_total", outcome="repaired")
+        return result
+    registry.inc("structured_parse_total", outcome="failed")
+    raise StructuredOutputError(f"Reply is not valid JSON for {model.__name__}: {text[:200]!r}")
@@ -0,0 +1,116 @@
+"""
+Tracing Module - Nested timing spans with token usage
+
+Wrap any operation in ``span(name)`` to time it and count the LLM tokens
+consumed inside it. Inside a ``start_trace()`` block spans form a tree
+(following asyncio tasks, like usage trackers) that the pipeline attaches to
+its result; every span is also recorded in the Prometheus metrics registry,
+whether or not a trace is active.
+
+Spans used by the service:
+    pipeline                  one full pipeline execution (trace root)
+    generate/review/refine    pipeline stages
+    generate_completion       one LLM call (network + model time)
+    <agent>._build_prompt     prompt construction
+    <agent>._parse_response   JSON extraction and validation
+"""
+
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Iterator, Optional, TypeVar
+
+from metrics import registry
+from usage import TokenUsage, track_usage
+
+T = TypeVar("T")
+
+
+@dataclass
+class Span:
+    """One timed operation and the spans nested inside it."""
+    name: str
+    start_ms: float = 0.0
+    duration_ms: float = 0.0
+    usage: TokenUsage = field(default_factory=TokenUsage)
+    attributes: dict = field(default_factory=dict)
+    children: list["Span"] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        """Return a JSON-serializable view of the span tree."""
+        data: dict[str, Any] = {
+            "name": self.name,
+            "start_ms": round(self.start_ms, 3),
+            "duration_ms": round(self.duration_ms, 3),
+        }
+        if self.usage.calls:
+            data["tokens"] = self.usage.to_dict()
+        if self.attributes:
+            data["attributes"] = self.attributes
+        if self.children:
+            data["children"] = [child.to_dict() for child in sorted(self.children, key=lambda s: s.start_ms)]
+        return data
+
+
+# Innermost open span and the perf_counter origin of the active trace
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_trace_origin: ContextVar[Optional[float]] = ContextVar("trace_origin", default=None)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """Time the block, count its LLM tokens and attach it to the active trace."""
+    started = time.perf_counter()
+    origin = _trace_origin.get()
+    parent = _current_span.get()
+    current = Span(
+        name=name,
+        start_ms=1000 * (started - origin) if origin is not None else 0.0,
+        attributes=attributes,
+    )
+    token = _current_span.set(current)
+    try:
+        with track_usage(current.usage):
+            yield current
+    finally:
+        elapsed = time.perf_counter() - started
+        current.duration_ms = 1000 * elapsed
+        _current_span.reset(token)
+        if parent is not None:
+            parent.children.append(current)
+        registry.observe("span_duration_seconds", elapsed, span=name)
+        if current.usage.calls:
+            registry.inc("span_tokens_total", current.usage.prompt_tokens, span=name, type="prompt")
+            registry.inc("span_tokens_total", current.usage.completion_tokens, span=name, type="completion")
+
+
+@contextmanager
+def start_trace(name: str = "pipeline", **attributes: Any) -> Iterator[Span]:
+    """Open a root span that collects every span started inside the block."""
+    token = _trace_origin.set(time.perf_counter())
+    parent_token = _current_span.set(None)
+    try:
+        with span(name, **attributes) as root:
+            yield root
+    finally:
+        _current_span.reset(parent_token)
+        _trace_origin.reset(token)
+
+
+def traced(name: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Decorator that runs a synchronous function inside span(name)."""
+    def decorator(fn: Callable[..., T]) -> Callable[..., T]:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs) -> T:
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+async def traced_call(name: str, awaitable: Awaitable[T], **attributes: Any) -> T:
+    """Await inside span(name); for work started as a task that outlives the caller's block."""
+    with span(name, **attributes):
+        return await awaitable
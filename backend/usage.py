@@ -0,0 +1,57 @@
+"""
+Token Usage Module - Per-stage LLM token accounting
+
+Completion functions report each response's token usage with record_usage().
+Callers open a track_usage() block around a stage to collect what the calls
+inside it consumed. Trackers nest and follow asyncio tasks, because the
+active trackers live in a context variable.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Iterator, Optional
+
+
+@dataclass
+class TokenUsage:
+    """Accumulated token usage for one or more LLM calls."""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    calls: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def to_dict(self) -> dict:
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "calls": self.calls,
+        }
+
+
+_active_trackers: ContextVar[tuple[TokenUsage, ...]] = ContextVar("active_usage_trackers", default=())
+
+
+@contextmanager
+def track_usage(usage: Optional[TokenUsage] = None) -> Iterator[TokenUsage]:
+    """Collect the usage of every LLM call made inside the block."""
+    usage = usage if usage is not None else TokenUsage()
+    token = _active_trackers.set(_active_trackers.get() + (usage,))
+    try:
+        yield usage
+    finally:
+        _active_trackers.reset(token)
+
+
+def record_usage(response_usage: Any) -> None:
+    """Add a provider usage object (prompt/completion tokens) to all active trackers."""
+    prompt_tokens = getattr(response_usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(response_usage, "completion_tokens", 0) or 0
+    for usage in _active_trackers.get():
+        usage.prompt_tokens += prompt_tokens
+        usage.completion_tokens += completion_tokens
+        usage.calls += 1
@@ -11,7 +11,7 @@ import json
 import os
 import httpx
 from dataclasses import dataclass
-from typing import Optional
+from typing import Iterator, Optional
 
 # ============================================================================
 # Configuration
@@ -43,41 +43,44 @@ class PipelineResult:
     review_result: dict
     refined_content: Optional[dict] = None
     was_refined: bool = False
+    degraded: bool = False
 
 
-def call_api(grade: int, topic: str) -> PipelineResult:
-    """
-    Call the backend API to generate educational content.
-    
-    Default API: https://edu-agent-pipeline.onrender.com/generate
-    Local API (if USE_LOCAL_API=true): http://localhost:8000/generate
-    """
-    with httpx.Client(timeout=120.0) as client:
-        response = client.post(
-            f"{API_URL}/generate",
-            json={"grade": grade, "topic": topic}
-        )
-        response.raise_for_status()
-        data = response.json()
-        
-        return PipelineResult(
-            grade=data["grade"],
-            topic=data["topic"],
-            initial_content=data["initial_content"],
-            review_result=data["review_result"],
-            refined_content=data.get("refined_content"),
-            was_refined=data["was_refined"]
-        )
+def result_from_dict(data: dict) -> PipelineResult:
+    """Build a PipelineResult from an API response body."""
+    return PipelineResult(
+        grade=data["grade"],
+        topic=data["topic"],
+        initial_content=data["initial_content"],
+        review_result=data["review_result"],
+        refined_content=data.get("refined_content"),
+        was_refined=data["was_refined"],
+        degraded=data.get("degraded", False)
+    )
 
 
-def run_pipeline(grade: int, topic: str) -> PipelineResult:
+def stream_pipeline(grade: int, topic: str) -> Iterator[tuple[str, dict]]:
     """
-    Run the content generation pipeline via API call.
+    Stream pipeline progress from the backend as (event, data) pairs.
     
-    Uses deployed API by default.
-    Set USE_LOCAL_API=true to use local server.
+    Reads the Server-Sent Events from /generate/stream: `token` events carry
+    explanation text as it is generated, followed by `generated`, `reviewed`,
+    `refined` and finally `result` (or `error`).
     """
-    return call_api(grade, topic)
+    with httpx.Client(timeout=httpx.Timeout(120.0, read=60.0)) as client:
+        with client.stream(
+            "POST",
+            f"{API_URL}/generate/stream",
+            json={"grade": grade, "topic": topic}
+        ) as response:
+            response.raise_for_status()
+            event = "message"
+            for line in response.iter_lines():
+                if line.startswith("event:"):
+                    event = line[6:].strip()
+                elif line.startswith("data:"):
+                    yield event, json.loads(line[5:])
+                    event = "message"
 
 
 # ============================================================================
@@ -593,15 +596,28 @@ def main():
         
         with st.status("🔄 Running AI Pipeline...", expanded=True) as status:
             st.write("📝 **Step 1:** Generator Agent creating content...")
+            preview = st.empty()
+            streamed_text = ""
             
             try:
-                result = run_pipeline(grade=grade, topic=topic)
-                st.session_state.result = result
-                
-                st.write("🔍 **Step 2:** Reviewer Agent evaluating content...")
+                # Render each stage as soon as the backend reports it
+                for event, data in stream_pipeline(grade=grade, topic=topic):
+                    if event == "token":
+                        streamed_text += data["delta"]
+                        preview.markdown(streamed_text)
+                    elif event == "generated":
+                        st.write("🔍 **Step 2:** Reviewer Agent evaluating content...")
+                    elif event == "reviewed" and data["status"] == "fail" and data["feedback"]:
+                        st.write("✨ **Step 3:** Refining content based on feedback...")
+                        preview = st.empty()
+                        streamed_text = ""
+                    elif event == "result":
+                        st.session_state.result = result_from_dict(data)
+                    elif event == "error":
+                        raise RuntimeError(data["detail"])
                 
-                if result.was_refined:
-                    st.write("✨ **Step 3:** Refining content based on feedback...")
+                if st.session_state.result is None:
+                    raise RuntimeError("Stream ended before the pipeline finished")
                 
                 status.update(label="✅ Pipeline Complete!", state="complete", expanded=False)
                 
@@ -646,6 +662,8 @@ def main():
             with tab3:
                 display_review(result.review_result)
         else:
+            if result.degraded:
+                st.warning("Refinement was skipped to answer in time: this is the first draft, see the review for its issues.")
             tab1, tab2 = st.tabs(["📖 Content & Quiz", "🔍 Review"])
             
             with tab1:
@@ -670,7 +688,7 @@ def main():
             status_icon = "✅" if result.review_result["status"] == "pass" else "⚠️"
             st.metric("🔍 Review", f"{status_icon} {result.review_result['status'].upper()}")
         with col4:
-            st.metric("✨ Refined", "Yes" if result.was_refined else "No")
+            st.metric("✨ Refined", "Yes" if result.was_refined else "Skipped" if result.degraded else "No")
         
         # Export section
         with st.expander("📥 Export Data"):